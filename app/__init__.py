@@ -2,6 +2,7 @@ from flask import Flask
 from flask_migrate import Migrate
 from app.config import Config
 from app.models import db
+from app.metricas_services import PoolMedido, metricas_pool, iniciar_log_periodico
 
 migrate = Migrate()
 
@@ -9,15 +10,26 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # O pool medido registra o tempo de espera por conexão; os demais números vêm dos eventos do pool.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**app.config['SQLALCHEMY_ENGINE_OPTIONS'], 'poolclass': PoolMedido}
     db.init_app(app)
     migrate.init_app(app, db)
+    with app.app_context():
+        metricas_pool.instrumentar(db.engine)
+    if app.config['METRICAS_LOG_SEGUNDOS']:
+        iniciar_log_periodico(app.config['METRICAS_LOG_SEGUNDOS'])
 
     from app.auth.routes import auth_bp
     from app.cliente.routes import cliente_bp
     from app.funcionario.routes import funcionario_bp 
+    from app.metricas.routes import metricas_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(cliente_bp, url_prefix='/cliente')
     app.register_blueprint(funcionario_bp, url_prefix='/funcionario') 
+    app.register_blueprint(metricas_bp)
+
+    from app.comandos import registrar_comandos
+    registrar_comandos(app)
 
     return app
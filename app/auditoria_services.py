@@ -0,0 +1,139 @@
+# Este módulo grava os eventos de auditoria (login, abertura de conta, importações...).
+# No modo 'assincrono' os eventos vão para uma fila limitada em memória e uma thread
+# em segundo plano os grava em lote (um INSERT com várias linhas por vez), sem somar um
+# commit a cada requisição. Se a fila enche, o evento é descartado e contado nas métricas.
+# No modo 'transacao' cada evento entra na transação da própria requisição: nada se
+# perde, mas cada evento é gravado junto com o commit de quem chamou.
+# Eventos que precisam ser atômicos com a operação (ex.: abertura de conta) usam
+# atomico=True e vão sempre na transação, qualquer que seja o modo.
+
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app.models import db, Auditoria
+from app.metricas_services import registrar_coletor
+
+MODOS = ('assincrono', 'transacao')
+
+
+class GravadorAuditoria:
+    """
+    Fila limitada de eventos e a thread que os grava em lote. A thread espera até
+    `intervalo` segundos pelo primeiro evento e então junta até `lote` eventos num
+    único INSERT, numa transação própria (não usa a sessão das requisições).
+    """
+
+    def __init__(self, engine, fila_maxima, lote, intervalo):
+        self.engine = engine
+        self.fila_maxima = fila_maxima
+        self.lote = lote
+        self.intervalo = intervalo
+        self._fila = queue.Queue(maxsize=fila_maxima)
+        self._lock = threading.Lock()
+        self._encerrando = threading.Event()
+        self.gravados = 0
+        self.descartados = 0
+        self.falhas = 0
+        self.lotes = 0
+        self._thread = threading.Thread(target=self._executar, name='auditoria', daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, evento):
+        """Retorna False (e conta como descartado) se a fila estiver cheia."""
+        try:
+            self._fila.put_nowait(evento)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+            print(f"[auditoria] Fila cheia, evento descartado: {evento['acao']} (usuário {evento['id_usuario']})", flush=True)
+            return False
+
+    def _proximo_lote(self):
+        try:
+            eventos = [self._fila.get(timeout=self.intervalo)]
+        except queue.Empty:
+            return []
+        while len(eventos) < self.lote:
+            try:
+                eventos.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return eventos
+
+    def _gravar(self, eventos):
+        try:
+            with self.engine.begin() as conexao:
+                conexao.execute(Auditoria.__table__.insert(), eventos)
+        except Exception as e:
+            with self._lock:
+                self.falhas += len(eventos)
+            print(f"[auditoria] Falha ao gravar {len(eventos)} evento(s): {e}", flush=True)
+            return
+        with self._lock:
+            self.gravados += len(eventos)
+            self.lotes += 1
+
+    def _executar(self):
+        while not (self._encerrando.is_set() and self._fila.empty()):
+            eventos = self._proximo_lote()
+            if eventos:
+                self._gravar(eventos)
+
+    def encerrar(self, timeout=10):
+        """Grava o que ainda estiver na fila e para a thread (chamado na saída do processo)."""
+        self._encerrando.set()
+        self._thread.join(timeout)
+
+    def metricas(self):
+        with self._lock:
+            return [
+                ('auditoria_fila_tamanho', 'gauge', 'Eventos de auditoria aguardando gravação.', self._fila.qsize()),
+                ('auditoria_fila_capacidade', 'gauge', 'Tamanho máximo da fila de auditoria.', self.fila_maxima),
+                ('auditoria_eventos_gravados_total', 'counter', 'Eventos de auditoria gravados pela fila.', self.gravados),
+                ('auditoria_eventos_descartados_total', 'counter', 'Eventos descartados por fila cheia.', self.descartados),
+                ('auditoria_eventos_falhos_total', 'counter', 'Eventos perdidos por erro ao gravar o lote.', self.falhas),
+                ('auditoria_lotes_total', 'counter', 'INSERTs em lote executados.', self.lotes),
+            ]
+
+
+_gravador = None
+_gravador_lock = threading.Lock()
+
+
+def _obter_gravador():
+    global _gravador
+    with _gravador_lock:
+        if _gravador is None:
+            config = current_app.config
+            _gravador = GravadorAuditoria(db.engine, config['AUDITORIA_FILA_MAXIMA'], config['AUDITORIA_LOTE'],
+                                          config['AUDITORIA_INTERVALO_SEGUNDOS'])
+            atexit.register(_gravador.encerrar)
+        return _gravador
+
+
+def _metricas_auditoria():
+    return _gravador.metricas() if _gravador is not None else []
+
+
+registrar_coletor(_metricas_auditoria)
+
+
+def registrar_auditoria(id_usuario, acao, detalhes=None, atomico=False):
+    """
+    Registra um evento de auditoria. Com atomico=True (ou no modo 'transacao') o evento
+    entra na sessão atual e é gravado no commit de quem chamou; no modo 'assincrono'
+    vai para a fila e é gravado em segundo plano.
+    """
+    modo = current_app.config['AUDITORIA_MODO']
+    if modo not in MODOS:
+        raise ValueError(f"Modo de auditoria desconhecido: {modo}")
+    data_hora = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    if atomico or modo == 'transacao':
+        db.session.add(Auditoria(id_usuario=id_usuario, acao=acao, detalhes=detalhes, data_hora=data_hora))
+        return
+    _obter_gravador().enfileirar({'id_usuario': id_usuario, 'acao': acao, 'detalhes': detalhes, 'data_hora': data_hora})
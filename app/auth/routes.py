@@ -1,64 +1,64 @@
-import os
 import random
 from datetime import datetime, timedelta, timezone
 from flask import (Blueprint, render_template, request, redirect, url_for, flash, session)
-from werkzeug.security import check_password_hash, generate_password_hash
 
 
-from app.models import db, Usuario, Auditoria
-from app.auth_services import enviar_email_otp
+from app.models import db, Usuario
+from app.auth_services import enfileirar_email_otp
+from app.auditoria_services import registrar_auditoria
+from app.senha_services import MENSAGEM_OCUPADO, SENHAS_INDISPONIVEIS, gerar_hash_senha, verificar_e_atualizar_senha
+from app.login_services import (TEMPO_BLOQUEIO_MINUTOS, minutos_de_bloqueio,
+                                registrar_falha, registrar_sucesso)
 
 auth_bp = Blueprint('auth', __name__)
 
-TENTATIVAS_MAXIMAS = 3
-TEMPO_BLOQUEIO_MINUTOS = 10
-
 @auth_bp.route('/')
 def index():
     return render_template('auth/index.html')
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
-    if os.path.exists('token.json'):
-        os.remove('token.json')
-        
     cpf_recebido = request.form.get('cpf', '').strip()
     senha_recebida = request.form.get('senha', '').strip()
     tipo_recebido = request.form.get('tipo', '').strip()
-    
-    print(f"\n--- [DEBUG] Tentativa de Login para CPF: {cpf_recebido} ---")
-    
+
     usuario = Usuario.query.filter_by(CPF=cpf_recebido, tipo_usuario=tipo_recebido).first()
 
     if not usuario:
-        print("[DEBUG] ERRO: Usuário não encontrado no banco de dados.")
         flash('CPF, senha ou tipo de usuário inválidos.', 'danger')
         return redirect(url_for('auth.index'))
 
-    print(f"[DEBUG] Senha recebida do formulário: '{senha_recebida}'")
-    
+    minutos_restantes = minutos_de_bloqueio(usuario.id_usuario)
+    if minutos_restantes:
+        flash(f'Usuário bloqueado. Tente novamente em {minutos_restantes} minuto(s).', 'danger')
+        return redirect(url_for('auth.index'))
 
-    senha_correta = check_password_hash(usuario.senha_hash, senha_recebida)
-    
-    print(f"[DEBUG] Resultado da verificação da senha: {senha_correta}")
+    try:
+        # Se o hash estiver com parâmetros antigos, já é refeito aqui e gravado no commit abaixo.
+        senha_correta = verificar_e_atualizar_senha(usuario, senha_recebida)
+    except SENHAS_INDISPONIVEIS:
+        flash(MENSAGEM_OCUPADO, 'warning')
+        return redirect(url_for('auth.index'))
 
     if senha_correta:
-        print("[DEBUG] SUCESSO: Senha correta. Prosseguindo para OTP.")
-        db.session.add(Auditoria(id_usuario=usuario.id_usuario, acao='Login', detalhes='Sucesso'))
-        db.session.commit()
+        registrar_sucesso(usuario.id_usuario)
+        registrar_auditoria(usuario.id_usuario, 'Login', 'Sucesso')
         otp = str(random.randint(100000, 999999))
-        if enviar_email_otp(usuario.email, usuario.nome, otp):
-            usuario.otp_ativo = otp
-            usuario.otp_expiracao = datetime.now(timezone.utc) + timedelta(minutes=10)
-            db.session.commit()
-            session['id_usuario_para_verificar'] = usuario.id_usuario
-            flash('Um código de verificação foi enviado para o seu e-mail.', 'info')
-            return redirect(url_for('auth.verify_otp'))
-        else:
-            return redirect(url_for('auth.index'))
+        usuario.otp_ativo = otp
+        usuario.otp_expiracao = datetime.now(timezone.utc) + timedelta(minutes=10)
+        db.session.commit()
+        enfileirar_email_otp(usuario.email, usuario.nome, otp)
+        session['id_usuario_para_verificar'] = usuario.id_usuario
+        flash('Um código de verificação foi enviado para o seu e-mail.', 'info')
+        return redirect(url_for('auth.verify_otp'))
     else:
-        print("[DEBUG] FALHA: Senha incorreta.")
-        flash('CPF, senha ou tipo de usuário inválidos.', 'danger')
+        numero_tentativa, bloqueou = registrar_falha(usuario.id_usuario)
+        registrar_auditoria(usuario.id_usuario, 'Login', f'Falha na autenticação (Tentativa {numero_tentativa})')
+        db.session.commit()
+        if bloqueou:
+            flash(f'Usuário bloqueado por {TEMPO_BLOQUEIO_MINUTOS} minutos devido a múltiplas tentativas de login falhas.', 'danger')
+        else:
+            flash('CPF, senha ou tipo de usuário inválidos.', 'danger')
         return redirect(url_for('auth.index'))
 
 
@@ -109,7 +109,11 @@ def mudar_senha():
         else:
             user_id = session['user_id']
             usuario = Usuario.query.get(user_id)
-            usuario.senha_hash = generate_password_hash(nova_senha)
+            try:
+                usuario.senha_hash = gerar_hash_senha(nova_senha)
+            except SENHAS_INDISPONIVEIS:
+                flash(MENSAGEM_OCUPADO, 'warning')
+                return render_template('auth/mudar_senha.html')
             usuario.senha_provisoria = False
             db.session.commit()
             flash('Senha alterada com sucesso! Bem-vindo(a).', 'success')
@@ -123,7 +127,5 @@ def mudar_senha():
 @auth_bp.route('/logout')
 def logout():
     session.clear()
-    if os.path.exists('token.json'):
-        os.remove('token.json')
     flash('Você foi desconectado.', 'info')
     return redirect(url_for('auth.index'))
@@ -1,10 +1,26 @@
-# Este módulo cuida exclusivamente da interação com a API do Google.
+# Este módulo cuida do envio dos e-mails com OTP.
+# O envio roda numa fila em segundo plano (pool de threads), com novas tentativas
+# e espera exponencial, para que a requisição de login não fique bloqueada.
+# O transporte é configurável: Gmail (produção), SMTP local ou arquivo (testes e carga).
 
 import os
+import time
 import base64
+import smtplib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 
-from flask import flash, redirect, url_for
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from flask import current_app
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,50 +28,186 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
+ASSUNTO_OTP = "Seu Código de Acesso - Banco Malvader"
+MARGEM_RENOVACAO_TOKEN = timedelta(minutes=5)
+
+
+@contextmanager
+def _trava_arquivo(caminho):
+    """Trava exclusiva entre processos (workers) usando um arquivo de lock."""
+    with open(caminho, 'a+') as arquivo:
+        if fcntl:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+            else:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
 
-def enviar_email_otp(destinatario, nome_usuario, otp):
+
+class CredenciaisGmail:
     """
-    Gera as credenciais do Google, envia um e-mail com o código OTP e
-    cuida do fluxo de autorização. Retorna True em caso de sucesso, False em caso de falha.
+    Guarda as credenciais OAuth em memória e as renova antes de expirarem.
+    A renovação é coordenada entre workers por um lock de arquivo: quem chega
+    depois relê o token.json já renovado em vez de chamar o Google de novo.
+    O token nunca é apagado durante as requisições.
     """
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"Erro ao atualizar token, forçando novo login: {e}")
-                if os.path.exists('token.json'):
-                    os.remove('token.json')
-                creds = None
-        
-        if not creds:
-            try:
-                flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
+
+    def __init__(self, caminho_token='token.json', caminho_segredos='credentials.json'):
+        self.caminho_token = caminho_token
+        self.caminho_segredos = caminho_segredos
+        self._creds = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _precisa_renovar(creds):
+        if not creds.valid:
+            return True
+        # O expiry das credenciais do Google é um datetime UTC sem fuso.
+        agora = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry is not None and creds.expiry - MARGEM_RENOVACAO_TOKEN <= agora
+
+    def obter(self):
+        with self._lock:
+            if self._creds is None or self._precisa_renovar(self._creds):
+                self._creds = self._carregar_ou_renovar()
+            return self._creds
+
+    def _carregar_ou_renovar(self):
+        with _trava_arquivo(self.caminho_token + '.lock'):
+            creds = None
+            if os.path.exists(self.caminho_token):
+                creds = Credentials.from_authorized_user_file(self.caminho_token, SCOPES)
+                if not self._precisa_renovar(creds):
+                    return creds
+
+            if creds and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                except RefreshError as e:
+                    print(f"Erro ao atualizar token, forçando novo login: {e}")
+                    creds = None
+
+            if not creds:
+                flow = InstalledAppFlow.from_client_secrets_file(self.caminho_segredos, SCOPES)
                 creds = flow.run_local_server(port=8080)
-            except Exception as e:
-                print(f"Falha ao iniciar o fluxo de autorização: {e}")
-                flash("Não foi possível iniciar a autenticação com o Google. Verifique o arquivo credentials.json.", "danger")
-                return False
-
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
-
-    try:
-        service = build('gmail', 'v1', credentials=creds)
-        corpo_email = f"Olá, {nome_usuario}.\n\nSeu código de acesso para o Banco Malvader é: {otp}\n\nEste código expira em 10 minutos."
-        message = MIMEText(corpo_email)
+
+            caminho_temporario = self.caminho_token + '.tmp'
+            with open(caminho_temporario, 'w') as token:
+                token.write(creds.to_json())
+            os.replace(caminho_temporario, self.caminho_token)
+            return creds
+
+
+class TransporteGmail:
+    """Envia pela API do Gmail. O cliente só é reconstruído quando as credenciais mudam."""
+
+    def __init__(self, credenciais=None):
+        self.credenciais = credenciais or CredenciaisGmail()
+        self._service = None
+        self._creds_do_service = None
+        self._lock = threading.Lock()
+
+    def _obter_service(self):
+        creds = self.credenciais.obter()
+        with self._lock:
+            if self._service is None or self._creds_do_service is not creds:
+                self._service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+                self._creds_do_service = creds
+            return self._service
+
+    def enviar(self, destinatario, assunto, corpo):
+        message = MIMEText(corpo)
         message['To'] = destinatario
-        message['Subject'] = "Seu Código de Acesso - Banco Malvader"
+        message['Subject'] = assunto
         encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-        create_message = {'raw': encoded_message}
-        service.users().messages().send(userId="me", body=create_message).execute()
-        print(f"E-mail com OTP enviado para {destinatario}.")
-        return True
-    except (HttpError, ValueError) as error:
-        print(f'Ocorreu um erro ao enviar o e-mail ou na autorização: {error}')
-        flash("Ocorreu um problema com o serviço de e-mail. Tente novamente.", "danger")
-        return False
+        self._obter_service().users().messages().send(userId="me", body={'raw': encoded_message}).execute()
+
+
+class TransporteSMTP:
+    """Envia para um servidor SMTP (por exemplo, um stub local como `python -m aiosmtpd`)."""
+
+    def __init__(self, host, porta, remetente):
+        self.host, self.porta, self.remetente = host, porta, remetente
+
+    def enviar(self, destinatario, assunto, corpo):
+        message = MIMEText(corpo)
+        message['From'] = self.remetente
+        message['To'] = destinatario
+        message['Subject'] = assunto
+        with smtplib.SMTP(self.host, self.porta, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+class TransporteArquivo:
+    """Acrescenta cada e-mail a um arquivo texto, sem sair da máquina."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def enviar(self, destinatario, assunto, corpo):
+        with self._lock, open(self.caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(f"Para: {destinatario}\nAssunto: {assunto}\n\n{corpo}\n{'-' * 40}\n")
+
+
+_executor = None
+_transporte = None
+_fila_lock = threading.Lock()
+
+
+def _criar_transporte(config):
+    tipo = config['OTP_TRANSPORTE']
+    if tipo == 'gmail':
+        return TransporteGmail()
+    if tipo == 'smtp':
+        return TransporteSMTP(config['OTP_SMTP_HOST'], config['OTP_SMTP_PORTA'], config['OTP_SMTP_REMETENTE'])
+    if tipo == 'arquivo':
+        return TransporteArquivo(config['OTP_ARQUIVO'])
+    raise ValueError(f"Transporte de OTP desconhecido: {tipo}")
+
+
+def _obter_fila():
+    global _executor, _transporte
+    with _fila_lock:
+        if _executor is None:
+            config = current_app.config
+            _transporte = _criar_transporte(config)
+            _executor = ThreadPoolExecutor(max_workers=config['OTP_THREADS'], thread_name_prefix='otp')
+        return _executor, _transporte
+
+
+def _enviar_com_retentativas(transporte, destinatario, assunto, corpo, tentativas, espera_inicial):
+    for tentativa in range(1, tentativas + 1):
+        try:
+            transporte.enviar(destinatario, assunto, corpo)
+            print(f"E-mail com OTP enviado para {destinatario}.")
+            return True
+        except (HttpError, ValueError, OSError, smtplib.SMTPException) as error:
+            print(f'Falha ao enviar o e-mail (tentativa {tentativa}/{tentativas}): {error}')
+            if tentativa < tentativas:
+                time.sleep(espera_inicial * 2 ** (tentativa - 1))
+        except Exception as error:
+            # Erro inesperado (não é falha de rede/servidor): não adianta repetir. Sem este
+            # registro a exceção ficaria guardada no Future, que ninguém consulta.
+            print(f'Erro inesperado ao enviar o e-mail para {destinatario}: {error!r}')
+            return False
+    return False
+
+
+def enfileirar_email_otp(destinatario, nome_usuario, otp):
+    """
+    Coloca o e-mail com o código OTP na fila de envio e retorna imediatamente.
+    Retorna o Future do envio (resultado True/False), útil em testes.
+    """
+    executor, transporte = _obter_fila()
+    config = current_app.config
+    corpo_email = f"Olá, {nome_usuario}.\n\nSeu código de acesso para o Banco Malvader é: {otp}\n\nEste código expira em 10 minutos."
+    return executor.submit(_enviar_com_retentativas, transporte, destinatario, ASSUNTO_OTP, corpo_email,
+                           config['OTP_TENTATIVAS'], config['OTP_ESPERA_INICIAL_SEGUNDOS'])
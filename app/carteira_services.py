@@ -0,0 +1,66 @@
+# Este módulo monta a visão consolidada das contas de um cliente (carteira).
+
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func, literal, union_all, case
+
+from app.models import db, Conta, Transacao
+
+
+def resumo_carteira(id_cliente, agora=None):
+    """
+    Uma linha por conta do cliente, com saldo, créditos e débitos do mês corrente
+    e a data da última movimentação, tudo numa única consulta.
+    creditos_externos_mes/debitos_externos_mes deixam de fora as transferências entre
+    duas contas do próprio cliente, que entrariam em dobro nos totais da carteira.
+    Os totais do mês vêm de um GROUP BY sobre as transações do mês (ramo de destino
+    e ramo de origem, cada um pelo seu índice) ligadas à conta. A última movimentação
+    vem de dois MAX correlacionados, resolvidos direto nos índices (id_conta_*, data_hora).
+    """
+    agora = agora or datetime.now(timezone.utc).replace(tzinfo=None)
+    inicio_mes = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    conta = Conta.__table__
+    contas_do_cliente = select(conta.c.id_conta).where(conta.c.id_cliente == id_cliente)
+
+    def externo(outro_lado):
+        return case((outro_lado.in_(contas_do_cliente), 0), else_=Transacao.valor)
+
+    creditos = select(Transacao.id_conta_destino.label('id_conta'), Transacao.valor.label('credito'),
+                      literal(0).label('debito'), externo(Transacao.id_conta_origem).label('credito_externo'),
+                      literal(0).label('debito_externo')).where(
+        Transacao.id_conta_destino.in_(contas_do_cliente), Transacao.data_hora >= inicio_mes)
+    debitos = select(Transacao.id_conta_origem, literal(0), Transacao.valor, literal(0),
+                     externo(Transacao.id_conta_destino)).where(
+        Transacao.id_conta_origem.in_(contas_do_cliente), Transacao.data_hora >= inicio_mes)
+    movimentos = union_all(creditos, debitos).subquery('movimentos')
+
+    ultima_entrada = (select(func.max(Transacao.data_hora))
+                      .where(Transacao.id_conta_destino == conta.c.id_conta).scalar_subquery())
+    ultima_saida = (select(func.max(Transacao.data_hora))
+                    .where(Transacao.id_conta_origem == conta.c.id_conta).scalar_subquery())
+
+    stmt = (
+        select(conta.c.id_conta, conta.c.numero_conta, conta.c.tipo_conta, conta.c.status, conta.c.saldo,
+               func.coalesce(func.sum(movimentos.c.credito), 0).label('creditos_mes'),
+               func.coalesce(func.sum(movimentos.c.debito), 0).label('debitos_mes'),
+               func.coalesce(func.sum(movimentos.c.credito_externo), 0).label('creditos_externos_mes'),
+               func.coalesce(func.sum(movimentos.c.debito_externo), 0).label('debitos_externos_mes'),
+               ultima_entrada.label('ultima_entrada'), ultima_saida.label('ultima_saida'))
+        .select_from(conta)
+        .outerjoin(movimentos, movimentos.c.id_conta == conta.c.id_conta)
+        .where(conta.c.id_cliente == id_cliente)
+        .group_by(conta.c.id_conta)
+        .order_by(conta.c.id_conta)
+    )
+
+    contas = []
+    for linha in db.session.execute(stmt):
+        datas = [d for d in (linha.ultima_entrada, linha.ultima_saida) if d is not None]
+        contas.append({
+            'id_conta': linha.id_conta, 'numero_conta': linha.numero_conta, 'tipo_conta': linha.tipo_conta,
+            'status': linha.status, 'saldo': linha.saldo, 'creditos_mes': linha.creditos_mes,
+            'debitos_mes': linha.debitos_mes, 'creditos_externos_mes': linha.creditos_externos_mes,
+            'debitos_externos_mes': linha.debitos_externos_mes,
+            'ultima_movimentacao': max(datas) if datas else None,
+        })
+    return contas
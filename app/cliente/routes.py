@@ -1,20 +1,33 @@
 from functools import wraps
 from decimal import Decimal
 import io
-from datetime import datetime, timedelta, timezone
+import os
+import csv
+import tempfile
+from concurrent.futures import TimeoutError as TempoEsgotado
 from flask import (Blueprint, render_template, request, redirect,
-                   url_for, flash, session, send_file)
-from sqlalchemy import or_, func
-import pandas as pd
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+                   url_for, flash, session, send_file, Response, stream_with_context, current_app, g)
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill
 
-from app.models import db, Cliente, Conta, Transacao, ContaCorrente, ContaPoupanca, ContaInvestimento
+from app.models import db, Conta, Transacao, ContaInvestimento
+from app.identidade_services import carregar_cliente, conta_selecionada
+from app.extrato_services import intervalo_datas, periodo_padrao, consultar_extrato, iterar_extrato, ultima_transacao_extrato
+from app.pdf_services import obter_pdf_em_cache, gerar_pdf
+from app.saldo_services import resumo_periodo
+from app.movimentacao_services import bloquear_contas, saldo_disponivel, creditar, debitar, transferir
+from app.contador_services import registrar_contador, total_ultimas_horas, quantidade_no_mes
+from app.dashboard_services import obter_painel
+from app.carteira_services import resumo_carteira
 
 cliente_bp = Blueprint('cliente', __name__)
 
 LIMITE_DIARIO_DEPOSITO = Decimal('10000.00')
 TAXA_SAQUE_EXCESSIVO = Decimal('5.00')
 LIMITE_SAQUES_GRATUITOS = 5
+COLUNAS_EXPORTACAO = ['Data', 'Tipo', 'Descrição', 'Valor (R$)', 'Saldo após (R$)']
+LINHAS_POR_BLOCO_CSV = 500
 
 def login_required(role=None):
     def decorator(f):
@@ -31,32 +44,62 @@ def login_required(role=None):
     return decorator
 
 
+@cliente_bp.context_processor
+def inject_contas():
+    """Contas do cliente para o seletor do menu, quando a rota já carregou o cliente."""
+    cliente = g.get('cliente')
+    if cliente is None:
+        return dict(contas_cliente=[], conta_atual=None)
+    conta = conta_selecionada(cliente)
+    return dict(contas_cliente=cliente.contas, conta_atual=conta.id_conta if conta else None)
+
+
+@cliente_bp.route('/selecionar-conta', methods=['POST'])
+@login_required(role='Cliente')
+def selecionar_conta():
+    cliente = carregar_cliente()
+    id_conta = request.form.get('id_conta', type=int)
+    if any(conta.id_conta == id_conta for conta in cliente.contas):
+        session['id_conta_selecionada'] = id_conta
+    else:
+        flash('Conta não encontrada.', 'danger')
+    # Volta para a página de onde o cliente trocou de conta, se for deste site.
+    if request.referrer and request.referrer.startswith(request.host_url):
+        return redirect(request.referrer)
+    return redirect(url_for('cliente.dashboard'))
+
+
+@cliente_bp.route('/carteira')
+@login_required(role='Cliente')
+def carteira():
+    cliente = carregar_cliente()
+    contas = resumo_carteira(cliente.id_cliente)
+    # Nos totais, transferências entre as próprias contas não contam como crédito nem débito.
+    totais = {
+        'saldo': sum((c['saldo'] for c in contas), Decimal('0')),
+        'creditos_mes': sum((c['creditos_externos_mes'] for c in contas), Decimal('0')),
+        'debitos_mes': sum((c['debitos_externos_mes'] for c in contas), Decimal('0')),
+    }
+    return render_template('cliente/carteira.html', nome_usuario=cliente.usuario.nome, contas=contas, totais=totais)
+
+
 @cliente_bp.route('/dashboard')
 @login_required(role='Cliente')
 def dashboard():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0] if cliente.contas else None
-    saldo_atual, ultimas_transacoes, detalhes_conta = 0.0, [], None
-    if conta:
-        saldo_atual = conta.saldo
-        if isinstance(conta, ContaCorrente):
-            detalhes_conta = {'limite_cheque_especial': conta.limite_cheque_especial}
-        elif isinstance(conta, ContaPoupanca):
-            detalhes_conta = {'taxa_rendimento': conta.taxa_rendimento}
-        elif isinstance(conta, ContaInvestimento):
-            detalhes_conta = {'perfil_risco': conta.perfil_risco, 'valor_minimo_deposito': conta.valor_minimo_deposito}
-        ultimas_transacoes = Transacao.query.filter(or_(Transacao.id_conta_origem == conta.id_conta, Transacao.id_conta_destino == conta.id_conta)).order_by(Transacao.data_hora.desc()).limit(5).all()
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
+    painel = obter_painel(conta) if conta else {'saldo': 0.0, 'tipo_conta': None, 'detalhes_conta': None, 'transacoes': []}
     return render_template('cliente/dashboard_cliente.html',
-                           nome_usuario=cliente.usuario.nome, saldo=saldo_atual, transacoes=ultimas_transacoes,
-                           conta_id=conta.id_conta if conta else None, tipo_conta=conta.tipo_conta if conta else None,
-                           detalhes_conta=detalhes_conta)
+                           nome_usuario=cliente.usuario.nome, saldo=painel['saldo'], transacoes=painel['transacoes'],
+                           conta_id=conta.id_conta if conta else None, tipo_conta=painel['tipo_conta'],
+                           detalhes_conta=painel['detalhes_conta'])
 
 
 @cliente_bp.route('/deposito', methods=['GET', 'POST'])
 @login_required(role='Cliente')
 def deposito():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0] if cliente.contas else None
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
     if not conta:
         flash('Nenhuma conta bancária encontrada.', 'danger')
         return redirect(url_for('cliente.dashboard'))
@@ -64,26 +107,22 @@ def deposito():
         try:
             valor = Decimal(request.form.get('valor').replace(',', '.'))
             if valor <= 0: raise ValueError("O valor do depósito deve ser positivo.")
+            conta = bloquear_contas(conta.id_conta)[conta.id_conta]
             if isinstance(conta, ContaInvestimento) and valor < conta.valor_minimo_deposito:
                 raise ValueError(f"O depósito mínimo é de R$ {conta.valor_minimo_deposito:.2f}.")
-            
-            inicio_janela_24h = datetime.now(timezone.utc) - timedelta(hours=24)
-            
-            depositos_recentes = db.session.query(func.sum(Transacao.valor)).filter(
-                Transacao.id_conta_destino == conta.id_conta,
-                Transacao.tipo_transacao == 'Deposito',
-                Transacao.data_hora >= inicio_janela_24h
-            ).scalar() or Decimal('0')
 
+            depositos_recentes = total_ultimas_horas(conta.id_conta, 'Deposito', horas=24)
             if depositos_recentes + valor > LIMITE_DIARIO_DEPOSITO:
                 raise ValueError(f"Limite de depósito de R$ {LIMITE_DIARIO_DEPOSITO:.2f} nas últimas 24 horas foi excedido.")
 
-            conta.saldo += valor
+            creditar(conta, valor)
             db.session.add(Transacao(tipo_transacao='Deposito', valor=valor, descricao="Depósito em conta", id_conta_destino=conta.id_conta))
+            registrar_contador(conta.id_conta, 'Deposito', valor)
             db.session.commit()
             flash('Depósito realizado com sucesso!', 'success')
             return redirect(url_for('cliente.dashboard'))
         except ValueError as e:
+            db.session.rollback()
             flash(str(e), 'danger')
         except Exception as e:
             db.session.rollback()
@@ -94,8 +133,8 @@ def deposito():
 @cliente_bp.route('/saque', methods=['GET', 'POST'])
 @login_required(role='Cliente')
 def saque():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0] if cliente.contas else None
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
     if not conta:
         flash('Nenhuma conta bancária encontrada.', 'danger')
         return redirect(url_for('cliente.dashboard'))
@@ -104,30 +143,29 @@ def saque():
             valor = Decimal(request.form.get('valor').replace(',', '.'))
             if valor <= 0: raise ValueError("O valor do saque deve ser positivo.")
             
-            saldo_disponivel = conta.saldo
-            if isinstance(conta, ContaCorrente):
-                saldo_disponivel += conta.limite_cheque_especial
-            if saldo_disponivel < valor:
+            conta = bloquear_contas(conta.id_conta)[conta.id_conta]
+            if saldo_disponivel(conta) < valor:
                 raise ValueError("Saldo insuficiente para realizar o saque.")
                 
-            mes_inicio = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            saques_mes = db.session.query(Transacao).filter(Transacao.id_conta_origem == conta.id_conta, Transacao.tipo_transacao == 'Saque', Transacao.data_hora >= mes_inicio).count()
+            saques_mes = quantidade_no_mes(conta.id_conta, 'Saque')
             taxa_aplicada = Decimal('0.00')
             if saques_mes >= LIMITE_SAQUES_GRATUITOS:
                 taxa_aplicada = TAXA_SAQUE_EXCESSIVO
-                if saldo_disponivel < valor + taxa_aplicada:
-                    raise ValueError("Saldo insuficiente para cobrir o saque e a taxa de serviço.")
-                flash(f'Taxa de R$ {taxa_aplicada:.2f} aplicada por exceder o limite de saques mensais.', 'warning')
             
-            conta.saldo -= (valor + taxa_aplicada)
-            descricao_saque = 'Saque da conta'
+            debitar(conta, valor + taxa_aplicada, mensagem_saldo="Saldo insuficiente para cobrir o saque e a taxa de serviço.")
             if taxa_aplicada > 0:
-                descricao_saque += f' (inclui taxa de R$ {taxa_aplicada:.2f})'
-            db.session.add(Transacao(tipo_transacao='Saque', valor=valor, descricao=descricao_saque, id_conta_origem=conta.id_conta))
+                flash(f'Taxa de R$ {taxa_aplicada:.2f} aplicada por exceder o limite de saques mensais.', 'warning')
+            db.session.add(Transacao(tipo_transacao='Saque', valor=valor, descricao='Saque da conta', id_conta_origem=conta.id_conta))
+            if taxa_aplicada > 0:
+                # A taxa é uma transação própria: o extrato e a reconstrução de saldos somam transacao.valor.
+                db.session.add(Transacao(tipo_transacao='Pagamento', valor=taxa_aplicada, descricao='Taxa por saque excedente',
+                                         id_conta_origem=conta.id_conta))
+            registrar_contador(conta.id_conta, 'Saque', valor)
             db.session.commit()
             flash('Saque realizado com sucesso!', 'success')
             return redirect(url_for('cliente.dashboard'))
         except ValueError as e:
+            db.session.rollback()
             flash(str(e), 'danger')
         except Exception as e:
             db.session.rollback()
@@ -138,8 +176,8 @@ def saque():
 @cliente_bp.route('/transferencia', methods=['GET', 'POST'])
 @login_required(role='Cliente')
 def transferencia():
-    cliente_origem = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta_origem = cliente_origem.contas[0] if cliente_origem.contas else None
+    cliente_origem = carregar_cliente()
+    conta_origem = conta_selecionada(cliente_origem)
     if not conta_origem:
         flash('Nenhuma conta bancária encontrada.', 'danger')
         return redirect(url_for('cliente.dashboard'))
@@ -152,15 +190,14 @@ def transferencia():
             conta_destino = Conta.query.filter_by(numero_conta=numero_conta_destino).first()
             if not conta_destino: raise ValueError("Conta de destino não encontrada.")
             if conta_destino.id_conta == conta_origem.id_conta: raise ValueError("Você não pode transferir para a sua própria conta.")
-            if conta_origem.saldo < valor: raise ValueError("Saldo insuficiente.")
 
-            conta_origem.saldo -= valor
-            conta_destino.saldo += valor
+            conta_origem, conta_destino = transferir(conta_origem.id_conta, conta_destino.id_conta, valor)
             db.session.add(Transacao(tipo_transacao='Transferencia', valor=valor, id_conta_origem=conta_origem.id_conta, id_conta_destino=conta_destino.id_conta))
             db.session.commit()
             flash('Transferência realizada com sucesso!', 'success')
             return redirect(url_for('cliente.dashboard'))
         except ValueError as e:
+            db.session.rollback()
             flash(str(e), 'danger')
         except Exception as e:
             db.session.rollback()
@@ -171,7 +208,7 @@ def transferencia():
 @cliente_bp.route('/limite')
 @login_required(role='Cliente')
 def limite():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
+    cliente = carregar_cliente()
     score = cliente.score_credito
     limite_atual = score * Decimal('1.5')
     fator_projecao = Decimal('1') + (score / Decimal('2000'))
@@ -183,90 +220,137 @@ def limite():
                            score_credito=score)
 
 
+def _periodo_filtro():
+    """Datas do filtro do extrato, sempre preenchidas (padrão: últimos EXTRATO_PERIODO_PADRAO_DIAS dias)."""
+    return periodo_padrao(request.args.get('data_inicio'), request.args.get('data_fim'),
+                          current_app.config['EXTRATO_PERIODO_PADRAO_DIAS'])
+
+
 @cliente_bp.route('/extrato')
 @login_required(role='Cliente')
 def extrato():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0] if cliente.contas else None
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
     if not conta: return redirect(url_for('cliente.dashboard'))
-    data_inicio_str = request.args.get('data_inicio')
-    data_fim_str = request.args.get('data_fim')
-    query = Transacao.query.filter(or_(Transacao.id_conta_origem == conta.id_conta, Transacao.id_conta_destino == conta.id_conta))
-    if data_inicio_str: query = query.filter(Transacao.data_hora >= datetime.strptime(data_inicio_str, '%Y-%m-%d'))
-    if data_fim_str: query = query.filter(Transacao.data_hora <= datetime.strptime(data_fim_str, '%Y-%m-%d') + timedelta(days=1, seconds=-1))
-    transacoes = query.order_by(Transacao.data_hora.desc()).all()
+    data_inicio_str, data_fim_str = _periodo_filtro()
+    cursor = request.args.get('cursor')
+    inicio, fim = intervalo_datas(data_inicio_str, data_fim_str)
+    transacoes, proximo_cursor = consultar_extrato(conta.id_conta, inicio, fim, cursor=cursor)
     return render_template('cliente/extrato.html', 
                            transacoes=transacoes, conta_id=conta.id_conta,
-                           data_inicio=data_inicio_str, data_fim=data_fim_str)
+                           data_inicio=data_inicio_str, data_fim=data_fim_str,
+                           cursor=cursor, proximo_cursor=proximo_cursor,
+                           resumo=resumo_periodo(conta.id_conta, inicio, fim))
 
 
 @cliente_bp.route('/extrato/imprimir')
 @login_required(role='Cliente')
 def imprimir_extrato():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0]
-    data_inicio_str = request.args.get('data_inicio')
-    data_fim_str = request.args.get('data_fim')
-    query = Transacao.query.filter(or_(Transacao.id_conta_origem == conta.id_conta, Transacao.id_conta_destino == conta.id_conta))
-    if data_inicio_str: query = query.filter(Transacao.data_hora >= datetime.strptime(data_inicio_str, '%Y-%m-%d'))
-    if data_fim_str: query = query.filter(Transacao.data_hora <= datetime.strptime(data_fim_str, '%Y-%m-%d') + timedelta(days=1, seconds=-1))
-    transacoes = query.order_by(Transacao.data_hora.desc()).all()
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
+    if not conta: return redirect(url_for('cliente.dashboard'))
+    data_inicio_str, data_fim_str = _periodo_filtro()
+    inicio, fim = intervalo_datas(data_inicio_str, data_fim_str)
+    transacoes = list(iterar_extrato(conta.id_conta, inicio, fim))
     return render_template('cliente/extrato_pdf.html', transacoes=transacoes, conta=conta, cliente=cliente)
 
 
+@cliente_bp.route('/extrato/pdf')
+@login_required(role='Cliente')
+def baixar_extrato_pdf():
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
+    if not conta: return redirect(url_for('cliente.dashboard'))
+    data_inicio_str, data_fim_str = _periodo_filtro()
+    inicio, fim = intervalo_datas(data_inicio_str, data_fim_str)
+
+    # A última transação do período entra na chave: se nada mudou, o PDF em cache continua válido.
+    chave = (conta.id_conta, data_inicio_str, data_fim_str, ultima_transacao_extrato(conta.id_conta, inicio, fim))
+    pdf = obter_pdf_em_cache(chave)
+    if pdf is None:
+        transacoes = list(iterar_extrato(conta.id_conta, inicio, fim))
+        html = render_template('cliente/extrato_pdf.html', transacoes=transacoes, conta=conta, cliente=cliente, pdf_servidor=True)
+        with open(os.path.join(current_app.static_folder, 'css', 'extrato_pdf.css'), encoding='utf-8') as arquivo_css:
+            css = arquivo_css.read()
+        try:
+            pdf = gerar_pdf(chave, html, css)
+        except TempoEsgotado:
+            flash('A geração do PDF demorou mais que o esperado. Tente novamente em instantes.', 'warning')
+            return redirect(url_for('cliente.extrato', data_inicio=data_inicio_str, data_fim=data_fim_str))
+
+    return send_file(io.BytesIO(pdf), download_name='extrato.pdf', as_attachment=True, mimetype='application/pdf')
+
+
 @cliente_bp.route('/extrato/excel')
 @login_required(role='Cliente')
 def exportar_excel():
-    cliente = Cliente.query.filter_by(id_usuario=session['user_id']).first_or_404()
-    conta = cliente.contas[0]
-    data_inicio_str = request.args.get('data_inicio')
-    data_fim_str = request.args.get('data_fim')
-    query = Transacao.query.filter(or_(Transacao.id_conta_origem == conta.id_conta, Transacao.id_conta_destino == conta.id_conta))
-    if data_inicio_str: query = query.filter(Transacao.data_hora >= datetime.strptime(data_inicio_str, '%Y-%m-%d'))
-    if data_fim_str: query = query.filter(Transacao.data_hora <= datetime.strptime(data_fim_str, '%Y-%m-%d') + timedelta(days=1, seconds=-1))
-    transacoes_db = query.order_by(Transacao.data_hora.desc()).all()
-
-    dados = []
-    for t in transacoes_db:
-        valor = t.valor if t.id_conta_destino == conta.id_conta else -t.valor
-        descricao = t.descricao or ''
-        dados.append({
-            'Data': t.data_hora.strftime('%d/%m/%Y %H:%M'),
-            'Tipo': t.tipo_transacao,
-            'Descrição': descricao,
-            'Valor (R$)': valor
-        })
-    df = pd.DataFrame(dados)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Extrato')
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Extrato']
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        cell_alignment = Alignment(horizontal="left", vertical="center")
-        
-        for cell in worksheet["1:1"]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = cell_alignment
-
-        worksheet.column_dimensions['A'].width = 20  
-        worksheet.column_dimensions['B'].width = 15  
-        worksheet.column_dimensions['C'].width = 50
-        worksheet.column_dimensions['D'].width = 15
-
-        for cell in worksheet['D'][1:]:
-            cell.number_format = 'R$ #,##0.00'
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
+    if not conta: return redirect(url_for('cliente.dashboard'))
+    inicio, fim = intervalo_datas(*_periodo_filtro())
+
+    # Modo write-only: as linhas vão direto para o XML temporário do openpyxl,
+    # então a memória não cresce com o número de transações.
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Extrato')
+    worksheet.column_dimensions['A'].width = 20
+    worksheet.column_dimensions['B'].width = 15
+    worksheet.column_dimensions['C'].width = 50
+    worksheet.column_dimensions['D'].width = 15
+    worksheet.column_dimensions['E'].width = 18
 
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    cell_alignment = Alignment(horizontal="left", vertical="center")
+    cabecalho = []
+    for titulo in COLUNAS_EXPORTACAO:
+        cell = WriteOnlyCell(worksheet, value=titulo)
+        cell.font, cell.fill, cell.alignment = header_font, header_fill, cell_alignment
+        cabecalho.append(cell)
+    worksheet.append(cabecalho)
+
+    for t in iterar_extrato(conta.id_conta, inicio, fim):
+        valor_cell = WriteOnlyCell(worksheet, value=t.valor if t.id_conta_destino == conta.id_conta else -t.valor)
+        valor_cell.number_format = 'R$ #,##0.00'
+        saldo_cell = WriteOnlyCell(worksheet, value=t.saldo_apos)
+        saldo_cell.number_format = 'R$ #,##0.00'
+        worksheet.append([t.data_hora.strftime('%d/%m/%Y %H:%M'), t.tipo_transacao, t.descricao or '', valor_cell, saldo_cell])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
     output.seek(0)
-    
+
     return send_file(
         output,
         download_name='extrato.xlsx',
         as_attachment=True,
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
\ No newline at end of file
+    )
+
+
+@cliente_bp.route('/extrato/csv')
+@login_required(role='Cliente')
+def exportar_csv():
+    cliente = carregar_cliente()
+    conta = conta_selecionada(cliente)
+    if not conta: return redirect(url_for('cliente.dashboard'))
+    id_conta = conta.id_conta
+    inicio, fim = intervalo_datas(*_periodo_filtro())
+
+    def gerar_linhas():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        buffer.write('\ufeff')
+        writer.writerow(COLUNAS_EXPORTACAO)
+        for i, t in enumerate(iterar_extrato(id_conta, inicio, fim), start=1):
+            valor = t.valor if t.id_conta_destino == id_conta else -t.valor
+            writer.writerow([t.data_hora.strftime('%d/%m/%Y %H:%M'), t.tipo_transacao, t.descricao or '',
+                             f'{valor:.2f}'.replace('.', ','), f'{t.saldo_apos:.2f}'.replace('.', ',')])
+            if i % LINHAS_POR_BLOCO_CSV == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(gerar_linhas()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=extrato.csv'})
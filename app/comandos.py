@@ -0,0 +1,189 @@
+# Comandos de manutenção executados via `flask <grupo> <comando>`.
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+
+from app.models import db, Conta, Funcionario
+from app.saldo_services import reconstruir_saldos
+from app.rendimento_services import PRODUTOS_RENDIMENTO, aplicar_rendimentos
+from app.tarifa_services import cobrar_tarifas, contas_sem_fundos
+from app.contador_services import reconstruir_contadores, limpar_faixas_de_hora
+from app.importacao_services import EXTENSOES_PLANILHA, importar_clientes
+from app.dashboard_services import invalidar_paineis
+from app.particao_services import (TABELAS_PARTICIONADAS, mes_seguinte, criar_particoes_futuras,
+                                    retirar_particoes_antigas)
+
+saldos_cli = AppGroup('saldos', help='Manutenção das fotos diárias de saldo.')
+rendimentos_cli = AppGroup('rendimentos', help='Crédito de rendimentos de poupança e investimento.')
+tarifas_cli = AppGroup('tarifas', help='Cobrança das tarifas de manutenção.')
+contadores_cli = AppGroup('contadores', help='Manutenção dos contadores de depósitos e saques.')
+clientes_cli = AppGroup('clientes', help='Importação de clientes em lote.')
+particoes_cli = AppGroup('particoes', help='Partições mensais de transacao e auditoria.')
+
+
+@saldos_cli.command('reconstruir')
+@click.option('--lote', default=5000, show_default=True, help='Quantidade de contas (por faixa de id) em cada transação.')
+def reconstruir_saldos_command(lote):
+    """Recalcula a tabela saldo_diario a partir de todas as transações."""
+    maior_id = db.session.query(func.max(Conta.id_conta)).scalar() or 0
+    total_linhas = 0
+    for id_inicial in range(1, maior_id + 1, lote):
+        id_final = id_inicial + lote - 1
+        total_linhas += reconstruir_saldos(id_inicial, id_final)
+        db.session.commit()
+        click.echo(f"Contas {id_inicial}-{min(id_final, maior_id)} reconstruídas.")
+    click.echo(f"Concluído: {total_linhas} dias de saldo gravados.")
+
+
+@rendimentos_cli.command('aplicar')
+@click.option('--lote', default=5000, show_default=True, help='Quantidade de contas (por faixa de id) em cada transação.')
+@click.option('--data', 'data_referencia', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Data até a qual o rendimento é calculado (padrão: hoje).')
+def aplicar_rendimentos_command(lote, data_referencia):
+    """Credita os rendimentos pendentes desde o último crédito de cada conta."""
+    agora = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    referencia = (data_referencia or agora).date()
+    maior_id = db.session.query(func.max(Conta.id_conta)).scalar() or 0
+    inicio_execucao = time.perf_counter()
+    total_contas = 0
+    for id_inicial in range(1, maior_id + 1, lote):
+        id_final = id_inicial + lote - 1
+        for tipo_conta in PRODUTOS_RENDIMENTO:
+            total_contas += aplicar_rendimentos(tipo_conta, id_inicial, id_final, referencia, agora)
+        db.session.commit()
+        click.echo(f"Contas {id_inicial}-{min(id_final, maior_id)} processadas.")
+    click.echo(f"Concluído: {total_contas} contas renderam em {time.perf_counter() - inicio_execucao:.1f}s.")
+
+
+@tarifas_cli.command('cobrar')
+@click.option('--lote', default=2000, show_default=True, help='Quantidade de contas (por faixa de id) em cada transação.')
+@click.option('--competencia', default=None, help='Mês cobrado, no formato AAAA-MM (padrão: mês atual).')
+def cobrar_tarifas_command(lote, competencia):
+    """Debita a tarifa mensal de manutenção das contas correntes ativas com saldo (ou cheque especial) para ela."""
+    agora = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    competencia = competencia or agora.strftime('%Y-%m')
+    try:
+        datetime.strptime(competencia, '%Y-%m')
+    except ValueError:
+        raise click.BadParameter('Use o formato AAAA-MM.', param_hint='--competencia')
+
+    maior_id = db.session.query(func.max(Conta.id_conta)).scalar() or 0
+    inicio_execucao = time.perf_counter()
+    total_contas = 0
+    sem_fundos = []
+    for id_inicial in range(1, maior_id + 1, lote):
+        total_contas += cobrar_tarifas(competencia, id_inicial, id_inicial + lote - 1, agora)
+        db.session.commit()
+        sem_fundos += contas_sem_fundos(competencia, id_inicial, id_inicial + lote - 1)
+    duracao = time.perf_counter() - inicio_execucao
+    click.echo(f"Competência {competencia}: {total_contas} contas cobradas em {duracao:.1f}s "
+               f"({total_contas / duracao if duracao else 0:.0f} contas/s).")
+    if sem_fundos:
+        amostra = ', '.join(str(id_conta) for id_conta in sem_fundos[:20])
+        reticencias = ', ...' if len(sem_fundos) > 20 else ''
+        click.echo(f"{len(sem_fundos)} contas sem saldo para a tarifa ficaram sem cobrança "
+                   f"(ids: {amostra}{reticencias}); rode o comando de novo no mês para cobrá-las.")
+
+
+@contadores_cli.command('reconstruir')
+@click.option('--lote', default=5000, show_default=True, help='Quantidade de contas (por faixa de id) em cada transação.')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Primeiro dia considerado (padrão: início do mês anterior).')
+def reconstruir_contadores_command(lote, desde):
+    """Recalcula a tabela contador_movimento a partir das transações."""
+    if desde is None:
+        inicio_mes = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        desde = (inicio_mes - timedelta(days=1)).replace(day=1)
+    maior_id = db.session.query(func.max(Conta.id_conta)).scalar() or 0
+    total_linhas = 0
+    for id_inicial in range(1, maior_id + 1, lote):
+        id_final = id_inicial + lote - 1
+        total_linhas += reconstruir_contadores(id_inicial, id_final, desde)
+        db.session.commit()
+        click.echo(f"Contas {id_inicial}-{min(id_final, maior_id)} reconstruídas.")
+    click.echo(f"Concluído: {total_linhas} contadores gravados.")
+
+
+@contadores_cli.command('limpar')
+@click.option('--manter-horas', default=48, show_default=True, help='Faixas de hora mais recentes que são mantidas.')
+def limpar_contadores_command(manter_horas):
+    """Apaga as faixas de hora antigas, que não entram mais em nenhum limite."""
+    antes_de = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=manter_horas)
+    removidas = limpar_faixas_de_hora(antes_de)
+    db.session.commit()
+    click.echo(f"{removidas} faixas de hora removidas.")
+
+
+@clientes_cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--funcionario', 'codigo_funcionario', required=True, help='Matrícula do funcionário responsável pelas aberturas.')
+@click.option('--relatorio', default='erros_importacao.csv', show_default=True, help='Arquivo CSV com as linhas rejeitadas.')
+@click.option('--lote', default=None, type=int, help='Linhas por transação (padrão: IMPORTACAO_LOTE).')
+def importar_clientes_command(arquivo, codigo_funcionario, relatorio, lote):
+    """Abre as contas listadas numa planilha CSV ou XLSX."""
+    if not arquivo.lower().endswith(EXTENSOES_PLANILHA):
+        raise click.BadParameter('Use um arquivo .csv ou .xlsx.', param_hint='ARQUIVO')
+    funcionario = Funcionario.query.filter_by(codigo_funcionario=codigo_funcionario).first()
+    if not funcionario:
+        raise click.BadParameter('Funcionário não encontrado.', param_hint='--funcionario')
+
+    inicio_execucao = time.perf_counter()
+    with open(arquivo, 'rb') as planilha, open(relatorio, 'w', encoding='utf-8-sig', newline='') as saida:
+        resultado = importar_clientes(planilha, arquivo, funcionario.id_usuario, saida, lote)
+    duracao = time.perf_counter() - inicio_execucao
+    click.echo(f"{resultado['importados']} contas abertas e {resultado['rejeitados']} linhas rejeitadas "
+               f"em {duracao:.1f}s ({resultado['importados'] / duracao if duracao else 0:.0f} contas/s).")
+    if resultado['rejeitados']:
+        click.echo(f"Linhas rejeitadas em {relatorio}.")
+
+
+def _mes_atual():
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+@particoes_cli.command('criar')
+@click.option('--meses', default=3, show_default=True, help='Meses à frente do atual que devem ter partição.')
+def criar_particoes_command(meses):
+    """Cria as partições dos próximos meses (rodar mensalmente, antes da virada do mês)."""
+    ate_mes = _mes_atual()
+    for _ in range(meses):
+        ate_mes = mes_seguinte(ate_mes)
+    for tabela in TABELAS_PARTICIONADAS:
+        criadas = criar_particoes_futuras(tabela, ate_mes)
+        click.echo(f"{tabela}: {', '.join(criadas) if criadas else 'nenhuma partição nova'}.")
+
+
+@particoes_cli.command('arquivar')
+@click.option('--manter-meses', default=24, show_default=True, help='Meses mais recentes (incluindo o atual) que ficam na tabela.')
+@click.option('--descartar', is_flag=True, help='Apaga as partições antigas em vez de movê-las para tabelas de arquivo.')
+@click.option('--lote', default=5000, show_default=True, help='Contas (por faixa de id) com o painel invalidado em cada transação.')
+def arquivar_particoes_command(manter_meses, descartar, lote):
+    """Retira da tabela as partições de meses antigos, arquivando-as em <tabela>_arquivo_AAAAMM."""
+    antes_de = _mes_atual()
+    for _ in range(manter_meses - 1):
+        antes_de = (antes_de - timedelta(days=1)).replace(day=1)
+    for tabela in TABELAS_PARTICIONADAS:
+        try:
+            retiradas = retirar_particoes_antigas(tabela, antes_de, arquivar=not descartar)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        destino = 'descartadas' if descartar else 'arquivadas'
+        click.echo(f"{tabela}: {len(retiradas)} partições {destino} ({', '.join(retiradas) or '-'}).")
+    # Os painéis em cache podem listar transações que saíram da tabela.
+    maior_id = db.session.query(func.max(Conta.id_conta)).scalar() or 0
+    for id_inicial in range(1, maior_id + 1, lote):
+        invalidar_paineis(id_inicial, id_inicial + lote - 1)
+        db.session.commit()
+
+
+def registrar_comandos(app):
+    app.cli.add_command(saldos_cli)
+    app.cli.add_command(rendimentos_cli)
+    app.cli.add_command(tarifas_cli)
+    app.cli.add_command(contadores_cli)
+    app.cli.add_command(clientes_cli)
+    app.cli.add_command(particoes_cli)
@@ -11,3 +11,77 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexões. pool_recycle abaixo do wait_timeout do MySQL evita reutilizar
+    # conexões que o servidor já derrubou; pool_pre_ping testa a conexão antes do uso.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+    # Métricas do pool: endpoint /metrics (exige o token; sem token, só responde em debug) e log periódico (0 desliga)
+    METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+    METRICAS_LOG_SEGUNDOS = int(os.getenv("METRICAS_LOG_SEGUNDOS", "0"))
+
+    # Geração de extratos em PDF (WeasyPrint) em pool de processos
+    PDF_PROCESSOS = int(os.getenv("PDF_PROCESSOS", "2"))
+    PDF_TIMEOUT_SEGUNDOS = int(os.getenv("PDF_TIMEOUT_SEGUNDOS", "60"))
+    PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Envio de OTP em segundo plano: 'gmail', 'smtp' (stub local) ou 'arquivo'
+    OTP_TRANSPORTE = os.getenv("OTP_TRANSPORTE", "gmail")
+    OTP_THREADS = int(os.getenv("OTP_THREADS", "4"))
+    OTP_TENTATIVAS = int(os.getenv("OTP_TENTATIVAS", "3"))
+    OTP_ESPERA_INICIAL_SEGUNDOS = float(os.getenv("OTP_ESPERA_INICIAL_SEGUNDOS", "1"))
+    OTP_SMTP_HOST = os.getenv("OTP_SMTP_HOST", "localhost")
+    OTP_SMTP_PORTA = int(os.getenv("OTP_SMTP_PORTA", "1025"))
+    OTP_SMTP_REMETENTE = os.getenv("OTP_SMTP_REMETENTE", "nao-responda@bancomalvader.local")
+    OTP_ARQUIVO = os.getenv("OTP_ARQUIVO", os.path.join(basedir, "..", "otp_enviados.txt"))
+
+    # Período do extrato quando o cliente não informa as datas (limita as partições lidas)
+    EXTRATO_PERIODO_PADRAO_DIAS = int(os.getenv("EXTRATO_PERIODO_PADRAO_DIAS", "90"))
+
+    # Cache curto (entre requisições) de nome e cargo do usuário logado, para menus e
+    # cabeçalhos; as permissões sempre usam o cargo lido do banco
+    IDENTIDADE_CACHE_TTL_SEGUNDOS = int(os.getenv("IDENTIDADE_CACHE_TTL_SEGUNDOS", "60"))
+    IDENTIDADE_CACHE_TAMANHO = int(os.getenv("IDENTIDADE_CACHE_TAMANHO", "10000"))
+
+    # Importação de clientes em lote (planilhas CSV/XLSX das agências)
+    IMPORTACAO_LOTE = int(os.getenv("IMPORTACAO_LOTE", "500"))
+    IMPORTACAO_PASTA_RELATORIOS = os.getenv("IMPORTACAO_PASTA_RELATORIOS", os.path.join(basedir, "..", "relatorios_importacao"))
+    # Linhas aceitas pelo upload na tela (a importação roda dentro da requisição HTTP);
+    # planilhas maiores são importadas com `flask clientes importar`
+    IMPORTACAO_MAX_LINHAS_WEB = int(os.getenv("IMPORTACAO_MAX_LINHAS_WEB", "2000"))
+
+    # Números de conta: blocos reservados por processo e chave da permutação.
+    # Trocar a chave muda a ordem dos números (as colisões são descartadas no bloco).
+    NUMERO_CONTA_BLOCO = int(os.getenv("NUMERO_CONTA_BLOCO", "1000"))
+    NUMERO_CONTA_CHAVE = os.getenv("NUMERO_CONTA_CHAVE", "banco-malvader-contas")
+
+    # Hash de senhas em pool de processos. Custos: scrypt "N:r:p", pbkdf2 número de iterações.
+    # Hashes com parâmetros diferentes dos atuais são refeitos no próximo login.
+    SENHA_ALGORITMO = os.getenv("SENHA_ALGORITMO", "scrypt")
+    SENHA_CUSTO_SCRYPT = os.getenv("SENHA_CUSTO_SCRYPT", "32768:8:1")
+    SENHA_CUSTO_PBKDF2 = int(os.getenv("SENHA_CUSTO_PBKDF2", "600000"))
+    SENHA_PROCESSOS = int(os.getenv("SENHA_PROCESSOS", str(os.cpu_count() or 2)))
+    SENHA_FILA_MAXIMA = int(os.getenv("SENHA_FILA_MAXIMA", "64"))
+    SENHA_ESPERA_FILA_SEGUNDOS = float(os.getenv("SENHA_ESPERA_FILA_SEGUNDOS", "2"))
+    SENHA_TIMEOUT_SEGUNDOS = int(os.getenv("SENHA_TIMEOUT_SEGUNDOS", "30"))
+
+    # Cache do dashboard do cliente: 'local' (na memória de cada processo) ou 'redis'
+    # (compartilhado entre os workers). Nos dois casos a validade vem de conta.versao_painel.
+    DASHBOARD_CACHE = os.getenv("DASHBOARD_CACHE", "local")
+    DASHBOARD_CACHE_TAMANHO = int(os.getenv("DASHBOARD_CACHE_TAMANHO", "10000"))
+    DASHBOARD_CACHE_TTL_SEGUNDOS = int(os.getenv("DASHBOARD_CACHE_TTL_SEGUNDOS", "60"))
+    DASHBOARD_CACHE_REDIS_URL = os.getenv("DASHBOARD_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Auditoria: 'assincrono' (fila em memória gravada em lote por uma thread; eventos podem
+    # se perder se o processo cair ou a fila encher) ou 'transacao' (cada evento é gravado
+    # no commit da própria requisição). Eventos atômicos com a operação usam sempre a transação.
+    AUDITORIA_MODO = os.getenv("AUDITORIA_MODO", "assincrono")
+    AUDITORIA_FILA_MAXIMA = int(os.getenv("AUDITORIA_FILA_MAXIMA", "10000"))
+    AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "500"))
+    AUDITORIA_INTERVALO_SEGUNDOS = float(os.getenv("AUDITORIA_INTERVALO_SEGUNDOS", "1"))
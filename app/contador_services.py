@@ -0,0 +1,110 @@
+# Este módulo mantém os contadores de movimentação por conta (contador_movimento),
+# agrupados em faixas de hora, dia e mês. Os limites de depósito e de saques gratuitos
+# leem esses contadores em vez de somar o histórico de transações a cada operação.
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.mysql import insert
+
+from app.models import db, ContadorMovimento
+
+# Recalcula os contadores de um intervalo de contas a partir das transações desde :desde.
+# Depósitos contam para a conta de destino e saques para a conta de origem.
+SQL_RECONSTRUIR_CONTADORES = text("""
+    INSERT INTO contador_movimento (id_conta, tipo_transacao, granularidade, inicio, quantidade, total)
+    SELECT m.id_conta, m.tipo_transacao, f.granularidade,
+           CASE f.granularidade
+               WHEN 'hora' THEN DATE_FORMAT(m.data_hora, '%Y-%m-%d %H:00:00')
+               WHEN 'dia' THEN DATE_FORMAT(m.data_hora, '%Y-%m-%d 00:00:00')
+               ELSE DATE_FORMAT(m.data_hora, '%Y-%m-01 00:00:00')
+           END AS inicio_faixa,
+           COUNT(*), SUM(m.valor)
+    FROM (
+        SELECT id_conta_destino AS id_conta, tipo_transacao, data_hora, valor
+        FROM transacao
+        WHERE tipo_transacao = 'Deposito' AND data_hora >= :desde
+          AND id_conta_destino BETWEEN :id_inicial AND :id_final
+        UNION ALL
+        SELECT id_conta_origem, tipo_transacao, data_hora, valor
+        FROM transacao
+        WHERE tipo_transacao = 'Saque' AND data_hora >= :desde
+          AND id_conta_origem BETWEEN :id_inicial AND :id_final
+    ) m
+    CROSS JOIN (SELECT 'hora' AS granularidade UNION ALL SELECT 'dia' UNION ALL SELECT 'mes') f
+    GROUP BY m.id_conta, m.tipo_transacao, f.granularidade, inicio_faixa
+""")
+
+
+def _agora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _inicio_faixas(momento):
+    """Início das faixas de hora, dia e mês que contêm `momento` (UTC, sem fuso)."""
+    hora = momento.replace(minute=0, second=0, microsecond=0)
+    return {'hora': hora, 'dia': hora.replace(hour=0), 'mes': hora.replace(day=1, hour=0)}
+
+
+def registrar_contador(id_conta, tipo_transacao, valor, momento=None):
+    """
+    Soma um movimento às faixas de hora, dia e mês da conta dentro da transação
+    corrente (não faz commit). Deve ser chamada junto com o insert da Transacao.
+    """
+    faixas = _inicio_faixas(momento or _agora())
+    stmt = insert(ContadorMovimento).values([
+        {'id_conta': id_conta, 'tipo_transacao': tipo_transacao, 'granularidade': granularidade,
+         'inicio': inicio, 'quantidade': 1, 'total': valor}
+        for granularidade, inicio in faixas.items()
+    ])
+    stmt = stmt.on_duplicate_key_update(
+        quantidade=ContadorMovimento.quantidade + stmt.inserted.quantidade,
+        total=ContadorMovimento.total + stmt.inserted.total,
+    )
+    db.session.execute(stmt)
+
+
+def total_ultimas_horas(id_conta, tipo_transacao, horas=24, momento=None):
+    """
+    Valor movimentado nas últimas `horas`, somando no máximo horas + 1 faixas de hora.
+    A faixa em que a janela começa entra inteira, então o total pode incluir até uma
+    hora a mais de movimento; para verificar limites, isso erra para o lado seguro.
+    """
+    inicio = _inicio_faixas((momento or _agora()) - timedelta(hours=horas))['hora']
+    total = db.session.execute(
+        select(func.sum(ContadorMovimento.total)).where(
+            ContadorMovimento.id_conta == id_conta,
+            ContadorMovimento.tipo_transacao == tipo_transacao,
+            ContadorMovimento.granularidade == 'hora',
+            ContadorMovimento.inicio >= inicio,
+        )
+    ).scalar()
+    return total or Decimal('0')
+
+
+def quantidade_no_mes(id_conta, tipo_transacao, momento=None):
+    """Quantidade de movimentos do tipo no mês corrente (uma leitura pela chave primária)."""
+    inicio = _inicio_faixas(momento or _agora())['mes']
+    quantidade = db.session.execute(
+        select(ContadorMovimento.quantidade).where(
+            ContadorMovimento.id_conta == id_conta,
+            ContadorMovimento.tipo_transacao == tipo_transacao,
+            ContadorMovimento.granularidade == 'mes',
+            ContadorMovimento.inicio == inicio,
+        )
+    ).scalar()
+    return quantidade or 0
+
+
+def reconstruir_contadores(id_inicial, id_final, desde):
+    """Apaga e recalcula os contadores das contas do intervalo a partir de `desde`. Não faz commit."""
+    db.session.execute(ContadorMovimento.__table__.delete().where(ContadorMovimento.id_conta.between(id_inicial, id_final)))
+    return db.session.execute(SQL_RECONSTRUIR_CONTADORES,
+                              {'id_inicial': id_inicial, 'id_final': id_final, 'desde': desde}).rowcount
+
+
+def limpar_faixas_de_hora(antes_de):
+    """Remove as faixas de hora anteriores a `antes_de`; dia e mês são mantidos. Não faz commit."""
+    return db.session.execute(ContadorMovimento.__table__.delete().where(
+        ContadorMovimento.granularidade == 'hora', ContadorMovimento.inicio < antes_de)).rowcount
@@ -0,0 +1,113 @@
+# Este módulo mantém o "painel" de cada conta (saldo, detalhes do tipo de conta e
+# últimas transações) em cache, para o dashboard do cliente não consultar transacao
+# a cada visita. O cache é plugável: LRU em memória do processo (padrão) ou Redis,
+# compartilhado entre os workers.
+# A validade do painel vem do banco: conta.versao_painel é incrementada na mesma
+# transação de toda alteração de saldo (movimentações, rendimentos, tarifas), e um
+# painel só é servido para a versão com que foi montado. Como a versão é lida junto
+# com a conta, um commit feito em qualquer worker ou comando de lote vale para todos.
+
+import pickle
+import threading
+
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import text
+
+from app.models import db, ContaCorrente, ContaPoupanca, ContaInvestimento
+from app.extrato_services import ultimas_transacoes
+
+TRANSACOES_NO_PAINEL = 5
+
+SQL_INVALIDAR_FAIXA = text(
+    "UPDATE conta SET versao_painel = versao_painel + 1 WHERE id_conta BETWEEN :id_inicial AND :id_final")
+
+
+class CachePaineisLocal:
+    """Painéis na memória do processo; cada worker monta os seus."""
+
+    def __init__(self, tamanho, ttl):
+        self._paineis = TTLCache(maxsize=tamanho, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def obter(self, id_conta, versao):
+        with self._lock:
+            item = self._paineis.get(id_conta)
+        return item[1] if item and item[0] == versao else None
+
+    def guardar(self, id_conta, versao, painel):
+        with self._lock:
+            self._paineis[id_conta] = (versao, painel)
+
+
+class CachePaineisRedis:
+    """Painéis num Redis compartilhado: o painel montado por um worker serve aos demais."""
+
+    PREFIXO = 'dashboard:'
+
+    def __init__(self, url, ttl):
+        import redis  # dependência opcional, só quando DASHBOARD_CACHE=redis
+        self._redis = redis.Redis.from_url(url)
+        self._ttl = ttl
+
+    def obter(self, id_conta, versao):
+        bruto = self._redis.get(f'{self.PREFIXO}painel:{id_conta}:{versao}')
+        return pickle.loads(bruto) if bruto is not None else None
+
+    def guardar(self, id_conta, versao, painel):
+        # Versões antigas não são apagadas: ninguém mais as pede e o TTL as remove.
+        self._redis.set(f'{self.PREFIXO}painel:{id_conta}:{versao}', pickle.dumps(painel), ex=self._ttl)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _obter_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = current_app.config
+            if config['DASHBOARD_CACHE'] == 'redis':
+                _cache = CachePaineisRedis(config['DASHBOARD_CACHE_REDIS_URL'], config['DASHBOARD_CACHE_TTL_SEGUNDOS'])
+            elif config['DASHBOARD_CACHE'] == 'local':
+                _cache = CachePaineisLocal(config['DASHBOARD_CACHE_TAMANHO'], config['DASHBOARD_CACHE_TTL_SEGUNDOS'])
+            else:
+                raise ValueError(f"Cache de dashboard desconhecido: {config['DASHBOARD_CACHE']}")
+        return _cache
+
+
+def montar_painel(conta):
+    detalhes_conta = None
+    if isinstance(conta, ContaCorrente):
+        detalhes_conta = {'limite_cheque_especial': conta.limite_cheque_especial}
+    elif isinstance(conta, ContaPoupanca):
+        detalhes_conta = {'taxa_rendimento': conta.taxa_rendimento}
+    elif isinstance(conta, ContaInvestimento):
+        detalhes_conta = {'perfil_risco': conta.perfil_risco, 'valor_minimo_deposito': conta.valor_minimo_deposito}
+    transacoes = [dict(t._mapping) for t in ultimas_transacoes(conta.id_conta, limite=TRANSACOES_NO_PAINEL)]
+    return {'saldo': conta.saldo, 'tipo_conta': conta.tipo_conta, 'detalhes_conta': detalhes_conta, 'transacoes': transacoes}
+
+
+def obter_painel(conta):
+    """Painel da conta: do cache, se montado com a versão atual da conta, ou montado agora e guardado."""
+    cache = _obter_cache()
+    painel = cache.obter(conta.id_conta, conta.versao_painel)
+    if painel is None:
+        painel = montar_painel(conta)
+        cache.guardar(conta.id_conta, conta.versao_painel, painel)
+    return painel
+
+
+def marcar_conta_alterada(conta):
+    """
+    Invalida o painel da conta (já travada por bloquear_contas) para todos os workers,
+    incrementando a versão na transação corrente. Não faz commit.
+    """
+    conta.versao_painel += 1
+
+
+def invalidar_paineis(id_inicial, id_final):
+    """Invalida os painéis de uma faixa de contas (comandos em lote que não passam pelo ORM). Não faz commit."""
+    return db.session.execute(SQL_INVALIDAR_FAIXA, {'id_inicial': id_inicial, 'id_final': id_final}).rowcount
+
@@ -0,0 +1,201 @@
+# Este módulo concentra as consultas de extrato das contas.
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import select, or_, and_, func, case, union_all, literal
+
+from app.models import db, Conta, Cliente, Usuario, Transacao
+
+TAMANHO_PAGINA_EXTRATO = 50
+
+
+def intervalo_datas(data_inicio_str, data_fim_str):
+    """
+    Converte os filtros de data (AAAA-MM-DD) da querystring em limites de
+    data/hora. O fim do intervalo inclui o dia inteiro.
+    """
+    inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d') if data_inicio_str else None
+    fim = datetime.strptime(data_fim_str, '%Y-%m-%d') + timedelta(days=1, seconds=-1) if data_fim_str else None
+    return inicio, fim
+
+
+def periodo_padrao(data_inicio_str, data_fim_str, dias):
+    """
+    Completa o filtro de datas (AAAA-MM-DD) para que a consulta sempre tenha limites:
+    sem fim, vale hoje; sem início, `dias` dias antes do fim. Com o período limitado,
+    o MySQL lê só as partições mensais de transacao que o cobrem.
+    """
+    fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date() if data_fim_str else date.today()
+    return data_inicio_str or (fim - timedelta(days=dias)).isoformat(), fim.isoformat()
+
+
+def _serializador_cursor():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='cursor-extrato')
+
+
+def _periodo_cursor(id_conta, inicio, fim):
+    return [id_conta, inicio and inicio.isoformat(), fim and fim.isoformat()]
+
+
+def codificar_cursor(id_conta, inicio, fim, data_hora, id_transacao, saldo):
+    """
+    Cursor da próxima página: a posição da última linha mostrada e o saldo logo antes
+    dela (o saldo_apos da próxima linha), junto com a conta e o período consultados.
+    É assinado, então o cliente não consegue alterar o saldo que a próxima página usa
+    como ponto de partida nem levá-lo para outra conta ou outro período.
+    """
+    return _serializador_cursor().dumps(_periodo_cursor(id_conta, inicio, fim)
+                                        + [data_hora.isoformat(), id_transacao, str(saldo)])
+
+
+def decodificar_cursor(cursor, id_conta, inicio=None, fim=None):
+    """
+    Retorna a tupla (data_hora, id_transacao, saldo) do cursor, ou None se ele for
+    inválido ou tiver sido gerado para outra conta ou outro período.
+    """
+    try:
+        *periodo, data_hora_str, id_transacao, saldo = _serializador_cursor().loads(cursor)
+        if periodo != _periodo_cursor(id_conta, inicio, fim):
+            return None
+        return datetime.fromisoformat(data_hora_str), int(id_transacao), Decimal(saldo)
+    except (BadSignature, TypeError, ValueError, ArithmeticError):
+        return None
+
+
+def _filtro_cursor(data_hora, id_transacao, cursor):
+    """Condição de keyset: linhas estritamente mais antigas que a posição do cursor."""
+    data_hora_cursor, id_cursor = cursor[:2]
+    return or_(data_hora < data_hora_cursor,
+               and_(data_hora == data_hora_cursor, id_transacao < id_cursor))
+
+
+def transacoes_da_conta(id_conta, inicio=None, fim=None, cursor=None, limite=None):
+    """
+    Transações em que a conta é origem ou destino, como UNION ALL de dois ramos:
+    um filtra por id_conta_origem e o outro por id_conta_destino, e cada um usa
+    o seu índice (id_conta_*, data_hora). Um OR entre as duas colunas impede o
+    MySQL de usar bem qualquer um deles. Com `limite`, cada ramo já vem ordenado
+    e limitado, e quem consome a subconsulta ordena e limita o resultado final.
+    `cursor` é uma tupla (data_hora, id_transacao, ...) já decodificada.
+    """
+    def ramo(*condicoes):
+        stmt = select(
+            Transacao.id_transacao, Transacao.tipo_transacao, Transacao.valor, Transacao.data_hora,
+            Transacao.descricao, Transacao.id_conta_origem, Transacao.id_conta_destino,
+        ).where(*condicoes)
+        if inicio: stmt = stmt.where(Transacao.data_hora >= inicio)
+        if fim: stmt = stmt.where(Transacao.data_hora <= fim)
+        if cursor: stmt = stmt.where(_filtro_cursor(Transacao.data_hora, Transacao.id_transacao, cursor))
+        if limite:
+            stmt = stmt.order_by(Transacao.data_hora.desc(), Transacao.id_transacao.desc()).limit(limite)
+        return stmt
+
+    origem = ramo(Transacao.id_conta_origem == id_conta)
+    # Não repete no segundo ramo uma linha que já veio no primeiro.
+    destino = ramo(Transacao.id_conta_destino == id_conta,
+                   or_(Transacao.id_conta_origem.is_(None), Transacao.id_conta_origem != id_conta))
+    return union_all(origem, destino).subquery('transacoes_conta')
+
+
+def _com_nomes(transacoes, *colunas_extras):
+    """Acrescenta os nomes dos titulares de origem e destino (via JOIN) às transações."""
+    conta_origem, conta_destino = Conta.__table__.alias('conta_origem'), Conta.__table__.alias('conta_destino')
+    cliente_origem, cliente_destino = Cliente.__table__.alias('cliente_origem'), Cliente.__table__.alias('cliente_destino')
+    usuario_origem, usuario_destino = Usuario.__table__.alias('usuario_origem'), Usuario.__table__.alias('usuario_destino')
+    return (
+        select(
+            transacoes,
+            usuario_origem.c.nome.label('nome_origem'), usuario_destino.c.nome.label('nome_destino'),
+            *colunas_extras,
+        )
+        .outerjoin(conta_origem, conta_origem.c.id_conta == transacoes.c.id_conta_origem)
+        .outerjoin(cliente_origem, cliente_origem.c.id_cliente == conta_origem.c.id_cliente)
+        .outerjoin(usuario_origem, usuario_origem.c.id_usuario == cliente_origem.c.id_usuario)
+        .outerjoin(conta_destino, conta_destino.c.id_conta == transacoes.c.id_conta_destino)
+        .outerjoin(cliente_destino, cliente_destino.c.id_cliente == conta_destino.c.id_cliente)
+        .outerjoin(usuario_destino, usuario_destino.c.id_usuario == cliente_destino.c.id_usuario)
+    )
+
+
+def _saldo_em(id_conta, fim=None):
+    """
+    Saldo da conta no instante `fim` (sem `fim`, o saldo atual), como subconsulta escalar:
+    o saldo atual menos o que entrou e mais o que saiu depois de `fim`, pelos índices
+    (id_conta_*, data_hora).
+    """
+    saldo = select(Conta.__table__.c.saldo).where(Conta.__table__.c.id_conta == id_conta).scalar_subquery()
+    if fim is None:
+        return saldo
+    entradas = (select(func.coalesce(func.sum(Transacao.valor), 0))
+                .where(Transacao.id_conta_destino == id_conta, Transacao.data_hora > fim).scalar_subquery())
+    saidas = (select(func.coalesce(func.sum(Transacao.valor), 0))
+              .where(Transacao.id_conta_origem == id_conta, Transacao.data_hora > fim).scalar_subquery())
+    return saldo - entradas + saidas
+
+
+def _linhas_extrato(id_conta, inicio=None, fim=None, posicao=None, limite=None):
+    """
+    Subconsulta com as transações da conta no período, com os nomes dos titulares e as
+    colunas movimento (+valor para entradas, -valor para saídas) e saldo_apos.
+    saldo_apos é calculado numa única passada por função de janela: o saldo na borda
+    mais recente do recorte menos a soma dos movimentos posteriores à transação. A borda
+    é o cursor `posicao` (que já traz o saldo), o fim do período ou o saldo atual. Como a
+    janela só precisa das linhas do recorte, início, fim, cursor e limite são aplicados
+    dentro dos ramos do UNION ALL, e cada página soma só as próprias linhas.
+    """
+    transacoes = transacoes_da_conta(id_conta, inicio, fim, cursor=posicao, limite=limite)
+    saldo_borda = literal(posicao[2]) if posicao else _saldo_em(id_conta, fim)
+    movimento = case((transacoes.c.id_conta_destino == id_conta, transacoes.c.valor), else_=-transacoes.c.valor)
+    movimentos_posteriores = func.sum(movimento).over(
+        order_by=(transacoes.c.data_hora.desc(), transacoes.c.id_transacao.desc()), rows=(None, -1))
+    saldo_apos = (saldo_borda - func.coalesce(movimentos_posteriores, 0)).label('saldo_apos')
+    return _com_nomes(transacoes, movimento.label('movimento'), saldo_apos).subquery('extrato')
+
+
+def consultar_extrato(id_conta, inicio=None, fim=None, cursor=None, limite=TAMANHO_PAGINA_EXTRATO):
+    """
+    Busca uma página do extrato da conta, da transação mais recente para a mais antiga.
+    A paginação usa o cursor (data_hora, id_transacao, saldo) em vez de OFFSET, e o custo
+    de cada página não depende de quantas páginas vieram antes dela.
+    Retorna (transacoes, proximo_cursor); proximo_cursor é None na última página.
+    """
+    posicao = decodificar_cursor(cursor, id_conta, inicio, fim) if cursor else None
+    # Uma linha a mais indica se existe próxima página.
+    extrato = _linhas_extrato(id_conta, inicio, fim, posicao, limite + 1)
+    stmt = select(extrato).order_by(extrato.c.data_hora.desc(), extrato.c.id_transacao.desc()).limit(limite + 1)
+    transacoes = db.session.execute(stmt).all()
+
+    proximo_cursor = None
+    if len(transacoes) > limite:
+        transacoes = transacoes[:limite]
+        ultima = transacoes[-1]
+        proximo_cursor = codificar_cursor(id_conta, inicio, fim, ultima.data_hora, ultima.id_transacao,
+                                          ultima.saldo_apos - ultima.movimento)
+    return transacoes, proximo_cursor
+
+
+def ultimas_transacoes(id_conta, limite=5):
+    """As transações mais recentes da conta, com os nomes dos titulares (sem saldo_apos)."""
+    transacoes = transacoes_da_conta(id_conta, limite=limite)
+    stmt = _com_nomes(transacoes).order_by(transacoes.c.data_hora.desc(), transacoes.c.id_transacao.desc()).limit(limite)
+    return db.session.execute(stmt).all()
+
+
+def iterar_extrato(id_conta, inicio=None, fim=None, tamanho_lote=1000):
+    """
+    Percorre todas as transações do período com cursor do lado do servidor
+    (yield_per), mantendo em memória apenas um lote por vez. Usado nas exportações.
+    """
+    extrato = _linhas_extrato(id_conta, inicio, fim)
+    stmt = select(extrato).order_by(extrato.c.data_hora.desc(), extrato.c.id_transacao.desc())
+
+    yield from db.session.execute(stmt.execution_options(yield_per=tamanho_lote))
+
+
+def ultima_transacao_extrato(id_conta, inicio=None, fim=None):
+    """Retorna o maior id_transacao da conta no período (None se não houver transações)."""
+    transacoes = transacoes_da_conta(id_conta, inicio, fim)
+    return db.session.execute(select(func.max(transacoes.c.id_transacao))).scalar()
@@ -1,18 +1,23 @@
 from flask import (Blueprint, render_template, request, redirect,
-                   url_for, flash, session)
-from werkzeug.security import generate_password_hash, check_password_hash
+                   url_for, flash, session, current_app, send_from_directory)
 from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
+import os
+import uuid
 import random
 from functools import wraps
 import re
-import os
 
 
-from app.models import (db, Usuario, Cliente, Funcionario, Conta, Agencia, Auditoria, 
+from app.models import (db, Usuario, Cliente, Funcionario, Conta, Agencia, 
                         HistoricoConta, ContaCorrente, ContaPoupanca, ContaInvestimento)
-from sqlalchemy import func
-from app.auth_services import enviar_email_otp
+from app.auth_services import enfileirar_email_otp
+from app.identidade_services import carregar_funcionario, perfil_funcionario, perfil_funcionario_atual
+from app.numero_conta_services import reservar_numeros_conta
+from app.sequencia_services import reservar_codigos_funcionario
+from app.senha_services import MENSAGEM_OCUPADO, SENHAS_INDISPONIVEIS, gerar_hash_senha, verificar_senha
+from app.importacao_services import EXTENSOES_PLANILHA, importar_clientes, passa_do_limite
+from app.auditoria_services import registrar_auditoria
 
 
 funcionario_bp = Blueprint('funcionario', __name__, template_folder='templates')
@@ -26,16 +31,16 @@ def login_required(role=None):
                 flash('Acesso restrito a funcionários.', 'danger')
                 return redirect(url_for('auth.index'))
             
-            funcionario = Funcionario.query.filter_by(id_usuario=session['user_id']).first()
-            if not funcionario:
+            perfil = perfil_funcionario_atual()
+            if not perfil:
                 session.clear()
                 flash('Funcionário não encontrado. Sessão encerrada.', 'danger')
                 return redirect(url_for('auth.index'))
             
-            session['cargo'] = funcionario.cargo
+            session['cargo'] = perfil['cargo']
 
             # Se um cargo (role) específico é requerido, verifica a permissão
-            if role and funcionario.cargo != role:
+            if role and perfil['cargo'] != role:
                 flash('Você não tem permissão para esta ação.', 'danger')
                 return redirect(url_for('funcionario.dashboard'))
             
@@ -47,32 +52,11 @@ def login_required(role=None):
 def inject_user_info():
     """Injeta informações do funcionário em todos os templates deste blueprint."""
     if 'user_id' in session and session.get('user_type') == 'Funcionario':
-        funcionario = Funcionario.query.filter_by(id_usuario=session['user_id']).first()
-        if funcionario:
-            return dict(nome_usuario=funcionario.usuario.nome, cargo=funcionario.cargo)
+        perfil = perfil_funcionario(session['user_id'])
+        if perfil:
+            return dict(nome_usuario=perfil['nome'], cargo=perfil['cargo'])
     return dict(nome_usuario=None, cargo=None)
 
-# --- FUNÇÕES HELPER ---
-def luhn_checksum(card_number):
-    def digits_of(n): return [int(d) for d in str(n)]
-    digits = digits_of(card_number)
-    odd_digits, even_digits = digits[-1::-2], digits[-2::-2]
-    checksum = sum(odd_digits)
-    for d in even_digits:
-        checksum += sum(digits_of(d * 2))
-    return checksum % 10
-
-def generate_account_number():
-    while True:
-        base = random.randint(100000, 999999)
-        check = (10 - luhn_checksum(base * 10)) % 10
-        num = f"{base}-{check}"
-        if not Conta.query.filter_by(numero_conta=num).first(): return num
-
-def generate_employee_code():
-    last_id = db.session.query(func.max(Funcionario.id_funcionario)).scalar() or 0
-    return f"FUNC{last_id + 1:03d}"
-
 # --- ROTAS DO FUNCIONÁRIO ---
 
 @funcionario_bp.route('/dashboard')
@@ -95,7 +79,7 @@ def abertura_conta():
             if Usuario.query.filter_by(CPF=cpf_limpo).first():
                 raise ValueError("Este CPF já está cadastrado.")
 
-            novo_usuario = Usuario(nome=request.form.get('nome'), CPF=cpf_limpo, data_nascimento=data_nascimento, telefone=request.form.get('telefone'), email=request.form.get('email'), tipo_usuario='Cliente', senha_hash=generate_password_hash(request.form.get('senha')))
+            novo_usuario = Usuario(nome=request.form.get('nome'), CPF=cpf_limpo, data_nascimento=data_nascimento, telefone=request.form.get('telefone'), email=request.form.get('email'), tipo_usuario='Cliente', senha_hash=gerar_hash_senha(request.form.get('senha')))
             db.session.add(novo_usuario)
             db.session.flush()
 
@@ -104,7 +88,7 @@ def abertura_conta():
             db.session.flush()
             
             tipo_conta = request.form.get('tipo_conta')
-            numero_conta_gerado = generate_account_number()
+            numero_conta_gerado = reservar_numeros_conta(1)[0]
             agencia_padrao = Agencia.query.first()
             if not agencia_padrao: raise Exception("Nenhuma agência cadastrada.")
             
@@ -119,12 +103,15 @@ def abertura_conta():
             db.session.flush()
 
             db.session.add(HistoricoConta(id_conta=nova_conta.id_conta, id_funcionario_responsavel=session['user_id'], acao='Abertura', motivo='Criação de nova conta.'))
-            db.session.add(Auditoria(id_usuario=session.get('user_id'), acao='Abertura de Conta', detalhes=f'Conta {tipo_conta} nº {numero_conta_gerado} aberta para {novo_usuario.nome}.'))
+            registrar_auditoria(session.get('user_id'), 'Abertura de Conta', f'Conta {tipo_conta} nº {numero_conta_gerado} aberta para {novo_usuario.nome}.', atomico=True)
             
             db.session.commit()
             flash(f'Conta {tipo_conta} aberta com sucesso! Número da conta: {numero_conta_gerado}', 'success')
             return redirect(url_for('funcionario.dashboard'))
 
+        except SENHAS_INDISPONIVEIS:
+            db.session.rollback()
+            flash(MENSAGEM_OCUPADO, 'warning')
         except Exception as e:
             db.session.rollback()
             flash(f'Erro ao abrir a conta: {str(e)}', 'danger')
@@ -132,6 +119,46 @@ def abertura_conta():
     max_dob = date.today().replace(year=date.today().year - 16)
     return render_template('funcionario/abertura_conta.html', max_dob=max_dob)
 
+@funcionario_bp.route('/importacao-clientes', methods=['GET', 'POST'])
+@login_required(role='Gerente')
+def importacao_clientes():
+    resultado = None
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            flash('Selecione uma planilha CSV ou XLSX.', 'danger')
+        elif not arquivo.filename.lower().endswith(EXTENSOES_PLANILHA):
+            flash('Formato não suportado. Envie um arquivo .csv ou .xlsx.', 'danger')
+        elif passa_do_limite(arquivo.stream, arquivo.filename, current_app.config['IMPORTACAO_MAX_LINHAS_WEB']):
+            # A importação roda dentro da requisição: planilhas maiores vão pelo comando
+            # `flask clientes importar`, que não está sujeito ao timeout do servidor.
+            flash(f"A planilha passa de {current_app.config['IMPORTACAO_MAX_LINHAS_WEB']} linhas. "
+                  "Divida o arquivo ou importe-o pelo comando 'flask clientes importar'.", 'danger')
+        else:
+            pasta = current_app.config['IMPORTACAO_PASTA_RELATORIOS']
+            os.makedirs(pasta, exist_ok=True)
+            nome_relatorio = f"erros_{uuid.uuid4().hex}.csv"
+            caminho_relatorio = os.path.join(pasta, nome_relatorio)
+            with open(caminho_relatorio, 'w', encoding='utf-8-sig', newline='') as relatorio:
+                resultado = importar_clientes(arquivo.stream, arquivo.filename, session['user_id'], relatorio)
+            if resultado['rejeitados']:
+                resultado['relatorio'] = nome_relatorio
+            else:
+                os.remove(caminho_relatorio)
+            registrar_auditoria(session['user_id'], 'Importação de Clientes',
+                                f"Arquivo {arquivo.filename}: {resultado['importados']} importados, {resultado['rejeitados']} rejeitados.")
+            db.session.commit()  # no modo 'transacao' o evento está na sessão
+            flash(f"Importação concluída: {resultado['importados']} contas abertas, {resultado['rejeitados']} linhas rejeitadas.",
+                  'success' if not resultado['rejeitados'] else 'warning')
+    return render_template('funcionario/importacao_clientes.html', resultado=resultado,
+                           limite_linhas=current_app.config['IMPORTACAO_MAX_LINHAS_WEB'])
+
+@funcionario_bp.route('/importacao-clientes/relatorio/<nome>')
+@login_required(role='Gerente')
+def relatorio_importacao(nome):
+    return send_from_directory(current_app.config['IMPORTACAO_PASTA_RELATORIOS'], nome,
+                               as_attachment=True, download_name='erros_importacao.csv', mimetype='text/csv')
+
 # --- ROTA DE CADASTRO DE FUNCIONÁRIO ADICIONADA ---
 @funcionario_bp.route('/cadastro-funcionario', methods=['GET', 'POST'])
 @login_required(role='Gerente') # Apenas Gerentes
@@ -147,12 +174,12 @@ def cadastro_funcionario():
                 data_nascimento=datetime.strptime(request.form.get('data_nascimento'), '%Y-%m-%d').date(),
                 telefone=re.sub(r'\D', '', request.form.get('telefone')),
                 email=request.form.get('email'), tipo_usuario='Funcionario',
-                senha_hash=generate_password_hash(request.form.get('senha'))
+                senha_hash=gerar_hash_senha(request.form.get('senha'))
             )
             db.session.add(novo_usuario)
             db.session.flush()
 
-            codigo_gerado = generate_employee_code()
+            codigo_gerado = reservar_codigos_funcionario()[0]
             novo_funcionario = Funcionario(
                 id_usuario=novo_usuario.id_usuario,
                 codigo_funcionario=codigo_gerado,
@@ -163,6 +190,9 @@ def cadastro_funcionario():
             db.session.commit()
             flash(f'Funcionário {novo_usuario.nome} cadastrado com sucesso! Matrícula: {codigo_gerado}', 'success')
             return redirect(url_for('funcionario.dashboard'))
+        except SENHAS_INDISPONIVEIS:
+            db.session.rollback()
+            flash(MENSAGEM_OCUPADO, 'warning')
         except Exception as e:
             db.session.rollback()
             flash(f'Erro ao cadastrar funcionário: {str(e)}', 'danger')
@@ -196,26 +226,21 @@ def iniciar_encerramento():
     id_conta = request.form.get('id_conta')
     motivo = request.form.get('motivo')
     conta = Conta.query.get_or_404(id_conta)
-    funcionario_logado = Funcionario.query.filter_by(id_usuario=session['user_id']).first()
+    funcionario_logado = carregar_funcionario()
 
     try:
         if conta.saldo != 0:
             raise ValueError(f"A conta não pode ser encerrada. Saldo pendente de R$ {conta.saldo:.2f}.")
-        
-        if os.path.exists('token.json'):
-            os.remove('token.json')
 
         otp = str(random.randint(100000, 999999))
-        if enviar_email_otp(funcionario_logado.usuario.email, funcionario_logado.usuario.nome, otp):
-            session['encerramento_otp'] = otp
-            session['encerramento_conta_id'] = conta.id_conta
-            session['encerramento_motivo'] = motivo
-            session['encerramento_otp_expiracao'] = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat()
-            
-            flash('Um OTP foi enviado ao seu e-mail para confirmar a operação.', 'info')
-            return redirect(url_for('funcionario.encerramento_confirmar'))
-        else:
-            raise Exception("Falha ao enviar e-mail de confirmação com OTP.")
+        enfileirar_email_otp(funcionario_logado.usuario.email, funcionario_logado.usuario.nome, otp)
+        session['encerramento_otp'] = otp
+        session['encerramento_conta_id'] = conta.id_conta
+        session['encerramento_motivo'] = motivo
+        session['encerramento_otp_expiracao'] = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat()
+
+        flash('Um OTP foi enviado ao seu e-mail para confirmar a operação.', 'info')
+        return redirect(url_for('funcionario.encerramento_confirmar'))
             
     except Exception as e:
         flash(f'Erro: {str(e)}', 'danger')
@@ -235,10 +260,10 @@ def encerramento_confirmar():
             senha_admin = request.form.get('senha_admin')
             otp_digitado = request.form.get('otp')
             
-            funcionario_logado = Funcionario.query.filter_by(id_usuario=session['user_id']).first()
+            funcionario_logado = carregar_funcionario()
             expiracao_otp = datetime.fromisoformat(session.get('encerramento_otp_expiracao'))
 
-            if not check_password_hash(funcionario_logado.usuario.senha_hash, senha_admin):
+            if not verificar_senha(funcionario_logado.usuario.senha_hash, senha_admin):
                 raise ValueError("Sua senha de confirmação está incorreta.")
             if otp_digitado != session.get('encerramento_otp'):
                 raise ValueError("O código OTP está incorreto.")
@@ -263,6 +288,8 @@ def encerramento_confirmar():
 
         except ValueError as e:
             flash(str(e), 'danger')
+        except SENHAS_INDISPONIVEIS:
+            flash(MENSAGEM_OCUPADO, 'warning')
         except Exception:
             flash('Um erro inesperado ocorreu. Tente novamente.', 'danger')
     
@@ -0,0 +1,92 @@
+# Este módulo carrega a identidade do usuário logado uma única vez por requisição
+# (guardada em flask.g) e mantém um cache curto, entre requisições, dos dados que
+# praticamente não mudam (nome e cargo), usados em menus e cabeçalhos.
+# O cache só serve à exibição: as permissões (login_required dos funcionários)
+# usam o cargo lido do banco na própria requisição, que também atualiza o cache.
+
+import threading
+
+from cachetools import TTLCache
+from flask import g, session, abort, current_app
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import Cliente, Funcionario
+
+_perfis = None
+_perfis_lock = threading.Lock()
+
+
+def carregar_cliente():
+    """Cliente logado, com usuário e contas, carregado uma vez por requisição (404 se não existir)."""
+    if 'cliente' not in g:
+        g.cliente = (Cliente.query
+                     .options(joinedload(Cliente.usuario), selectinload(Cliente.contas))
+                     .filter_by(id_usuario=session['user_id'])
+                     .first())
+    if g.cliente is None:
+        abort(404)
+    return g.cliente
+
+
+def conta_selecionada(cliente):
+    """Conta escolhida no seletor de contas; sem escolha válida, a primeira conta do cliente."""
+    if not cliente.contas:
+        return None
+    id_conta = session.get('id_conta_selecionada')
+    return next((conta for conta in cliente.contas if conta.id_conta == id_conta), cliente.contas[0])
+
+
+def carregar_funcionario():
+    """Funcionário logado, com usuário, carregado uma vez por requisição (None se não existir)."""
+    if 'funcionario' not in g:
+        g.funcionario = (Funcionario.query
+                         .options(joinedload(Funcionario.usuario))
+                         .filter_by(id_usuario=session['user_id'])
+                         .first())
+    return g.funcionario
+
+
+def _obter_perfis():
+    global _perfis
+    with _perfis_lock:
+        if _perfis is None:
+            _perfis = TTLCache(maxsize=current_app.config['IDENTIDADE_CACHE_TAMANHO'],
+                               ttl=current_app.config['IDENTIDADE_CACHE_TTL_SEGUNDOS'])
+        return _perfis
+
+
+def _perfil(funcionario):
+    return {'nome': funcionario.usuario.nome, 'cargo': funcionario.cargo}
+
+
+def perfil_funcionario(id_usuario):
+    """Nome e cargo do funcionário, vindos do cache quando possível. None se não for funcionário."""
+    perfis = _obter_perfis()
+    with _perfis_lock:
+        perfil = perfis.get(id_usuario)
+    if perfil is None:
+        funcionario = (Funcionario.query
+                       .options(joinedload(Funcionario.usuario))
+                       .filter_by(id_usuario=id_usuario)
+                       .first())
+        if funcionario is None:
+            return None
+        perfil = _perfil(funcionario)
+        with _perfis_lock:
+            perfis[id_usuario] = perfil
+    return perfil
+
+
+def perfil_funcionario_atual():
+    """
+    Nome e cargo do funcionário logado lidos do banco nesta requisição, para
+    decisões de permissão; o cache é atualizado com eles. None se não for funcionário.
+    """
+    funcionario = carregar_funcionario()
+    perfis = _obter_perfis()
+    with _perfis_lock:
+        if funcionario is None:
+            perfis.pop(session['user_id'], None)
+            return None
+        perfil = perfis[funcionario.id_usuario] = _perfil(funcionario)
+    return perfil
@@ -0,0 +1,294 @@
+# Este módulo importa clientes em lote a partir das planilhas das agências (CSV ou XLSX).
+# As linhas são lidas e validadas em fluxo, sem carregar o arquivo inteiro. As válidas
+# são agrupadas em lotes: as senhas são geradas num pool de processos, os números de
+# conta são reservados de uma vez e tudo é gravado com inserts em lote (executemany),
+# um commit por lote. As linhas rejeitadas vão para um relatório CSV de erros.
+
+import re
+import csv
+from itertools import chain, islice
+from datetime import datetime, date, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from openpyxl import load_workbook
+from sqlalchemy import select, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import (db, Usuario, Cliente, Conta, Agencia, Auditoria, HistoricoConta,
+                        ContaCorrente, ContaPoupanca, ContaInvestimento)
+from app.numero_conta_services import reservar_numeros_conta
+from app.senha_services import SENHAS_INDISPONIVEIS, gerar_hashes_senha
+
+EXTENSOES_PLANILHA = ('.csv', '.xlsx')
+COLUNAS_OBRIGATORIAS = ('nome', 'cpf', 'data_nascimento', 'telefone', 'email', 'senha', 'tipo_conta')
+COLUNAS_RELATORIO = ['Linha', 'CPF', 'E-mail', 'Erro']
+
+# Tabela do subtipo, coluna de chave e campos específicos de cada tipo de conta.
+TIPOS_CONTA = {
+    'Corrente': (ContaCorrente.__table__, 'id_conta_corrente', ('limite_cheque_especial', 'taxa_manutencao')),
+    'Poupanca': (ContaPoupanca.__table__, 'id_conta_poupanca', ('taxa_rendimento',)),
+    'Investimento': (ContaInvestimento.__table__, 'id_conta_investimento',
+                     ('perfil_risco', 'valor_minimo_deposito', 'taxa_rendimento_base')),
+}
+PERFIS_RISCO = ('Baixo', 'Medio', 'Alto')
+
+# --- LEITURA DA PLANILHA ---
+
+def _nome_coluna(valor):
+    return str(valor or '').strip().lower().replace(' ', '_')
+
+
+def ler_planilha(arquivo, nome_arquivo):
+    """
+    Gera (numero_da_linha, dados) para cada linha preenchida da planilha.
+    `arquivo` é um arquivo binário (upload ou arquivo local). No CSV o separador
+    pode ser ';' ou ','; no XLSX é lida a primeira aba, em modo somente leitura.
+    """
+    if nome_arquivo.lower().endswith('.xlsx'):
+        workbook = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            linhas = workbook.active.iter_rows(values_only=True)
+            cabecalho = [_nome_coluna(c) for c in next(linhas, ())]
+            for numero, valores in enumerate(linhas, start=2):
+                if any(v not in (None, '') for v in valores):
+                    yield numero, dict(zip(cabecalho, valores))
+        finally:
+            workbook.close()
+        return
+
+    texto = (linha.decode('utf-8-sig') for linha in arquivo)
+    primeira = next(texto, '')
+    leitor = csv.reader(chain([primeira], texto), delimiter=';' if ';' in primeira else ',')
+    cabecalho = [_nome_coluna(c) for c in next(leitor, [])]
+    for numero, valores in enumerate(leitor, start=2):
+        if any(v.strip() for v in valores):
+            yield numero, dict(zip(cabecalho, valores))
+
+
+def passa_do_limite(arquivo, nome_arquivo, limite):
+    """
+    Diz se a planilha tem mais de `limite` linhas preenchidas, lendo no máximo
+    limite + 1 delas, e volta o arquivo ao início para a importação.
+    """
+    try:
+        return sum(1 for _ in islice(ler_planilha(arquivo, nome_arquivo), limite + 1)) > limite
+    finally:
+        arquivo.seek(0)
+
+
+
+# --- VALIDAÇÃO ---
+
+def _texto(dados, coluna):
+    valor = dados.get(coluna)
+    return '' if valor is None else str(valor).strip()
+
+
+def _decimal(dados, coluna):
+    valor = dados.get(coluna)
+    if valor is None or str(valor).strip() == '':
+        raise ValueError(f"A coluna '{coluna}' é obrigatória para este tipo de conta.")
+    try:
+        return Decimal(str(valor).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido na coluna '{coluna}': {valor}.")
+
+
+def _data(valor):
+    if isinstance(valor, datetime): return valor.date()
+    if isinstance(valor, date): return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(valor).strip(), formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Data de nascimento inválida: {valor}. Use AAAA-MM-DD ou DD/MM/AAAA.")
+
+
+def validar_linha(dados, agencias, agencia_padrao):
+    """
+    Aplica à linha as mesmas regras da abertura de conta pelo formulário e devolve
+    o registro normalizado. Levanta ValueError com a mensagem do primeiro problema.
+    """
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if not _texto(dados, c)]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias vazias: {', '.join(faltando)}.")
+
+    data_nascimento = _data(dados['data_nascimento'])
+    if (date.today() - data_nascimento) < timedelta(days=16*365.25):
+        raise ValueError("O cliente deve ter pelo menos 16 anos.")
+
+    cpf = re.sub(r'\D', '', _texto(dados, 'cpf'))
+    if len(cpf) != 11:
+        raise ValueError("CPF inválido. Deve conter 11 números.")
+    email = _texto(dados, 'email')
+    if '@' not in email or len(email) > 120:
+        raise ValueError("E-mail inválido.")
+    telefone = re.sub(r'\D', '', _texto(dados, 'telefone'))
+    if not 10 <= len(telefone) <= 15:
+        raise ValueError("Telefone inválido.")
+    nome = _texto(dados, 'nome')
+    if len(nome) > 100:
+        raise ValueError("O nome deve ter no máximo 100 caracteres.")
+
+    tipo_conta = _texto(dados, 'tipo_conta').capitalize().replace('ç', 'c')
+    if tipo_conta not in TIPOS_CONTA:
+        raise ValueError(f"Tipo de conta inválido: {dados['tipo_conta']}.")
+    campos_conta = {}
+    for campo in TIPOS_CONTA[tipo_conta][2]:
+        if campo == 'perfil_risco':
+            perfil = _texto(dados, campo).capitalize().replace('é', 'e')
+            if perfil not in PERFIS_RISCO:
+                raise ValueError(f"Perfil de risco inválido: {dados.get(campo)}.")
+            campos_conta[campo] = perfil
+        else:
+            campos_conta[campo] = _decimal(dados, campo)
+
+    codigo_agencia = _texto(dados, 'codigo_agencia')
+    id_agencia = agencias.get(codigo_agencia) if codigo_agencia else agencia_padrao
+    if id_agencia is None:
+        raise ValueError(f"Agência não encontrada: {codigo_agencia}." if codigo_agencia else "Nenhuma agência cadastrada.")
+
+    saldo_inicial = _decimal(dados, 'saldo_inicial') if _texto(dados, 'saldo_inicial') else Decimal('0')
+    if saldo_inicial < 0:
+        raise ValueError("O saldo inicial não pode ser negativo.")
+
+    return {
+        'nome': nome, 'cpf': cpf, 'data_nascimento': data_nascimento, 'telefone': telefone,
+        'email': email, 'senha': _texto(dados, 'senha'), 'tipo_conta': tipo_conta,
+        'campos_conta': campos_conta, 'id_agencia': id_agencia, 'saldo_inicial': saldo_inicial,
+    }
+
+
+# --- GRAVAÇÃO EM LOTE ---
+
+def _separar_ja_cadastrados(lote):
+    """Separa os registros cujo CPF ou e-mail já existe no banco (uma consulta por lote)."""
+    cpfs = [r['cpf'] for r in lote]
+    emails = [r['email'] for r in lote]
+    existentes = db.session.execute(
+        select(Usuario.CPF, Usuario.email).where(or_(Usuario.CPF.in_(cpfs), Usuario.email.in_(emails)))
+    ).all()
+    cpfs_existentes = {cpf for cpf, _ in existentes}
+    emails_existentes = {email.lower() for _, email in existentes}
+
+    novos, rejeitados = [], []
+    for registro in lote:
+        if registro['cpf'] in cpfs_existentes:
+            rejeitados.append((registro, "Este CPF já está cadastrado."))
+        elif registro['email'].lower() in emails_existentes:
+            rejeitados.append((registro, "Este e-mail já está cadastrado."))
+        else:
+            novos.append(registro)
+    return novos, rejeitados
+
+
+def _gravar_lote(lote, id_funcionario):
+    """Grava usuários, clientes, contas, histórico e auditoria do lote com inserts em lote. Não faz commit."""
+    hashes = gerar_hashes_senha([r['senha'] for r in lote])
+    numeros = reservar_numeros_conta(len(lote))
+    agora = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+    db.session.execute(Usuario.__table__.insert(), [
+        {'nome': r['nome'], 'CPF': r['cpf'], 'data_nascimento': r['data_nascimento'], 'telefone': r['telefone'],
+         'email': r['email'], 'tipo_usuario': 'Cliente', 'senha_hash': senha_hash, 'senha_provisoria': True}
+        for r, senha_hash in zip(lote, hashes)
+    ])
+    id_usuario_por_cpf = dict(db.session.execute(
+        select(Usuario.CPF, Usuario.id_usuario).where(Usuario.CPF.in_([r['cpf'] for r in lote]))).all())
+
+    db.session.execute(Cliente.__table__.insert(), [
+        {'id_usuario': id_usuario_por_cpf[r['cpf']], 'score_credito': 500} for r in lote
+    ])
+    id_cliente_por_usuario = dict(db.session.execute(
+        select(Cliente.id_usuario, Cliente.id_cliente).where(Cliente.id_usuario.in_(id_usuario_por_cpf.values()))).all())
+
+    db.session.execute(Conta.__table__.insert(), [
+        {'numero_conta': numero, 'saldo': r['saldo_inicial'], 'tipo_conta': r['tipo_conta'], 'data_abertura': agora,
+         'status': 'Ativa', 'id_agencia': r['id_agencia'], 'id_cliente': id_cliente_por_usuario[id_usuario_por_cpf[r['cpf']]]}
+        for r, numero in zip(lote, numeros)
+    ])
+    id_conta_por_numero = dict(db.session.execute(
+        select(Conta.numero_conta, Conta.id_conta).where(Conta.numero_conta.in_(numeros))).all())
+
+    for tipo_conta, (tabela, coluna_id, _) in TIPOS_CONTA.items():
+        linhas = [{coluna_id: id_conta_por_numero[numero], **r['campos_conta']}
+                  for r, numero in zip(lote, numeros) if r['tipo_conta'] == tipo_conta]
+        if linhas:
+            db.session.execute(tabela.insert(), linhas)
+
+    db.session.execute(HistoricoConta.__table__.insert(), [
+        {'id_conta': id_conta_por_numero[numero], 'id_funcionario_responsavel': id_funcionario,
+         'acao': 'Abertura', 'motivo': 'Criação de nova conta (importação em lote).', 'data_hora': agora}
+        for numero in numeros
+    ])
+    db.session.execute(Auditoria.__table__.insert(), [
+        {'id_usuario': id_funcionario, 'acao': 'Abertura de Conta', 'data_hora': agora,
+         'detalhes': f"Conta {r['tipo_conta']} nº {numero} aberta para {r['nome']} (importação em lote)."}
+        for r, numero in zip(lote, numeros)
+    ])
+
+
+def importar_clientes(arquivo, nome_arquivo, id_funcionario, relatorio, tamanho_lote=None):
+    """
+    Importa os clientes da planilha e escreve as linhas rejeitadas no CSV `relatorio`
+    (arquivo texto já aberto). Cada lote é gravado e confirmado em sua própria transação:
+    um erro de banco, ou o pool de senhas cheio ou sem resposta a tempo, descarta só o
+    lote em que ocorreu.
+    Retorna {'importados': n, 'rejeitados': n}.
+    """
+    tamanho_lote = tamanho_lote or current_app.config['IMPORTACAO_LOTE']
+    agencias = dict(db.session.execute(select(Agencia.codigo_agencia, Agencia.id_agencia)).all())
+    agencia_padrao = db.session.execute(select(Agencia.id_agencia).order_by(Agencia.id_agencia).limit(1)).scalar()
+
+    escritor = csv.writer(relatorio, delimiter=';')
+    escritor.writerow(COLUNAS_RELATORIO)
+    resultado = {'importados': 0, 'rejeitados': 0}
+
+    def rejeitar(numero, cpf, email, erro):
+        escritor.writerow([numero, cpf, email, erro])
+        resultado['rejeitados'] += 1
+
+    def processar(lote):
+        novos, ja_cadastrados = _separar_ja_cadastrados(lote)
+        for registro, erro in ja_cadastrados:
+            rejeitar(registro['linha'], registro['cpf'], registro['email'], erro)
+        if not novos:
+            return
+        try:
+            _gravar_lote(novos, id_funcionario)
+            db.session.commit()
+            resultado['importados'] += len(novos)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            for registro in novos:
+                rejeitar(registro['linha'], registro['cpf'], registro['email'], f"Lote não gravado: {e.__class__.__name__}.")
+        except SENHAS_INDISPONIVEIS:
+            db.session.rollback()
+            for registro in novos:
+                rejeitar(registro['linha'], registro['cpf'], registro['email'],
+                         "Lote não gravado: o gerador de senhas está ocupado. Importe a linha novamente.")
+
+    cpfs_vistos, emails_vistos = set(), set()
+    lote = []
+    for numero, dados in ler_planilha(arquivo, nome_arquivo):
+        try:
+            registro = validar_linha(dados, agencias, agencia_padrao)
+            if registro['cpf'] in cpfs_vistos:
+                raise ValueError("CPF repetido na planilha.")
+            if registro['email'].lower() in emails_vistos:
+                raise ValueError("E-mail repetido na planilha.")
+        except ValueError as e:
+            rejeitar(numero, _texto(dados, 'cpf'), _texto(dados, 'email'), str(e))
+            continue
+        cpfs_vistos.add(registro['cpf'])
+        emails_vistos.add(registro['email'].lower())
+        registro['linha'] = numero
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            processar(lote)
+            lote = []
+    if lote:
+        processar(lote)
+    return resultado
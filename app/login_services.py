@@ -0,0 +1,53 @@
+# Este módulo controla o bloqueio de usuários após falhas seguidas de login.
+# O estado fica na tabela tentativa_login, consultada pela chave primária;
+# a tabela auditoria continua apenas como histórico.
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.mysql import insert
+
+from app.models import db, TentativaLogin
+
+TENTATIVAS_MAXIMAS = 3
+TEMPO_BLOQUEIO_MINUTOS = 10
+
+
+def minutos_de_bloqueio(id_usuario):
+    """Retorna quantos minutos faltam para o desbloqueio, ou 0 se o usuário não está bloqueado."""
+    tentativa = db.session.get(TentativaLogin, id_usuario)
+    if not tentativa or not tentativa.bloqueado_ate:
+        return 0
+    bloqueado_ate = tentativa.bloqueado_ate
+    if bloqueado_ate.tzinfo is None:
+        bloqueado_ate = bloqueado_ate.replace(tzinfo=timezone.utc)
+    agora = datetime.now(timezone.utc)
+    if agora >= bloqueado_ate:
+        return 0
+    return ((bloqueado_ate - agora).seconds // 60) + 1
+
+
+def registrar_falha(id_usuario):
+    """
+    Soma uma falha ao contador do usuário (de forma atômica) e bloqueia ao atingir
+    TENTATIVAS_MAXIMAS. Retorna (numero_da_tentativa, bloqueou). Não faz commit.
+    """
+    stmt = insert(TentativaLogin).values(id_usuario=id_usuario, falhas=1)
+    stmt = stmt.on_duplicate_key_update(falhas=TentativaLogin.falhas + 1)
+    db.session.execute(stmt)
+
+    tentativa = db.session.get(TentativaLogin, id_usuario, populate_existing=True)
+    numero_tentativa = tentativa.falhas
+    if numero_tentativa >= TENTATIVAS_MAXIMAS:
+        tentativa.falhas = 0
+        tentativa.bloqueado_ate = datetime.now(timezone.utc) + timedelta(minutes=TEMPO_BLOQUEIO_MINUTOS)
+        return numero_tentativa, True
+    return numero_tentativa, False
+
+
+def registrar_sucesso(id_usuario):
+    """Zera o contador de falhas do usuário. Não faz commit."""
+    db.session.execute(
+        TentativaLogin.__table__.update()
+        .where(TentativaLogin.id_usuario == id_usuario)
+        .values(falhas=0, bloqueado_ate=None)
+    )
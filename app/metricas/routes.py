@@ -0,0 +1,19 @@
+import hmac
+
+from flask import Blueprint, Response, request, current_app, abort
+
+from app.metricas_services import coletar_metricas, formatar_prometheus
+
+metricas_bp = Blueprint('metricas', __name__)
+
+
+@metricas_bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICAS_TOKEN']
+    if not token:
+        # Sem token o endpoint só responde em modo debug (desenvolvimento local).
+        if not current_app.debug:
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    return Response(formatar_prometheus(coletar_metricas()), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,115 @@
+# Este módulo coleta métricas de funcionamento do processo (pool de conexões do banco)
+# e as expõe no formato texto do Prometheus em /metrics, ou numa linha de log periódica.
+
+import time
+import threading
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+_coletores = []
+
+
+def registrar_coletor(coletor):
+    """Acrescenta uma função que devolve uma lista de (nome, tipo, ajuda, valor) às métricas."""
+    _coletores.append(coletor)
+
+
+def coletar_metricas():
+    return [metrica for coletor in _coletores for metrica in coletor()]
+
+
+def formatar_prometheus(metricas):
+    linhas = []
+    for nome, tipo, ajuda, valor in metricas:
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}", f"{nome} {valor}"]
+    return "\n".join(linhas) + "\n"
+
+
+class MetricasPool:
+    """Contadores do pool de conexões, alimentados pelos eventos de pool do SQLAlchemy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool = None
+        self.checkouts = 0
+        self.em_uso_maximo = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.timeouts = 0
+        self.conexoes_criadas = 0
+        self.invalidacoes = 0
+
+    def registrar_espera(self, segundos, esgotou=False):
+        with self._lock:
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            if esgotou:
+                self.timeouts += 1
+
+    def _ao_conectar(self, *_):
+        with self._lock:
+            self.conexoes_criadas += 1
+
+    def _ao_retirar(self, *_):
+        with self._lock:
+            self.checkouts += 1
+            self.em_uso_maximo = max(self.em_uso_maximo, self.pool.checkedout())
+
+    def _ao_invalidar(self, *_):
+        with self._lock:
+            self.invalidacoes += 1
+
+    def instrumentar(self, engine):
+        self.pool = engine.pool
+        event.listen(engine, 'connect', self._ao_conectar)
+        event.listen(engine, 'checkout', self._ao_retirar)
+        event.listen(engine, 'invalidate', self._ao_invalidar)
+
+    def metricas(self):
+        if self.pool is None or not isinstance(self.pool, QueuePool):
+            return []
+        with self._lock:
+            return [
+                ('banco_pool_tamanho', 'gauge', 'Conexões permanentes do pool (pool_size).', self.pool.size()),
+                ('banco_pool_em_uso', 'gauge', 'Conexões retiradas do pool neste momento.', self.pool.checkedout()),
+                ('banco_pool_ociosas', 'gauge', 'Conexões abertas aguardando uso.', self.pool.checkedin()),
+                ('banco_pool_overflow', 'gauge', 'Conexões abertas além de pool_size.', max(self.pool.overflow(), 0)),
+                ('banco_pool_em_uso_maximo', 'gauge', 'Maior número de conexões em uso ao mesmo tempo.', self.em_uso_maximo),
+                ('banco_pool_checkouts_total', 'counter', 'Conexões retiradas do pool.', self.checkouts),
+                ('banco_pool_espera_segundos_total', 'counter', 'Tempo total esperando uma conexão.', round(self.espera_total, 6)),
+                ('banco_pool_espera_segundos_maxima', 'gauge', 'Maior espera por uma conexão.', round(self.espera_maxima, 6)),
+                ('banco_pool_timeouts_total', 'counter', 'Esperas que estouraram pool_timeout.', self.timeouts),
+                ('banco_pool_conexoes_criadas_total', 'counter', 'Conexões novas abertas com o MySQL.', self.conexoes_criadas),
+                ('banco_pool_invalidacoes_total', 'counter', 'Conexões descartadas (ex.: derrubadas pelo MySQL).', self.invalidacoes),
+            ]
+
+    def linha_de_log(self):
+        return " ".join(f"{nome.removeprefix('banco_pool_')}={valor}" for nome, _, _, valor in self.metricas())
+
+
+metricas_pool = MetricasPool()
+registrar_coletor(metricas_pool.metricas)
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou até conseguir uma conexão."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            metricas_pool.registrar_espera(time.perf_counter() - inicio, esgotou=True)
+            raise
+        metricas_pool.registrar_espera(time.perf_counter() - inicio)
+        return conexao
+
+
+def iniciar_log_periodico(intervalo):
+    """Escreve as métricas do pool no log a cada `intervalo` segundos (thread em segundo plano)."""
+    def registrar():
+        while True:
+            time.sleep(intervalo)
+            print(f"[pool de conexões] {metricas_pool.linha_de_log()}", flush=True)
+    threading.Thread(target=registrar, name='metricas-pool', daemon=True).start()
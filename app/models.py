@@ -20,7 +20,7 @@ class Usuario(db.Model):
 
     cliente = db.relationship('Cliente', back_populates='usuario', uselist=False, cascade="all, delete-orphan")
     funcionario = db.relationship('Funcionario', back_populates='usuario', uselist=False, cascade="all, delete-orphan")
-    auditorias = db.relationship('Auditoria', back_populates='usuario')
+    auditorias = db.relationship('Auditoria', primaryjoin='Usuario.id_usuario == foreign(Auditoria.id_usuario)', back_populates='usuario')
 
 class Funcionario(db.Model):
     __tablename__ = 'funcionario'
@@ -43,7 +43,7 @@ class Cliente(db.Model):
     score_credito = db.Column(db.Numeric(5, 2), default=0)
     
     usuario = db.relationship('Usuario', back_populates='cliente')
-    contas = db.relationship('Conta', back_populates='cliente', cascade="all, delete-orphan")
+    contas = db.relationship('Conta', back_populates='cliente', cascade="all, delete-orphan", order_by='Conta.id_conta')
 
 class Endereco(db.Model):
     __tablename__ = 'endereco'
@@ -73,16 +73,19 @@ class Conta(db.Model):
     tipo_conta = db.Column(ENUM('Poupanca', 'Corrente', 'Investimento'), nullable=False)
     data_abertura = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     status = db.Column(ENUM('Ativa', 'Encerrada', 'Bloqueada'), nullable=False, default='Ativa')
+    versao_painel = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     id_agencia = db.Column(db.Integer, db.ForeignKey('agencia.id_agencia'), nullable=False)
     id_cliente = db.Column(db.Integer, db.ForeignKey('cliente.id_cliente'), nullable=False)
 
     agencia = db.relationship('Agencia', back_populates='contas')
     cliente = db.relationship('Cliente', back_populates='contas')
-    transacoes_origem = db.relationship('Transacao', foreign_keys='Transacao.id_conta_origem', back_populates='conta_origem')
-    transacoes_destino = db.relationship('Transacao', foreign_keys='Transacao.id_conta_destino', back_populates='conta_destino')
+    transacoes_origem = db.relationship('Transacao', primaryjoin='Conta.id_conta == foreign(Transacao.id_conta_origem)', back_populates='conta_origem')
+    transacoes_destino = db.relationship('Transacao', primaryjoin='Conta.id_conta == foreign(Transacao.id_conta_destino)', back_populates='conta_destino')
     historico = db.relationship('HistoricoConta', back_populates='conta', cascade="all, delete-orphan")
     
-    __mapper_args__ = {'polymorphic_on': tipo_conta}
+    # Toda consulta de Conta já traz as colunas do subtipo (LEFT JOIN nas três tabelas),
+    # em vez de um SELECT extra quando a rota acessa limite_cheque_especial, taxa_rendimento etc.
+    __mapper_args__ = {'polymorphic_on': tipo_conta, 'with_polymorphic': '*'}
 
 class ContaPoupanca(Conta):
     __tablename__ = 'conta_poupanca'
@@ -104,20 +107,65 @@ class ContaInvestimento(Conta):
     perfil_risco = db.Column(ENUM('Baixo', 'Medio', 'Alto'), nullable=False)
     valor_minimo_deposito = db.Column(db.Numeric(15, 2), nullable=False)
     taxa_rendimento_base = db.Column(db.Numeric(5, 2), nullable=False)
+    ultimo_rendimento = db.Column(db.DateTime)
     __mapper_args__ = {'polymorphic_identity': 'Investimento'}
 
+# transacao e auditoria são particionadas por mês em data_hora: a coluna faz parte da
+# chave primária e as tabelas não têm chaves estrangeiras (restrições do MySQL).
+# data_hora é gravada sem microssegundos, como a coluna DATETIME guarda, para a
+# identidade do objeto na sessão bater com a linha no banco.
 class Transacao(db.Model):
     __tablename__ = 'transacao'
-    id_transacao = db.Column(db.Integer, primary_key=True)
+    id_transacao = db.Column(db.Integer, primary_key=True, autoincrement=True)
     tipo_transacao = db.Column(ENUM('Deposito', 'Saque', 'Transferencia', 'Pagamento', 'Rendimento'), nullable=False)
     valor = db.Column(db.Numeric(15, 2), nullable=False)
-    data_hora = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    data_hora = db.Column(db.DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None))
     descricao = db.Column(db.String(100))
-    id_conta_origem = db.Column(db.Integer, db.ForeignKey('conta.id_conta'))
-    id_conta_destino = db.Column(db.Integer, db.ForeignKey('conta.id_conta'))
+    id_conta_origem = db.Column(db.Integer)
+    id_conta_destino = db.Column(db.Integer)
     
-    conta_origem = db.relationship('Conta', foreign_keys=[id_conta_origem], back_populates='transacoes_origem')
-    conta_destino = db.relationship('Conta', foreign_keys=[id_conta_destino], back_populates='transacoes_destino')
+    conta_origem = db.relationship('Conta', primaryjoin='foreign(Transacao.id_conta_origem) == Conta.id_conta', back_populates='transacoes_origem')
+    conta_destino = db.relationship('Conta', primaryjoin='foreign(Transacao.id_conta_destino) == Conta.id_conta', back_populates='transacoes_destino')
+
+    __table_args__ = (
+        db.Index('idx_data_hora', 'data_hora'),
+        db.Index('idx_transacao_origem_data', 'id_conta_origem', 'data_hora'),
+        db.Index('idx_transacao_destino_data', 'id_conta_destino', 'data_hora'),
+        db.Index('idx_transacao_origem_tipo_data', 'id_conta_origem', 'tipo_transacao', 'data_hora'),
+        db.Index('idx_transacao_destino_tipo_data', 'id_conta_destino', 'tipo_transacao', 'data_hora'),
+    )
+
+class SaldoDiario(db.Model):
+    __tablename__ = 'saldo_diario'
+    id_conta = db.Column(db.Integer, db.ForeignKey('conta.id_conta'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    saldo_abertura = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    saldo_fechamento = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    creditos = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    debitos = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+
+    conta = db.relationship('Conta')
+
+class ContadorMovimento(db.Model):
+    __tablename__ = 'contador_movimento'
+    id_conta = db.Column(db.Integer, db.ForeignKey('conta.id_conta'), primary_key=True)
+    tipo_transacao = db.Column(ENUM('Deposito', 'Saque', 'Transferencia', 'Pagamento', 'Rendimento'), primary_key=True)
+    granularidade = db.Column(ENUM('hora', 'dia', 'mes'), primary_key=True)
+    inicio = db.Column(db.DateTime, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+
+class SequenciaNumero(db.Model):
+    __tablename__ = 'sequencia_numero'
+    nome = db.Column(db.String(30), primary_key=True)
+    proximo = db.Column(db.BigInteger, nullable=False, default=0)
+
+class CobrancaTarifa(db.Model):
+    __tablename__ = 'cobranca_tarifa'
+    id_conta = db.Column(db.Integer, db.ForeignKey('conta.id_conta'), primary_key=True)
+    competencia = db.Column(db.String(7), primary_key=True)
+    valor = db.Column(db.Numeric(5, 2), nullable=False)
+    data_hora = db.Column(db.DateTime, nullable=False)
 
 class HistoricoConta(db.Model):
     __tablename__ = 'historico_conta'
@@ -133,13 +181,19 @@ class HistoricoConta(db.Model):
 
 class Auditoria(db.Model):
     __tablename__ = 'auditoria'
-    id_auditoria = db.Column(db.Integer, primary_key=True)
-    id_usuario = db.Column(db.Integer, db.ForeignKey('usuario.id_usuario'), nullable=False)
+    id_auditoria = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    id_usuario = db.Column(db.Integer, nullable=False)
     acao = db.Column(db.String(50), nullable=False)
-    data_hora = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    data_hora = db.Column(db.DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None))
     detalhes = db.Column(db.Text)
     
-    usuario = db.relationship('Usuario', back_populates='auditorias')
+    usuario = db.relationship('Usuario', primaryjoin='foreign(Auditoria.id_usuario) == Usuario.id_usuario', back_populates='auditorias')
+
+class TentativaLogin(db.Model):
+    __tablename__ = 'tentativa_login'
+    id_usuario = db.Column(db.Integer, db.ForeignKey('usuario.id_usuario'), primary_key=True)
+    falhas = db.Column(db.Integer, nullable=False, default=0)
+    bloqueado_ate = db.Column(db.DateTime(timezone=True))
 
 class Relatorio(db.Model):
     __tablename__ = 'relatorio'
@@ -0,0 +1,59 @@
+# Este módulo concentra as alterações de saldo das contas.
+# Toda movimentação trava as linhas envolvidas com SELECT ... FOR UPDATE, sempre em
+# ordem crescente de id_conta (evita deadlock entre transferências cruzadas), e só
+# então valida e altera o saldo. A trava dura até o commit/rollback da requisição.
+# Cada movimentação incrementa a versão do painel do dashboard da conta.
+
+from app.models import Conta, ContaCorrente
+from app.saldo_services import registrar_movimento
+from app.dashboard_services import marcar_conta_alterada
+
+
+def bloquear_contas(*ids_conta):
+    """Trava e recarrega as contas informadas. Retorna um dict {id_conta: conta}."""
+    contas = (Conta.query
+              .filter(Conta.id_conta.in_(ids_conta))
+              .order_by(Conta.id_conta)
+              .with_for_update()
+              .populate_existing()
+              .all())
+    return {conta.id_conta: conta for conta in contas}
+
+
+def saldo_disponivel(conta, usar_limite=True):
+    """Saldo da conta somado ao cheque especial, quando houver."""
+    saldo = conta.saldo
+    if usar_limite and isinstance(conta, ContaCorrente):
+        saldo += conta.limite_cheque_especial
+    return saldo
+
+
+def creditar(conta, valor):
+    """Credita uma conta já travada por bloquear_contas. Não faz commit."""
+    conta.saldo += valor
+    registrar_movimento(conta.id_conta, conta.saldo, credito=valor)
+    marcar_conta_alterada(conta)
+
+
+def debitar(conta, valor, usar_limite=True, mensagem_saldo="Saldo insuficiente."):
+    """
+    Debita uma conta já travada por bloquear_contas, validando o saldo sob a trava.
+    Lança ValueError se não houver saldo. Não faz commit.
+    """
+    if saldo_disponivel(conta, usar_limite) < valor:
+        raise ValueError(mensagem_saldo)
+    conta.saldo -= valor
+    registrar_movimento(conta.id_conta, conta.saldo, debito=valor)
+    marcar_conta_alterada(conta)
+
+
+def transferir(id_conta_origem, id_conta_destino, valor):
+    """
+    Trava as duas contas (na ordem dos ids), debita a origem e credita o destino.
+    Retorna (conta_origem, conta_destino). Não faz commit.
+    """
+    contas = bloquear_contas(id_conta_origem, id_conta_destino)
+    conta_origem, conta_destino = contas[id_conta_origem], contas[id_conta_destino]
+    debitar(conta_origem, valor, usar_limite=False)
+    creditar(conta_destino, valor)
+    return conta_origem, conta_destino
@@ -0,0 +1,129 @@
+# Este módulo gera os números de conta (base numérica + dígito verificador de Luhn).
+# Os números saem de uma sequência no banco (sequencia_services), que cada
+# processo reserva em blocos: o banco é acessado uma vez por bloco, não por número.
+# Cada posição da sequência passa por uma permutação (rede de Feistel com chave),
+# então os números continuam parecendo aleatórios sem nunca se repetirem.
+
+import hashlib
+import threading
+from collections import deque
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.models import db, Conta
+from app.sequencia_services import reservar_faixa
+
+DIGITOS_INICIAIS = 6  # as contas existentes têm 6 dígitos antes do verificador
+RODADAS_FEISTEL = 4
+
+
+def luhn_checksum(card_number):
+    def digits_of(n): return [int(d) for d in str(n)]
+    digits = digits_of(card_number)
+    odd_digits, even_digits = digits[-1::-2], digits[-2::-2]
+    checksum = sum(odd_digits)
+    for d in even_digits:
+        checksum += sum(digits_of(d * 2))
+    return checksum % 10
+
+
+def numero_com_digito(base):
+    """Formata a base no padrão da conta, com o dígito verificador: '123456-7'."""
+    check = (10 - luhn_checksum(base * 10)) % 10
+    return f"{base}-{check}"
+
+
+class PermutacaoNumeros:
+    """
+    Bijeção entre a posição na sequência e a base do número da conta.
+    As posições 0..899999 viram bases de 6 dígitos embaralhadas; esgotadas essas,
+    as seguintes viram bases de 7 dígitos, e assim por diante. Dentro de cada faixa
+    de dígitos, uma rede de Feistel com "cycle walking" embaralha as posições.
+    """
+
+    def __init__(self, chave):
+        semente = hashlib.sha256(chave.encode()).digest()
+        self._chaves = [int.from_bytes(semente[i * 4:(i + 1) * 4], 'big') for i in range(RODADAS_FEISTEL)]
+        self._faixas = {}
+
+    def _faixa(self, digitos):
+        if digitos not in self._faixas:
+            tamanho = 9 * 10 ** (digitos - 1)
+            bits = tamanho.bit_length() + tamanho.bit_length() % 2
+            self._faixas[digitos] = (tamanho, bits // 2, (1 << (bits // 2)) - 1)
+        return self._faixas[digitos]
+
+    def _feistel(self, valor, meio, mascara):
+        esquerda, direita = valor >> meio, valor & mascara
+        for chave in self._chaves:
+            mistura = ((direita ^ chave) * 0x45D9F3B) & 0xFFFFFFFF
+            mistura ^= mistura >> 16
+            esquerda, direita = direita, esquerda ^ (mistura & mascara)
+        return (esquerda << meio) | direita
+
+    def base(self, posicao):
+        digitos = DIGITOS_INICIAIS
+        tamanho, meio, mascara = self._faixa(digitos)
+        while posicao >= tamanho:
+            posicao -= tamanho
+            digitos += 1
+            tamanho, meio, mascara = self._faixa(digitos)
+        valor = self._feistel(posicao, meio, mascara)
+        while valor >= tamanho:  # cycle walking: volta para dentro da faixa
+            valor = self._feistel(valor, meio, mascara)
+        return 10 ** (digitos - 1) + valor
+
+
+class AlocadorNumeroConta:
+    """
+    Entrega números de conta a partir de blocos reservados na tabela sequencia_numero.
+    Com `verificar_existentes`, cada bloco novo é conferido contra as contas já
+    cadastradas (uma consulta por bloco), descartando números sorteados pelo
+    gerador antigo que coincidam com a permutação.
+    """
+
+    def __init__(self, chave, tamanho_bloco=1000, nome_sequencia='conta', verificar_existentes=True):
+        self.permutacao = PermutacaoNumeros(chave)
+        self.tamanho_bloco = tamanho_bloco
+        self.nome_sequencia = nome_sequencia
+        self.verificar_existentes = verificar_existentes
+        self.blocos_reservados = 0
+        self._disponiveis = deque()
+        self._lock = threading.Lock()
+
+    def _reservar_bloco(self, tamanho):
+        # A sequência começa em 1; a permutação usa posições a partir de 0.
+        numeros = [numero_com_digito(self.permutacao.base(posicao - 1))
+                   for posicao in reservar_faixa(self.nome_sequencia, tamanho)]
+        if self.verificar_existentes:
+            with db.engine.connect() as conexao:
+                existentes = set(conexao.execute(
+                    select(Conta.numero_conta).where(Conta.numero_conta.in_(numeros))).scalars())
+            numeros = [numero for numero in numeros if numero not in existentes]
+        self.blocos_reservados += 1
+        self._disponiveis.extend(numeros)
+
+    def proximos(self, quantidade):
+        with self._lock:
+            while len(self._disponiveis) < quantidade:
+                self._reservar_bloco(max(self.tamanho_bloco, quantidade - len(self._disponiveis)))
+            return [self._disponiveis.popleft() for _ in range(quantidade)]
+
+
+_alocador = None
+_alocador_lock = threading.Lock()
+
+
+def _obter_alocador():
+    global _alocador
+    with _alocador_lock:
+        if _alocador is None:
+            config = current_app.config
+            _alocador = AlocadorNumeroConta(config['NUMERO_CONTA_CHAVE'], config['NUMERO_CONTA_BLOCO'])
+        return _alocador
+
+
+def reservar_numeros_conta(quantidade):
+    """Entrega `quantidade` números de conta inéditos, sem consultar o banco a cada número."""
+    return _obter_alocador().proximos(quantidade)
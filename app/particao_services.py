@@ -0,0 +1,107 @@
+# Este módulo mantém as partições mensais (RANGE COLUMNS em data_hora) das tabelas
+# transacao e auditoria. Cada mês fica na partição pAAAAMM; a partição pmax
+# (MAXVALUE) recebe o que cair além da última partição criada e deve ficar vazia.
+# Partições antigas podem ser arquivadas (trocadas por uma tabela comum
+# <tabela>_arquivo_AAAAMM com EXCHANGE PARTITION, sem copiar linhas) ou descartadas.
+
+from datetime import date
+
+from sqlalchemy import text
+
+from app.models import db
+
+TABELAS_PARTICIONADAS = ('transacao', 'auditoria')
+PARTICAO_MAXIMA = 'pmax'
+
+
+def mes_seguinte(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def nome_particao(mes):
+    return f"p{mes:%Y%m}"
+
+
+def mes_da_particao(nome):
+    return date(int(nome[1:5]), int(nome[5:7]), 1)
+
+
+def particoes(tabela):
+    """Partições mensais da tabela (nomes pAAAAMM, em ordem), sem a pmax."""
+    nomes = db.session.execute(text("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabela AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """), {'tabela': tabela}).scalars()
+    return [nome for nome in nomes if nome != PARTICAO_MAXIMA]
+
+
+def criar_particoes_futuras(tabela, ate_mes):
+    """
+    Cria as partições mensais que faltam até `ate_mes` (inclusive), dividindo a pmax.
+    Com a pmax vazia o REORGANIZE não move linhas. Retorna os nomes criados.
+    """
+    existentes = particoes(tabela)
+    if not existentes:
+        raise ValueError(f"A tabela {tabela} não está particionada.")
+    mes = mes_seguinte(mes_da_particao(existentes[-1]))
+    novas = []
+    while mes <= ate_mes:
+        novas.append((nome_particao(mes), mes_seguinte(mes)))
+        mes = mes_seguinte(mes)
+    if novas:
+        definicoes = ", ".join(f"PARTITION {nome} VALUES LESS THAN ('{limite:%Y-%m-%d}')" for nome, limite in novas)
+        db.session.execute(text(
+            f"ALTER TABLE {tabela} REORGANIZE PARTITION {PARTICAO_MAXIMA} INTO "
+            f"({definicoes}, PARTITION {PARTICAO_MAXIMA} VALUES LESS THAN (MAXVALUE))"))
+    return [nome for nome, _ in novas]
+
+
+def _particionada(tabela):
+    return db.session.execute(text("""
+        SELECT 1 FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabela AND PARTITION_NAME IS NOT NULL LIMIT 1
+    """), {'tabela': tabela}).scalar() is not None
+
+
+def _tem_linhas(tabela, particao=None):
+    origem = f"{tabela} PARTITION ({particao})" if particao else tabela
+    return db.session.execute(text(f"SELECT 1 FROM {origem} LIMIT 1")).scalar() is not None
+
+
+def _arquivar_particao(tabela, nome):
+    """
+    Troca a partição pela tabela <tabela>_arquivo_AAAAMM. Pode ser repetida depois de
+    uma falha no meio: a tabela de arquivo só é criada (e despartida) se preciso, e o
+    EXCHANGE não é refeito se as linhas já estiverem no arquivo (refazê-lo as devolveria
+    à partição).
+    """
+    arquivo = f"{tabela}_arquivo_{nome[1:]}"
+    db.session.execute(text(f"CREATE TABLE IF NOT EXISTS {arquivo} LIKE {tabela}"))
+    if _particionada(arquivo):
+        db.session.execute(text(f"ALTER TABLE {arquivo} REMOVE PARTITIONING"))
+    if not _tem_linhas(arquivo):
+        db.session.execute(text(f"ALTER TABLE {tabela} EXCHANGE PARTITION {nome} WITH TABLE {arquivo}"))
+    elif _tem_linhas(tabela, nome):
+        raise ValueError(f"A partição {nome} e a tabela {arquivo} têm linhas; confira antes de arquivar de novo.")
+
+
+def retirar_particoes_antigas(tabela, antes_de, arquivar=True):
+    """
+    Retira as partições de meses anteriores a `antes_de`. Com `arquivar`, as linhas de
+    cada partição vão para a tabela <tabela>_arquivo_AAAAMM (EXCHANGE PARTITION troca
+    os arquivos de dados, sem copiar linhas) antes de a partição vazia ser removida;
+    sem `arquivar`, as linhas são apagadas com a partição. Retorna os nomes retirados.
+    A partição mensal mais recente nunca é retirada, para a tabela não ficar só com a pmax.
+    No MySQL cada ALTER TABLE confirma a transação por conta própria; se o comando
+    parar no meio, basta rodá-lo de novo.
+    """
+    retiradas = []
+    for nome in particoes(tabela)[:-1]:
+        if mes_da_particao(nome) >= antes_de:
+            break
+        if arquivar:
+            _arquivar_particao(tabela, nome)
+        db.session.execute(text(f"ALTER TABLE {tabela} DROP PARTITION {nome}"))
+        retiradas.append(nome)
+    return retiradas
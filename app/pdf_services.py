@@ -0,0 +1,61 @@
+# Este módulo gera os extratos em PDF no servidor, fora das threads de requisição.
+
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TempoEsgotado
+
+from cachetools import LRUCache
+from flask import current_app
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _renderizar_pdf(html, css):
+    """Executada no processo do pool: converte o HTML já renderizado em PDF."""
+    from weasyprint import HTML, CSS
+    return HTML(string=html).write_pdf(stylesheets=[CSS(string=css)])
+
+
+def _obter_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # 'spawn' evita herdar conexões do banco e threads do processo web.
+            _executor = ProcessPoolExecutor(max_workers=current_app.config['PDF_PROCESSOS'],
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _obter_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LRUCache(maxsize=current_app.config['PDF_CACHE_MAX_BYTES'], getsizeof=len)
+        return _cache
+
+
+def obter_pdf_em_cache(chave):
+    cache = _obter_cache()
+    with _cache_lock:
+        return cache.get(chave)
+
+
+def gerar_pdf(chave, html, css):
+    """
+    Renderiza o PDF no pool de processos e guarda o resultado no cache.
+    A chave deve identificar o conteúdo do extrato (conta, período e última transação).
+    Lança concurrent.futures.TimeoutError se passar de PDF_TIMEOUT_SEGUNDOS.
+    """
+    futuro = _obter_executor().submit(_renderizar_pdf, html, css)
+    try:
+        pdf = futuro.result(timeout=current_app.config['PDF_TIMEOUT_SEGUNDOS'])
+    except TempoEsgotado:
+        futuro.cancel()  # se ainda estiver na fila, não ocupa o pool à toa
+        raise
+    cache = _obter_cache()
+    with _cache_lock:
+        cache[chave] = pdf
+    return pdf
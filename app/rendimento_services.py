@@ -0,0 +1,75 @@
+# Este módulo credita os rendimentos de poupança e investimento em lote.
+# Cada faixa de id_conta é processada com poucas instruções SQL (INSERT ... SELECT
+# e UPDATE com JOIN), sem carregar contas no ORM. O período a render vai de
+# ultimo_rendimento (ou da abertura da conta) até a data de referência, então
+# rodar o job de novo no mesmo dia não credita nada duas vezes.
+
+from sqlalchemy import text
+
+from app.models import db
+
+# tipo_conta -> (tabela, coluna de id, coluna da taxa anual, descrição da transação)
+# As taxas são gravadas em percentual ao ano (6.50 = 6,5% a.a.), como no formulário
+# de abertura de conta; Numeric(5, 2) não guardaria frações como 0.065.
+PRODUTOS_RENDIMENTO = {
+    'Poupanca': ('conta_poupanca', 'id_conta_poupanca', 'taxa_rendimento', 'Rendimento da poupança'),
+    'Investimento': ('conta_investimento', 'id_conta_investimento', 'taxa_rendimento_base', 'Rendimento do investimento'),
+}
+
+_VALOR = "ROUND(c.saldo * s.{taxa} / 100 * DATEDIFF(:referencia, COALESCE(s.ultimo_rendimento, c.data_abertura)) / 365, 2)"
+
+_ELEGIVEIS = """
+    FROM conta c JOIN {tabela} s ON s.{id} = c.id_conta
+    WHERE c.id_conta BETWEEN :id_inicial AND :id_final
+      AND c.status = 'Ativa' AND c.saldo > 0
+      AND {valor} > 0
+"""
+
+
+def _sqls(tipo_conta):
+    tabela, coluna_id, taxa, descricao = PRODUTOS_RENDIMENTO[tipo_conta]
+    valor = _VALOR.format(taxa=taxa)
+    elegiveis = _ELEGIVEIS.format(tabela=tabela, id=coluna_id, valor=valor)
+    # Depois do INSERT, as transações desta execução são a fonte dos valores creditados.
+    rendimentos_da_execucao = f"""
+        JOIN {tabela} s ON s.{coluna_id} = c.id_conta
+        JOIN transacao t ON t.id_conta_destino = c.id_conta
+             AND t.tipo_transacao = 'Rendimento' AND t.data_hora = :agora
+    """
+    faixa = "WHERE c.id_conta BETWEEN :id_inicial AND :id_final"
+
+    travar = text(f"SELECT c.id_conta {elegiveis} FOR UPDATE")
+    inserir_transacoes = text(f"""
+        INSERT INTO transacao (tipo_transacao, valor, data_hora, descricao, id_conta_destino)
+        SELECT 'Rendimento', {valor}, :agora, '{descricao}', c.id_conta {elegiveis}
+    """)
+    atualizar_saldos = text(f"UPDATE conta c {rendimentos_da_execucao} SET c.saldo = c.saldo + t.valor, c.versao_painel = c.versao_painel + 1 {faixa}")
+    atualizar_ultimo_rendimento = text(f"UPDATE conta c {rendimentos_da_execucao} SET s.ultimo_rendimento = :referencia {faixa}")
+    # Lança os créditos em saldo_diario (a conta já está com o saldo novo).
+    atualizar_saldo_diario = text(f"""
+        INSERT INTO saldo_diario (id_conta, data, saldo_abertura, saldo_fechamento, creditos, debitos)
+        SELECT * FROM (
+            SELECT c.id_conta, DATE(:agora) AS data, c.saldo - t.valor AS saldo_abertura,
+                   c.saldo AS saldo_fechamento, t.valor AS creditos, 0 AS debitos
+            FROM conta c {rendimentos_da_execucao} {faixa}
+        ) AS novo
+        ON DUPLICATE KEY UPDATE saldo_fechamento = novo.saldo_fechamento,
+                                creditos = saldo_diario.creditos + novo.creditos
+    """)
+    return travar, inserir_transacoes, atualizar_saldos, atualizar_ultimo_rendimento, atualizar_saldo_diario
+
+
+def aplicar_rendimentos(tipo_conta, id_inicial, id_final, referencia, agora):
+    """
+    Credita o rendimento das contas `tipo_conta` da faixa de ids. Retorna quantas
+    contas renderam. Não faz commit: cada faixa é uma transação de quem chama.
+    `agora` deve estar sem microssegundos (a coluna data_hora guarda segundos),
+    pois é por ele que as transações recém-inseridas são encontradas.
+    """
+    params = {'id_inicial': id_inicial, 'id_final': id_final, 'referencia': referencia, 'agora': agora}
+    travar, inserir_transacoes, *atualizacoes = _sqls(tipo_conta)
+    db.session.execute(travar, params)
+    contas = db.session.execute(inserir_transacoes, params).rowcount
+    for sql in atualizacoes:
+        db.session.execute(sql, params)
+    return contas
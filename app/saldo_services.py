@@ -0,0 +1,82 @@
+# Este módulo mantém a tabela saldo_diario (foto diária do saldo de cada conta).
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.mysql import insert
+
+from app.models import db, SaldoDiario
+
+# Reconstrói os saldos diários de um intervalo de contas a partir das transações,
+# ancorando no saldo atual da conta e voltando no tempo com funções de janela.
+# Soma transacao.valor: toda quantia debitada ou creditada (inclusive taxas, que são
+# transações próprias) precisa estar numa transação para bater com registrar_movimento.
+SQL_RECONSTRUIR_SALDOS = text("""
+    INSERT INTO saldo_diario (id_conta, data, creditos, debitos, saldo_abertura, saldo_fechamento)
+    SELECT d.id_conta, d.data, d.creditos, d.debitos,
+           c.saldo - SUM(d.creditos - d.debitos) OVER w_ate_hoje,
+           c.saldo - COALESCE(SUM(d.creditos - d.debitos) OVER w_posteriores, 0)
+    FROM (
+        SELECT m.id_conta, m.data, SUM(m.credito) AS creditos, SUM(m.debito) AS debitos
+        FROM (
+            SELECT id_conta_destino AS id_conta, DATE(data_hora) AS data, valor AS credito, 0 AS debito
+            FROM transacao WHERE id_conta_destino BETWEEN :id_inicial AND :id_final
+            UNION ALL
+            SELECT id_conta_origem, DATE(data_hora), 0, valor
+            FROM transacao WHERE id_conta_origem BETWEEN :id_inicial AND :id_final
+        ) m
+        GROUP BY m.id_conta, m.data
+    ) d
+    JOIN conta c ON c.id_conta = d.id_conta
+    WINDOW w_ate_hoje AS (PARTITION BY d.id_conta ORDER BY d.data DESC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW),
+           w_posteriores AS (PARTITION BY d.id_conta ORDER BY d.data DESC ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+""")
+
+
+def registrar_movimento(id_conta, saldo_final, credito=Decimal('0'), debito=Decimal('0'), data=None):
+    """
+    Atualiza a foto do dia da conta dentro da transação corrente (não faz commit).
+    saldo_final é o saldo da conta já com o movimento aplicado.
+    """
+    data = data or datetime.now(timezone.utc).date()
+    stmt = insert(SaldoDiario).values(
+        id_conta=id_conta, data=data,
+        saldo_abertura=saldo_final - credito + debito, saldo_fechamento=saldo_final,
+        creditos=credito, debitos=debito,
+    )
+    stmt = stmt.on_duplicate_key_update(
+        saldo_fechamento=stmt.inserted.saldo_fechamento,
+        creditos=SaldoDiario.creditos + stmt.inserted.creditos,
+        debitos=SaldoDiario.debitos + stmt.inserted.debitos,
+    )
+    db.session.execute(stmt)
+
+
+def reconstruir_saldos(id_inicial, id_final):
+    """Apaga e recalcula em lote as fotos diárias das contas do intervalo. Não faz commit."""
+    db.session.execute(SaldoDiario.__table__.delete().where(SaldoDiario.id_conta.between(id_inicial, id_final)))
+    return db.session.execute(SQL_RECONSTRUIR_SALDOS, {'id_inicial': id_inicial, 'id_final': id_final}).rowcount
+
+
+def resumo_periodo(id_conta, inicio=None, fim=None):
+    """
+    Totais do período lidos das fotos diárias, em O(dias): saldo de abertura do
+    primeiro dia com movimento, saldo de fechamento do último, créditos e débitos.
+    Retorna None se não houver movimento no período.
+    """
+    filtros = [SaldoDiario.id_conta == id_conta]
+    if inicio: filtros.append(SaldoDiario.data >= inicio.date())
+    if fim: filtros.append(SaldoDiario.data <= fim.date())
+
+    totais = db.session.execute(
+        select(func.min(SaldoDiario.data), func.max(SaldoDiario.data),
+               func.sum(SaldoDiario.creditos), func.sum(SaldoDiario.debitos)).where(*filtros)
+    ).one()
+    primeiro_dia, ultimo_dia, creditos, debitos = totais
+    if primeiro_dia is None:
+        return None
+
+    abertura = db.session.get(SaldoDiario, (id_conta, primeiro_dia)).saldo_abertura
+    fechamento = db.session.get(SaldoDiario, (id_conta, ultimo_dia)).saldo_fechamento
+    return {'saldo_abertura': abertura, 'saldo_fechamento': fechamento, 'creditos': creditos, 'debitos': debitos}
@@ -0,0 +1,138 @@
+# Este módulo gera e confere os hashes de senha fora das threads de requisição.
+# As funções de derivação de chave (scrypt, pbkdf2) são lentas de propósito; aqui elas
+# rodam num pool de processos com fila limitada, e o custo de cada algoritmo é
+# configurável. No login, hashes gravados com parâmetros antigos são refeitos.
+
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TempoEsgotado
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+MENSAGEM_OCUPADO = "O sistema está ocupado no momento. Tente novamente em instantes."
+
+
+class FilaSenhasCheia(Exception):
+    """O pool de senhas está com a fila cheia; a operação deve ser tentada de novo."""
+
+
+# Falhas passageiras do pool: fila cheia ou operação que passou de SENHA_TIMEOUT_SEGUNDOS.
+# Quem chama deve tratá-las como "tente novamente", não como senha incorreta.
+SENHAS_INDISPONIVEIS = (FilaSenhasCheia, TempoEsgotado)
+
+
+def metodo_configurado(config):
+    """Método no formato do werkzeug (ex.: 'scrypt:32768:8:1') a partir do algoritmo e do custo configurados."""
+    algoritmo = config['SENHA_ALGORITMO']
+    if algoritmo == 'scrypt':
+        return f"scrypt:{config['SENHA_CUSTO_SCRYPT']}"
+    if algoritmo == 'pbkdf2':
+        return f"pbkdf2:sha256:{config['SENHA_CUSTO_PBKDF2']}"
+    raise ValueError(f"Algoritmo de senha desconhecido: {algoritmo}")
+
+
+def _gerar_hashes(senhas, metodo):
+    """Executada no processo do pool."""
+    return [generate_password_hash(senha, method=metodo) for senha in senhas]
+
+
+class ServicoSenhas:
+    """
+    Pool de processos para as operações de senha. A fila é limitada: se já houver
+    `fila_maxima` operações pendentes, a próxima espera até `espera_fila` segundos
+    por uma vaga e depois desiste com FilaSenhasCheia, em vez de acumular requisições.
+    Com `processos=0` tudo roda na própria thread (desenvolvimento).
+    """
+
+    def __init__(self, metodo, processos, fila_maxima, espera_fila, timeout):
+        self.metodo = metodo
+        self.processos = processos
+        self.espera_fila = espera_fila
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(fila_maxima)
+        self._executor = None
+        if processos:
+            # 'spawn' evita herdar conexões do banco e threads do processo web.
+            self._executor = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+
+    def _executar(self, funcao, *args):
+        if self._executor is None:
+            return funcao(*args)
+        if not self._vagas.acquire(timeout=self.espera_fila):
+            raise FilaSenhasCheia(MENSAGEM_OCUPADO)
+        try:
+            futuro = self._executor.submit(funcao, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro.result(timeout=self.timeout)
+
+    def gerar_hash(self, senha):
+        return self._executar(generate_password_hash, senha, self.metodo)
+
+    def gerar_hashes(self, senhas, tamanho_tarefa=50):
+        """Gera vários hashes (importação em lote), em tarefas de `tamanho_tarefa` senhas."""
+        senhas = list(senhas)
+        if self._executor is None:
+            return _gerar_hashes(senhas, self.metodo)
+        futuros = []
+        for inicio in range(0, len(senhas), tamanho_tarefa):
+            if not self._vagas.acquire(timeout=self.espera_fila):
+                raise FilaSenhasCheia(MENSAGEM_OCUPADO)
+            futuro = self._executor.submit(_gerar_hashes, senhas[inicio:inicio + tamanho_tarefa], self.metodo)
+            futuro.add_done_callback(lambda _: self._vagas.release())
+            futuros.append(futuro)
+        return [senha_hash for futuro in futuros for senha_hash in futuro.result(timeout=self.timeout)]
+
+    def verificar(self, senha_hash, senha):
+        return self._executar(check_password_hash, senha_hash, senha)
+
+    def encerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def precisa_rehash(self, senha_hash):
+        """True se o hash foi gravado com outro algoritmo ou outros parâmetros de custo."""
+        return senha_hash.split('$', 1)[0] != self.metodo
+
+
+_servico = None
+_servico_lock = threading.Lock()
+
+
+def _obter_servico():
+    global _servico
+    with _servico_lock:
+        if _servico is None:
+            config = current_app.config
+            _servico = ServicoSenhas(metodo_configurado(config), config['SENHA_PROCESSOS'], config['SENHA_FILA_MAXIMA'],
+                                     config['SENHA_ESPERA_FILA_SEGUNDOS'], config['SENHA_TIMEOUT_SEGUNDOS'])
+        return _servico
+
+
+def gerar_hash_senha(senha):
+    return _obter_servico().gerar_hash(senha)
+
+
+def gerar_hashes_senha(senhas):
+    return _obter_servico().gerar_hashes(senhas)
+
+
+def verificar_senha(senha_hash, senha):
+    return _obter_servico().verificar(senha_hash, senha)
+
+
+def verificar_e_atualizar_senha(usuario, senha):
+    """
+    Confere a senha do usuário. Se estiver correta mas o hash usar parâmetros
+    desatualizados, grava um hash novo em usuario.senha_hash (o commit fica com quem chamou).
+    """
+    servico = _obter_servico()
+    if not servico.verificar(usuario.senha_hash, senha):
+        return False
+    if servico.precisa_rehash(usuario.senha_hash):
+        usuario.senha_hash = servico.gerar_hash(senha)
+    return True
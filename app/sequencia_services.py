@@ -0,0 +1,33 @@
+# Este módulo reserva faixas das sequências guardadas na tabela sequencia_numero
+# (números de conta, matrículas de funcionário). Cada reserva é um único comando
+# atômico, em transação própria, então pedidos concorrentes nunca recebem o mesmo valor.
+
+from sqlalchemy import text
+
+from app.models import db
+
+# LAST_INSERT_ID(expr) devolve o novo valor na mesma conexão; a linha da sequência
+# fica travada só durante este comando.
+SQL_RESERVAR_FAIXA = text("""
+    INSERT INTO sequencia_numero (nome, proximo) VALUES (:nome, LAST_INSERT_ID(:tamanho))
+    ON DUPLICATE KEY UPDATE proximo = LAST_INSERT_ID(proximo + :tamanho)
+""")
+
+SEQUENCIA_FUNCIONARIO = 'funcionario'
+
+
+def reservar_faixa(nome_sequencia, tamanho=1):
+    """
+    Reserva `tamanho` valores da sequência e devolve o range reservado.
+    A reserva é confirmada na hora: valores de uma operação desfeita depois
+    viram lacunas, nunca duplicatas.
+    """
+    with db.engine.begin() as conexao:
+        conexao.execute(SQL_RESERVAR_FAIXA, {'nome': nome_sequencia, 'tamanho': tamanho})
+        fim = conexao.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+    return range(fim - tamanho + 1, fim + 1)
+
+
+def reservar_codigos_funcionario(quantidade=1):
+    """Matrículas inéditas no formato FUNC001, com um único acesso ao banco por chamada."""
+    return [f"FUNC{valor:03d}" for valor in reservar_faixa(SEQUENCIA_FUNCIONARIO, quantidade)]
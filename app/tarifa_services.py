@@ -0,0 +1,93 @@
+# Este módulo cobra a tarifa mensal de manutenção das contas correntes em lote.
+# A tabela cobranca_tarifa é o registro das cobranças por conta e competência
+# (AAAA-MM): uma conta que já consta nela não é cobrada de novo no mesmo mês,
+# então o job pode ser interrompido e executado novamente com segurança.
+# Como no débito feito pelas rotas (movimentacao_services.debitar), a tarifa só é
+# cobrada se couber no saldo mais o cheque especial; as contas sem fundos ficam
+# sem cobrança e entram numa nova execução do job no mesmo mês, se tiverem saldo.
+
+from sqlalchemy import text
+
+from app.models import db
+
+_PENDENTES = """
+    FROM conta c JOIN conta_corrente cc ON cc.id_conta_corrente = c.id_conta
+    WHERE c.id_conta BETWEEN :id_inicial AND :id_final
+      AND c.status = 'Ativa' AND cc.taxa_manutencao > 0
+      AND c.saldo + cc.limite_cheque_especial >= cc.taxa_manutencao
+      AND NOT EXISTS (SELECT 1 FROM cobranca_tarifa ct
+                      WHERE ct.id_conta = c.id_conta AND ct.competencia = :competencia)
+"""
+
+# As cobranças inseridas nesta execução são a fonte dos valores debitados.
+_COBRANCAS_DA_EXECUCAO = """
+    JOIN cobranca_tarifa ct ON ct.id_conta = c.id_conta
+         AND ct.competencia = :competencia AND ct.data_hora = :agora
+"""
+_FAIXA = "WHERE c.id_conta BETWEEN :id_inicial AND :id_final"
+
+# Contas que ficariam na cobrança se tivessem fundos: entram no relatório do job.
+SQL_SEM_FUNDOS = text("""
+    SELECT c.id_conta FROM conta c JOIN conta_corrente cc ON cc.id_conta_corrente = c.id_conta
+    WHERE c.id_conta BETWEEN :id_inicial AND :id_final
+      AND c.status = 'Ativa' AND cc.taxa_manutencao > 0
+      AND c.saldo + cc.limite_cheque_especial < cc.taxa_manutencao
+      AND NOT EXISTS (SELECT 1 FROM cobranca_tarifa ct
+                      WHERE ct.id_conta = c.id_conta AND ct.competencia = :competencia)
+    ORDER BY c.id_conta
+""")
+
+SQL_TRAVAR = text(f"SELECT c.id_conta {_PENDENTES} FOR UPDATE")
+
+SQL_REGISTRAR_COBRANCAS = text(f"""
+    INSERT INTO cobranca_tarifa (id_conta, competencia, valor, data_hora)
+    SELECT c.id_conta, :competencia, cc.taxa_manutencao, :agora {_PENDENTES}
+""")
+
+SQL_INSERIR_TRANSACOES = text(f"""
+    INSERT INTO transacao (tipo_transacao, valor, data_hora, descricao, id_conta_origem)
+    SELECT 'Pagamento', ct.valor, :agora, :descricao, c.id_conta
+    FROM conta c {_COBRANCAS_DA_EXECUCAO} {_FAIXA}
+""")
+
+SQL_DEBITAR_CONTAS = text(f"UPDATE conta c {_COBRANCAS_DA_EXECUCAO} SET c.saldo = c.saldo - ct.valor, c.versao_painel = c.versao_painel + 1 {_FAIXA}")
+
+SQL_SALDO_DIARIO = text(f"""
+    INSERT INTO saldo_diario (id_conta, data, saldo_abertura, saldo_fechamento, creditos, debitos)
+    SELECT * FROM (
+        SELECT c.id_conta, DATE(:agora) AS data, c.saldo + ct.valor AS saldo_abertura,
+               c.saldo AS saldo_fechamento, 0 AS creditos, ct.valor AS debitos
+        FROM conta c {_COBRANCAS_DA_EXECUCAO} {_FAIXA}
+    ) AS novo
+    ON DUPLICATE KEY UPDATE saldo_fechamento = novo.saldo_fechamento,
+                            debitos = saldo_diario.debitos + novo.debitos
+""")
+
+
+def cobrar_tarifas(competencia, id_inicial, id_final, agora):
+    """
+    Cobra a tarifa de manutenção das contas correntes ativas da faixa de ids que
+    ainda não pagaram a competência e têm saldo (com o cheque especial) para a tarifa.
+    Retorna quantas contas foram cobradas.
+    Não faz commit: cada faixa é uma transação de quem chama. `agora` deve estar
+    sem microssegundos, pois identifica as cobranças desta execução.
+    """
+    ano, mes = competencia.split('-')
+    params = {'competencia': competencia, 'id_inicial': id_inicial, 'id_final': id_final,
+              'agora': agora, 'descricao': f'Tarifa de manutenção {mes}/{ano}'}
+    db.session.execute(SQL_TRAVAR, params)
+    contas = db.session.execute(SQL_REGISTRAR_COBRANCAS, params).rowcount
+    if contas:
+        db.session.execute(SQL_INSERIR_TRANSACOES, params)
+        db.session.execute(SQL_DEBITAR_CONTAS, params)
+        db.session.execute(SQL_SALDO_DIARIO, params)
+    return contas
+
+
+def contas_sem_fundos(competencia, id_inicial, id_final):
+    """
+    Lista os ids das contas correntes ativas da faixa que ainda não pagaram a
+    competência por não terem saldo (com o cheque especial) para a tarifa.
+    """
+    params = {'competencia': competencia, 'id_inicial': id_inicial, 'id_final': id_final}
+    return list(db.session.execute(SQL_SEM_FUNDOS, params).scalars())
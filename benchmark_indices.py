@@ -0,0 +1,92 @@
+"""
+Compara os planos (EXPLAIN) e o tempo das consultas mais frequentes em transacao
+com e sem os índices compostos. O "antes" é simulado com IGNORE INDEX, então o
+script pode rodar num banco que já tem a migração aplicada.
+
+Uso: python benchmark_indices.py [id_conta] [repeticoes]
+"""
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app import create_app, db
+
+app = create_app()
+
+INDICES_NOVOS = ('idx_transacao_origem_data, idx_transacao_destino_data, '
+                 'idx_transacao_origem_tipo_data, idx_transacao_destino_tipo_data')
+
+CONSULTAS = {
+    'Limite diário de depósito (deposito)': """
+        SELECT SUM(valor) FROM transacao {dica}
+        WHERE id_conta_destino = :id_conta AND tipo_transacao = 'Deposito' AND data_hora >= :inicio_24h
+    """,
+    'Saques do mês (saque)': """
+        SELECT COUNT(*) FROM transacao {dica}
+        WHERE id_conta_origem = :id_conta AND tipo_transacao = 'Saque' AND data_hora >= :inicio_mes
+    """,
+    'Extrato, lado de origem': """
+        SELECT id_transacao FROM transacao {dica}
+        WHERE id_conta_origem = :id_conta ORDER BY data_hora DESC, id_transacao DESC LIMIT 50
+    """,
+    'Extrato, lado de destino': """
+        SELECT id_transacao FROM transacao {dica}
+        WHERE id_conta_destino = :id_conta ORDER BY data_hora DESC, id_transacao DESC LIMIT 50
+    """,
+}
+
+
+def conta_mais_movimentada():
+    return db.session.execute(text(
+        "SELECT id_conta_destino FROM transacao WHERE id_conta_destino IS NOT NULL "
+        "GROUP BY id_conta_destino ORDER BY COUNT(*) DESC LIMIT 1"
+    )).scalar()
+
+
+def medir(sql, params, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        db.session.execute(text(sql), params).all()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def imprimir_plano(sql, params):
+    resultado = db.session.execute(text(f"EXPLAIN {sql}"), params)
+    colunas = list(resultado.keys())
+    for linha in resultado:
+        dados = dict(zip(colunas, linha))
+        print(f"      type={dados['type']} key={dados['key']} rows={dados['rows']} extra={dados['Extra']}")
+
+
+def executar_benchmark():
+    with app.app_context():
+        id_conta = int(sys.argv[1]) if len(sys.argv) > 1 else conta_mais_movimentada()
+        repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        if id_conta is None:
+            print("Nenhuma transação encontrada. Popule o banco antes de rodar o benchmark.")
+            return
+
+        agora = datetime.now(timezone.utc)
+        params = {
+            'id_conta': id_conta,
+            'inicio_24h': agora - timedelta(hours=24),
+            'inicio_mes': agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        }
+        print(f"Conta {id_conta}, {repeticoes} repetições por consulta.\n")
+
+        for nome, modelo in CONSULTAS.items():
+            antes = modelo.format(dica=f'IGNORE INDEX ({INDICES_NOVOS})')
+            depois = modelo.format(dica='')
+            print(nome)
+            print("   Antes (sem os índices compostos):")
+            imprimir_plano(antes, params)
+            print(f"      tempo médio: {medir(antes, params, repeticoes):.2f} ms")
+            print("   Depois:")
+            imprimir_plano(depois, params)
+            print(f"      tempo médio: {medir(depois, params, repeticoes):.2f} ms\n")
+
+
+if __name__ == '__main__':
+    executar_benchmark()
@@ -0,0 +1,50 @@
+"""
+Mede a alocação de números de conta em blocos: quantos números por segundo e
+quantas idas ao banco. Usa uma sequência própria ('benchmark'), reiniciada a cada
+execução, então não consome os números reais. Ao final confere que todos os
+números são distintos e têm o dígito verificador correto.
+
+Uso: python benchmark_numeros_conta.py [quantidade] [tamanho_bloco]
+"""
+import sys
+import time
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.numero_conta_services import AlocadorNumeroConta, luhn_checksum
+
+app = create_app()
+
+SEQUENCIA = 'benchmark'
+
+
+def executar_benchmark():
+    with app.app_context():
+        quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+        tamanho_bloco = int(sys.argv[2]) if len(sys.argv) > 2 else app.config['NUMERO_CONTA_BLOCO']
+
+        with db.engine.begin() as conexao:
+            conexao.execute(text("DELETE FROM sequencia_numero WHERE nome = :nome"), {'nome': SEQUENCIA})
+
+        alocador = AlocadorNumeroConta(app.config['NUMERO_CONTA_CHAVE'], tamanho_bloco,
+                                       nome_sequencia=SEQUENCIA, verificar_existentes=False)
+        print(f"Alocando {quantidade} números em blocos de {tamanho_bloco}...")
+        inicio = time.perf_counter()
+        numeros = []
+        while len(numeros) < quantidade:
+            numeros.extend(alocador.proximos(min(tamanho_bloco, quantidade - len(numeros))))
+        duracao = time.perf_counter() - inicio
+
+        print(f"   tempo: {duracao:.2f}s ({quantidade / duracao:,.0f} números/s)")
+        print(f"   blocos reservados (idas ao banco): {alocador.blocos_reservados}")
+        print(f"   exemplos: {', '.join(numeros[:5])} ... {numeros[-1]}")
+        print(f"   todos distintos: {len(set(numeros)) == len(numeros)}")
+        print(f"   dígitos verificadores válidos: {all(luhn_checksum(int(n.replace('-', ''))) == 0 for n in numeros)}")
+
+        with db.engine.begin() as conexao:
+            conexao.execute(text("DELETE FROM sequencia_numero WHERE nome = :nome"), {'nome': SEQUENCIA})
+
+
+if __name__ == '__main__':
+    executar_benchmark()
@@ -0,0 +1,53 @@
+"""
+Mede quantos logins por segundo a verificação de senha suporta com pools de
+processos de tamanhos diferentes. Simula requisições simultâneas com threads
+chamando o ServicoSenhas, como fazem as threads do servidor web. Só a verificação
+da senha é medida (o algoritmo e o custo vêm da configuração); o banco não é usado.
+
+Uso: python benchmark_senhas.py [logins] [requisicoes_simultaneas] [tamanhos_do_pool]
+Exemplo: python benchmark_senhas.py 400 32 0,1,2,4,8
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.senha_services import ServicoSenhas, metodo_configurado
+
+app = create_app()
+
+SENHA = 'senha-de-teste'
+
+
+def medir(processos, logins, simultaneas, metodo, senha_hash):
+    config = app.config
+    servico = ServicoSenhas(metodo, processos, max(simultaneas, 1), config['SENHA_ESPERA_FILA_SEGUNDOS'] * 10,
+                            config['SENHA_TIMEOUT_SEGUNDOS'])
+    servico.verificar(senha_hash, SENHA)  # sobe os processos antes de medir
+    with ThreadPoolExecutor(max_workers=simultaneas) as requisicoes:
+        inicio = time.perf_counter()
+        resultados = list(requisicoes.map(lambda _: servico.verificar(senha_hash, SENHA), range(logins)))
+        duracao = time.perf_counter() - inicio
+    servico.encerrar()
+    assert all(resultados)
+    return logins / duracao
+
+
+def executar_benchmark():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    simultaneas = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    tamanhos = [int(t) for t in sys.argv[3].split(',')] if len(sys.argv) > 3 else [0, 1, 2, 4, os.cpu_count() or 8]
+
+    metodo = metodo_configurado(app.config)
+    senha_hash = generate_password_hash(SENHA, method=metodo)
+    print(f"Método {metodo}, {logins} logins, {simultaneas} requisições simultâneas.\n")
+    for processos in tamanhos:
+        descricao = f"{processos} processo(s)" if processos else "sem pool (thread da requisição)"
+        print(f"   {descricao:<35} {medir(processos, logins, simultaneas, metodo, senha_hash):8.1f} logins/s")
+
+
+if __name__ == '__main__':
+    executar_benchmark()
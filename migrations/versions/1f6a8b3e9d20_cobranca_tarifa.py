@@ -0,0 +1,31 @@
+"""Cria a tabela cobranca_tarifa
+
+Revision ID: 1f6a8b3e9d20
+Revises: c7d94e0a1b52
+Create Date: 2026-10-18 12:41:19.770231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f6a8b3e9d20'
+down_revision = 'c7d94e0a1b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cobranca_tarifa',
+    sa.Column('id_conta', sa.Integer(), nullable=False),
+    sa.Column('competencia', sa.String(length=7), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('data_hora', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_conta'], ['conta.id_conta'], ),
+    sa.PrimaryKeyConstraint('id_conta', 'competencia')
+    )
+
+
+def downgrade():
+    op.drop_table('cobranca_tarifa')
@@ -0,0 +1,37 @@
+"""Índices compostos de transacao
+
+Revision ID: 3b8e51f7a6c9
+Revises: 1f6a8b3e9d20
+Create Date: 2026-10-18 13:52:40.226718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e51f7a6c9'
+down_revision = '1f6a8b3e9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bancos criados pelo antigo banco_db.sql já têm idx_data_hora.
+    indices = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('transacao')}
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        if 'idx_data_hora' not in indices:
+            batch_op.create_index('idx_data_hora', ['data_hora'], unique=False)
+        batch_op.create_index('idx_transacao_origem_data', ['id_conta_origem', 'data_hora'], unique=False)
+        batch_op.create_index('idx_transacao_destino_data', ['id_conta_destino', 'data_hora'], unique=False)
+        batch_op.create_index('idx_transacao_origem_tipo_data', ['id_conta_origem', 'tipo_transacao', 'data_hora'], unique=False)
+        batch_op.create_index('idx_transacao_destino_tipo_data', ['id_conta_destino', 'tipo_transacao', 'data_hora'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.drop_index('idx_transacao_destino_tipo_data')
+        batch_op.drop_index('idx_transacao_origem_tipo_data')
+        batch_op.drop_index('idx_transacao_destino_data')
+        batch_op.drop_index('idx_transacao_origem_data')
+        batch_op.drop_index('idx_data_hora')
@@ -0,0 +1,33 @@
+"""Cria a tabela saldo_diario
+
+Revision ID: 5a1f3c9d2b74
+Revises: b343127ab55f
+Create Date: 2026-10-18 09:12:31.104522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1f3c9d2b74'
+down_revision = 'b343127ab55f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('saldo_diario',
+    sa.Column('id_conta', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Date(), nullable=False),
+    sa.Column('saldo_abertura', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('saldo_fechamento', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('creditos', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('debitos', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['id_conta'], ['conta.id_conta'], ),
+    sa.PrimaryKeyConstraint('id_conta', 'data')
+    )
+
+
+def downgrade():
+    op.drop_table('saldo_diario')
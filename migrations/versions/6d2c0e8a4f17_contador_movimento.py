@@ -0,0 +1,60 @@
+"""Cria a tabela contador_movimento
+
+Revision ID: 6d2c0e8a4f17
+Revises: 3b8e51f7a6c9
+Create Date: 2026-10-18 15:02:44.318920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '6d2c0e8a4f17'
+down_revision = '3b8e51f7a6c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contador_movimento',
+    sa.Column('id_conta', sa.Integer(), nullable=False),
+    sa.Column('tipo_transacao', mysql.ENUM('Deposito', 'Saque', 'Transferencia', 'Pagamento', 'Rendimento'), nullable=False),
+    sa.Column('granularidade', mysql.ENUM('hora', 'dia', 'mes'), nullable=False),
+    sa.Column('inicio', sa.DateTime(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['id_conta'], ['conta.id_conta'], ),
+    sa.PrimaryKeyConstraint('id_conta', 'tipo_transacao', 'granularidade', 'inicio')
+    )
+    # Preenche os contadores a partir do início do mês anterior (o mesmo período
+    # padrão de `flask contadores reconstruir`), para que os limites de depósito e
+    # de saques gratuitos já valham com o histórico existente logo após o deploy.
+    op.execute("""
+        INSERT INTO contador_movimento (id_conta, tipo_transacao, granularidade, inicio, quantidade, total)
+        SELECT m.id_conta, m.tipo_transacao, f.granularidade,
+               CASE f.granularidade
+                   WHEN 'hora' THEN DATE_FORMAT(m.data_hora, '%Y-%m-%d %H:00:00')
+                   WHEN 'dia' THEN DATE_FORMAT(m.data_hora, '%Y-%m-%d 00:00:00')
+                   ELSE DATE_FORMAT(m.data_hora, '%Y-%m-01 00:00:00')
+               END AS inicio_faixa,
+               COUNT(*), SUM(m.valor)
+        FROM (
+            SELECT id_conta_destino AS id_conta, tipo_transacao, data_hora, valor
+            FROM transacao
+            WHERE tipo_transacao = 'Deposito' AND id_conta_destino IS NOT NULL
+              AND data_hora >= DATE_FORMAT(UTC_TIMESTAMP() - INTERVAL 1 MONTH, '%Y-%m-01')
+            UNION ALL
+            SELECT id_conta_origem, tipo_transacao, data_hora, valor
+            FROM transacao
+            WHERE tipo_transacao = 'Saque' AND id_conta_origem IS NOT NULL
+              AND data_hora >= DATE_FORMAT(UTC_TIMESTAMP() - INTERVAL 1 MONTH, '%Y-%m-01')
+        ) m
+        CROSS JOIN (SELECT 'hora' AS granularidade UNION ALL SELECT 'dia' UNION ALL SELECT 'mes') f
+        GROUP BY m.id_conta, m.tipo_transacao, f.granularidade, inicio_faixa
+    """)
+
+
+def downgrade():
+    op.drop_table('contador_movimento')
@@ -0,0 +1,30 @@
+"""Cria a tabela tentativa_login
+
+Revision ID: 8e2b6d41c0f3
+Revises: 5a1f3c9d2b74
+Create Date: 2026-10-18 10:03:47.582190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2b6d41c0f3'
+down_revision = '5a1f3c9d2b74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tentativa_login',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('falhas', sa.Integer(), nullable=False),
+    sa.Column('bloqueado_ate', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ),
+    sa.PrimaryKeyConstraint('id_usuario')
+    )
+
+
+def downgrade():
+    op.drop_table('tentativa_login')
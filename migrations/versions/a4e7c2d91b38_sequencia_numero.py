@@ -0,0 +1,28 @@
+"""Cria a tabela sequencia_numero
+
+Revision ID: a4e7c2d91b38
+Revises: 6d2c0e8a4f17
+Create Date: 2026-10-18 16:27:05.481233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e7c2d91b38'
+down_revision = '6d2c0e8a4f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sequencia_numero',
+    sa.Column('nome', sa.String(length=30), nullable=False),
+    sa.Column('proximo', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    op.drop_table('sequencia_numero')
@@ -0,0 +1,26 @@
+"""Versão do painel do dashboard em conta
+
+Revision ID: b8d4e2f6a913
+Revises: f3a9c1d7e508
+Create Date: 2026-10-19 10:14:05.627310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4e2f6a913'
+down_revision = 'f3a9c1d7e508'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conta', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('versao_painel', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('conta', schema=None) as batch_op:
+        batch_op.drop_column('versao_painel')
@@ -0,0 +1,26 @@
+"""Adiciona ultimo_rendimento em conta_investimento
+
+Revision ID: c7d94e0a1b52
+Revises: 8e2b6d41c0f3
+Create Date: 2026-10-18 11:26:05.318844
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d94e0a1b52'
+down_revision = '8e2b6d41c0f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conta_investimento', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ultimo_rendimento', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('conta_investimento', schema=None) as batch_op:
+        batch_op.drop_column('ultimo_rendimento')
@@ -0,0 +1,30 @@
+"""Inicia a sequência das matrículas de funcionário
+
+Revision ID: e19b5f3a7c62
+Revises: a4e7c2d91b38
+Create Date: 2026-10-18 17:10:52.906114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e19b5f3a7c62'
+down_revision = 'a4e7c2d91b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Continua a numeração a partir da maior matrícula FUNC### já cadastrada.
+    op.execute("""
+        INSERT INTO sequencia_numero (nome, proximo)
+        SELECT 'funcionario', COALESCE(MAX(CAST(SUBSTRING(codigo_funcionario, 5) AS UNSIGNED)), 0)
+        FROM funcionario
+        WHERE codigo_funcionario REGEXP '^FUNC[0-9]+$'
+    """)
+
+
+def downgrade():
+    op.execute("DELETE FROM sequencia_numero WHERE nome = 'funcionario'")
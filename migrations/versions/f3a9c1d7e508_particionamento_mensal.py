@@ -0,0 +1,79 @@
+"""Particiona transacao e auditoria por mês (RANGE COLUMNS em data_hora)
+
+Revision ID: f3a9c1d7e508
+Revises: e19b5f3a7c62
+Create Date: 2026-10-18 19:02:37.418265
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c1d7e508'
+down_revision = 'e19b5f3a7c62'
+branch_labels = None
+depends_on = None
+
+# Partições criadas à frente do mês atual; depois disso, `flask particoes criar`.
+MESES_FUTUROS = 3
+
+# O MySQL não aceita chaves estrangeiras em tabelas particionadas; no downgrade
+# elas voltam com estes nomes.
+CHAVES_ESTRANGEIRAS = {
+    'transacao': [('fk_transacao_conta_origem', 'id_conta_origem', 'conta', 'id_conta'),
+                  ('fk_transacao_conta_destino', 'id_conta_destino', 'conta', 'id_conta')],
+    'auditoria': [('fk_auditoria_usuario', 'id_usuario', 'usuario', 'id_usuario')],
+}
+CHAVE_PRIMARIA = {'transacao': 'id_transacao', 'auditoria': 'id_auditoria'}
+
+
+def _mes_seguinte(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _definicao_particoes(conexao, tabela):
+    """Uma partição por mês, do mês da linha mais antiga até MESES_FUTUROS à frente, mais a pmax."""
+    mais_antiga = conexao.execute(sa.text(f"SELECT MIN(data_hora) FROM {tabela}")).scalar()
+    mes_atual = date.today().replace(day=1)
+    mes = min(mais_antiga.date().replace(day=1), mes_atual) if mais_antiga else mes_atual
+    ultimo = mes_atual
+    for _ in range(MESES_FUTUROS):
+        ultimo = _mes_seguinte(ultimo)
+    particoes = []
+    while mes <= ultimo:
+        particoes.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN ('{_mes_seguinte(mes):%Y-%m-%d}')")
+        mes = _mes_seguinte(mes)
+    particoes.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ",\n        ".join(particoes)
+
+
+def upgrade():
+    conexao = op.get_bind()
+    for tabela, coluna_id in CHAVE_PRIMARIA.items():
+        # Os nomes das FKs criadas pela migração inicial foram gerados pelo MySQL.
+        nomes = conexao.execute(sa.text("""
+            SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = :tabela
+        """), {'tabela': tabela}).scalars().all()
+        for nome in nomes:
+            op.drop_constraint(nome, tabela, type_='foreignkey')
+
+        # Toda chave única de uma tabela particionada precisa conter a coluna de partição.
+        op.execute(f"ALTER TABLE {tabela} DROP PRIMARY KEY, ADD PRIMARY KEY ({coluna_id}, data_hora)")
+        op.execute(f"""
+            ALTER TABLE {tabela} PARTITION BY RANGE COLUMNS(data_hora) (
+                {_definicao_particoes(conexao, tabela)}
+            )
+        """)
+
+
+def downgrade():
+    for tabela, coluna_id in CHAVE_PRIMARIA.items():
+        # As linhas de partições já arquivadas continuam nas tabelas <tabela>_arquivo_AAAAMM.
+        op.execute(f"ALTER TABLE {tabela} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {tabela} DROP PRIMARY KEY, ADD PRIMARY KEY ({coluna_id})")
+        for nome, coluna, tabela_referida, coluna_referida in CHAVES_ESTRANGEIRAS[tabela]:
+            op.create_foreign_key(nome, tabela, tabela_referida, [coluna], [coluna_referida])
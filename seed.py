@@ -1,13 +1,12 @@
 from app import create_app, db
 from app.models import (Usuario, Cliente, Funcionario, Agencia, Conta, Endereco, 
                         ContaCorrente, ContaPoupanca, ContaInvestimento, HistoricoConta)
+from app.sequencia_services import reservar_codigos_funcionario
 from werkzeug.security import generate_password_hash
 from datetime import date
 from decimal import Decimal
 
-app = create_app()
-
-def seed_data():
+def seed_data(app):
     with app.app_context():
         print("Limpando dados antigos...")
         db.session.query(HistoricoConta).delete()
@@ -56,7 +55,7 @@ def seed_data():
             status='Ativa',
             id_agencia=agencia_central.id_agencia,
             id_cliente=cliente.id_cliente,
-            taxa_rendimento=Decimal('0.05')
+            taxa_rendimento=Decimal('5.00')
         )
         db.session.add(conta_poupanca)
         print(" -> Usuário 'Nathanael Cliente' e Conta Poupança '11223-3' criados.")
@@ -77,15 +76,17 @@ def seed_data():
 
         gerente = Funcionario(
             id_usuario=usuario_funcionario.id_usuario,
-            codigo_funcionario='FUNC001',
+            # A matrícula sai da mesma sequência do cadastro de funcionários,
+            # que assim nunca volta a gerar a matrícula do gerente de teste.
+            codigo_funcionario=reservar_codigos_funcionario()[0],
             cargo='Gerente'
         )
         db.session.add(gerente)
         db.session.commit()
-        print(" -> Usuário 'Nathanael Funcionário' criado.")
+        print(f" -> Usuário 'Nathanael Funcionário' criado (matrícula {gerente.codigo_funcionario}).")
 
         db.session.commit()
         print("\nBanco de dados populado com sucesso!")
 
 if __name__ == '__main__':
-    seed_data()
+    seed_data(create_app())
@@ -0,0 +1,27 @@
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+import pytest
+
+from app.auth import routes
+from app.models import db
+from app.senha_services import FilaSenhasCheia, MENSAGEM_OCUPADO
+
+from conftest import criar_usuario
+
+
+@pytest.mark.parametrize("erro", [FilaSenhasCheia(MENSAGEM_OCUPADO), TempoEsgotado()])
+def test_login_com_pool_de_senhas_indisponivel_pede_nova_tentativa(app, banco, monkeypatch, erro):
+    usuario = criar_usuario()
+    db.session.commit()
+
+    def indisponivel(usuario, senha):
+        raise erro
+
+    monkeypatch.setattr(routes, "verificar_e_atualizar_senha", indisponivel)
+    http = app.test_client()
+    resposta = http.post('/login', data={'cpf': usuario.CPF, 'senha': 'qualquer', 'tipo': 'Cliente'})
+
+    assert resposta.status_code == 302
+    with http.session_transaction() as sessao:
+        assert ('warning', MENSAGEM_OCUPADO) in sessao['_flashes']
+        assert 'id_usuario_para_verificar' not in sessao
@@ -0,0 +1,17 @@
+from app.auth_services import _enviar_com_retentativas
+
+
+class TransporteQuebrado:
+    def __init__(self):
+        self.chamadas = 0
+
+    def enviar(self, destinatario, assunto, corpo):
+        self.chamadas += 1
+        raise KeyError("credenciais")
+
+
+def test_erro_inesperado_no_envio_do_otp_e_registrado(capsys):
+    transporte = TransporteQuebrado()
+    assert _enviar_com_retentativas(transporte, "cliente@teste.local", "OTP", "corpo", 3, 0) is False
+    assert transporte.chamadas == 1
+    assert "Erro inesperado ao enviar o e-mail para cliente@teste.local" in capsys.readouterr().out
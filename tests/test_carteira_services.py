@@ -0,0 +1,68 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.carteira_services import resumo_carteira
+from app.models import db, Transacao
+
+from conftest import criar_cliente, criar_conta
+
+AGORA = datetime(2026, 3, 15, 12, 0)
+
+
+def _transacao(valor, data_hora, origem=None, destino=None):
+    db.session.add(Transacao(tipo_transacao='Transferencia' if origem and destino else 'Deposito' if destino else 'Saque',
+                             valor=Decimal(valor), data_hora=data_hora, id_conta_origem=origem, id_conta_destino=destino))
+
+
+def _por_conta(id_cliente):
+    return {linha['id_conta']: linha for linha in resumo_carteira(id_cliente, agora=AGORA)}
+
+
+def test_mes_sem_movimento(banco, agencia):
+    cliente = criar_cliente()
+    antiga = criar_conta(cliente, agencia, saldo="80")
+    nova = criar_conta(cliente, agencia, "Poupanca")
+    _transacao("80", datetime(2026, 2, 27, 9, 0), destino=antiga.id_conta)
+    db.session.commit()
+
+    contas = _por_conta(cliente.id_cliente)
+    assert [contas[antiga.id_conta][campo] for campo in ('creditos_mes', 'debitos_mes', 'saldo')] == [0, 0, Decimal("80")]
+    assert contas[antiga.id_conta]['ultima_movimentacao'] == datetime(2026, 2, 27, 9, 0)
+    assert contas[nova.id_conta]['creditos_mes'] == 0
+    assert contas[nova.id_conta]['ultima_movimentacao'] is None
+
+
+def test_transferencia_entre_contas_do_cliente_nao_conta_em_dobro(banco, agencia):
+    cliente = criar_cliente()
+    corrente = criar_conta(cliente, agencia)
+    poupanca = criar_conta(cliente, agencia, "Poupanca")
+    terceiro = criar_conta(criar_cliente(), agencia)
+    _transacao("500", datetime(2026, 3, 1, 10, 0), destino=corrente.id_conta)
+    _transacao("200", datetime(2026, 3, 2, 10, 0), origem=corrente.id_conta, destino=poupanca.id_conta)
+    _transacao("30", datetime(2026, 3, 3, 10, 0), origem=corrente.id_conta, destino=terceiro.id_conta)
+    db.session.commit()
+
+    contas = _por_conta(cliente.id_cliente)
+    assert set(contas) == {corrente.id_conta, poupanca.id_conta}
+    # Cada conta vê a transferência uma vez, do seu lado...
+    assert (contas[corrente.id_conta]['creditos_mes'], contas[corrente.id_conta]['debitos_mes']) == (500, 230)
+    assert (contas[poupanca.id_conta]['creditos_mes'], contas[poupanca.id_conta]['debitos_mes']) == (200, 0)
+    # ...mas ela não entra nos valores externos, que são os somados na carteira.
+    assert sum(c['creditos_externos_mes'] for c in contas.values()) == 500
+    assert sum(c['debitos_externos_mes'] for c in contas.values()) == 30
+
+
+def test_ultima_movimentacao_vem_da_entrada_ou_da_saida_mais_recente(banco, agencia):
+    cliente = criar_cliente()
+    entrada_recente = criar_conta(cliente, agencia)
+    saida_recente = criar_conta(cliente, agencia)
+    _transacao("10", datetime(2026, 1, 5, 8, 0), origem=entrada_recente.id_conta)
+    _transacao("10", datetime(2026, 3, 10, 8, 0), destino=entrada_recente.id_conta)
+    _transacao("10", datetime(2026, 2, 1, 8, 0), destino=saida_recente.id_conta)
+    _transacao("10", datetime(2026, 3, 12, 18, 30), origem=saida_recente.id_conta)
+    _transacao("10", datetime(2026, 3, 11, 8, 0), destino=saida_recente.id_conta)
+    db.session.commit()
+
+    contas = _por_conta(cliente.id_cliente)
+    assert contas[entrada_recente.id_conta]['ultima_movimentacao'] == datetime(2026, 3, 10, 8, 0)
+    assert contas[saida_recente.id_conta]['ultima_movimentacao'] == datetime(2026, 3, 12, 18, 30)
@@ -0,0 +1,37 @@
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+import pytest
+
+from app.cliente import routes
+from app.models import db
+
+from conftest import criar_cliente, criar_conta, cliente_logado
+
+
+@pytest.mark.parametrize("rota", ['/cliente/extrato/imprimir', '/cliente/extrato/pdf',
+                                  '/cliente/extrato/excel', '/cliente/extrato/csv'])
+def test_exportacoes_sem_conta_voltam_ao_dashboard(app, banco, rota):
+    cliente = criar_cliente()
+    db.session.commit()
+    resposta = cliente_logado(app, cliente).get(rota)
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/cliente/dashboard')
+
+
+def test_pdf_que_passa_do_tempo_volta_ao_extrato(app, banco, agencia, monkeypatch):
+    cliente = criar_cliente()
+    criar_conta(cliente, agencia, saldo="10")
+    db.session.commit()
+
+    def demorado(chave, html, css):
+        raise TempoEsgotado()
+
+    monkeypatch.setattr(routes, "gerar_pdf", demorado)
+    monkeypatch.setattr(routes, "obter_pdf_em_cache", lambda chave: None)
+    http = cliente_logado(app, cliente)
+    resposta = http.get('/cliente/extrato/pdf?data_inicio=2026-01-01&data_fim=2026-01-31')
+
+    assert resposta.status_code == 302
+    assert '/cliente/extrato?' in resposta.headers['Location']
+    with http.session_transaction() as sessao:
+        assert sessao['_flashes'][0][0] == 'warning'
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app import dashboard_services
+from app.dashboard_services import CachePaineisLocal, obter_painel
+from app.models import db, Conta, Transacao
+from app.movimentacao_services import bloquear_contas, creditar
+from app.tarifa_services import cobrar_tarifas
+
+from conftest import criar_cliente, criar_conta
+
+
+def _ler_painel_no_worker(monkeypatch, cache, id_conta):
+    """Simula uma requisição atendida por outro worker: sessão nova e o cache daquele processo."""
+    db.session.remove()
+    monkeypatch.setattr(dashboard_services, "_cache", cache)
+    return obter_painel(db.session.get(Conta, id_conta))
+
+
+def test_deposito_em_um_worker_invalida_o_painel_nos_outros(banco, agencia, monkeypatch):
+    conta = criar_conta(criar_cliente(), agencia, saldo="100")
+    db.session.commit()
+    id_conta = conta.id_conta
+    worker_a, worker_b = CachePaineisLocal(100, ttl=3600), CachePaineisLocal(100, ttl=3600)
+    assert _ler_painel_no_worker(monkeypatch, worker_b, id_conta)["saldo"] == Decimal("100")
+
+    # O depósito é feito (e confirmado) no worker A.
+    db.session.remove()
+    monkeypatch.setattr(dashboard_services, "_cache", worker_a)
+    conta = bloquear_contas(id_conta)[id_conta]
+    creditar(conta, Decimal("50"))
+    db.session.add(Transacao(tipo_transacao="Deposito", valor=Decimal("50"), id_conta_destino=id_conta))
+    db.session.commit()
+
+    painel = _ler_painel_no_worker(monkeypatch, worker_b, id_conta)
+    assert painel["saldo"] == Decimal("150")
+    assert [t["valor"] for t in painel["transacoes"]] == [Decimal("50")]
+
+
+def test_comando_em_lote_invalida_o_painel(banco, agencia, monkeypatch):
+    conta = criar_conta(criar_cliente(), agencia, saldo="100", taxa_manutencao=Decimal("12.50"))
+    db.session.commit()
+    id_conta = conta.id_conta
+    worker = CachePaineisLocal(100, ttl=3600)
+    assert _ler_painel_no_worker(monkeypatch, worker, id_conta)["saldo"] == Decimal("100")
+
+    # A tarifa é cobrada por SQL, fora do ORM e fora de qualquer worker web.
+    db.session.remove()
+    agora = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    assert cobrar_tarifas(agora.strftime("%Y-%m"), id_conta, id_conta, agora) == 1
+    db.session.commit()
+
+    assert _ler_painel_no_worker(monkeypatch, worker, id_conta)["saldo"] == Decimal("87.50")
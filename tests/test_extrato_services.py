@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, or_
+
+from app.cliente.routes import LIMITE_SAQUES_GRATUITOS, TAXA_SAQUE_EXCESSIVO
+from app.extrato_services import (codificar_cursor, decodificar_cursor, consultar_extrato, iterar_extrato,
+                                  transacoes_da_conta)
+from app.models import db, Conta, Transacao
+
+from conftest import criar_cliente, criar_conta, cliente_logado
+
+
+def _transacoes_de_teste(agencia):
+    """
+    Conta com depósitos, saques, transferências nos dois sentidos, uma transação com a
+    própria conta na origem e no destino e uma transação de terceiros, um minuto entre elas.
+    """
+    conta, outra = criar_conta(criar_cliente(), agencia), criar_conta(criar_cliente(), agencia)
+    lados = [
+        {'id_conta_destino': conta.id_conta},
+        {'id_conta_origem': conta.id_conta},
+        {'id_conta_origem': conta.id_conta, 'id_conta_destino': outra.id_conta},
+        {'id_conta_origem': outra.id_conta, 'id_conta_destino': conta.id_conta},
+        {'id_conta_origem': conta.id_conta, 'id_conta_destino': conta.id_conta},
+        {'id_conta_destino': outra.id_conta},
+    ]
+    inicio = datetime(2026, 2, 1, 9, 0)
+    for i in range(12):
+        db.session.add(Transacao(tipo_transacao='Transferencia', valor=Decimal("10"),
+                                 data_hora=inicio + timedelta(minutes=i), **lados[i % len(lados)]))
+    db.session.commit()
+    return conta.id_conta
+
+
+def _pelo_or(id_conta, limite=None):
+    """A consulta de antes do UNION ALL: um OR entre as colunas de origem e destino."""
+    stmt = (select(Transacao.id_transacao, Transacao.id_conta_origem)
+            .where(or_(Transacao.id_conta_origem == id_conta, Transacao.id_conta_destino == id_conta))
+            .order_by(Transacao.data_hora.desc(), Transacao.id_transacao.desc()))
+    if limite:
+        stmt = stmt.limit(limite)
+    return db.session.execute(stmt).all()
+
+
+def _pelo_union(id_conta, **filtros):
+    transacoes = transacoes_da_conta(id_conta, **filtros)
+    return db.session.execute(
+        select(transacoes.c.id_transacao, transacoes.c.id_conta_origem)
+        .order_by(transacoes.c.data_hora.desc(), transacoes.c.id_transacao.desc())).all()
+
+
+def test_union_all_traz_as_mesmas_transacoes_que_o_or(banco, agencia):
+    id_conta = _transacoes_de_teste(agencia)
+    assert len(_pelo_or(id_conta)) == 10
+    assert _pelo_union(id_conta) == _pelo_or(id_conta)
+
+    inicio, fim = datetime(2026, 2, 1, 9, 3), datetime(2026, 2, 1, 9, 8)
+    no_periodo = db.session.execute(
+        select(Transacao.id_transacao, Transacao.id_conta_origem)
+        .where(or_(Transacao.id_conta_origem == id_conta, Transacao.id_conta_destino == id_conta),
+               Transacao.data_hora.between(inicio, fim))
+        .order_by(Transacao.data_hora.desc(), Transacao.id_transacao.desc())).all()
+    assert _pelo_union(id_conta, inicio=inicio, fim=fim) == no_periodo
+
+
+def test_transacao_da_conta_com_ela_mesma_aparece_uma_vez(banco, agencia):
+    id_conta = _transacoes_de_teste(agencia)
+    propria = db.session.execute(select(Transacao.id_transacao).where(
+        Transacao.id_conta_origem == id_conta, Transacao.id_conta_destino == id_conta)).scalars().all()
+    assert len(propria) == 2
+    ids = [id_transacao for id_transacao, _ in _pelo_union(id_conta)]
+    assert all(ids.count(id_transacao) == 1 for id_transacao in propria)
+
+
+def test_limite_vale_para_cada_ramo(banco, agencia):
+    id_conta = _transacoes_de_teste(agencia)
+    linhas = _pelo_union(id_conta, limite=3)
+    do_ramo_de_origem = [linha for linha in linhas if linha.id_conta_origem == id_conta]
+    # Cada ramo traz no máximo `limite` linhas; quem consome aplica o limite final.
+    assert len(do_ramo_de_origem) == 3
+    assert len(linhas) - len(do_ramo_de_origem) == 3
+    assert linhas[:3] == _pelo_or(id_conta, limite=3)
+
+
+def _conferir_com_razao(id_conta, saldo_inicial):
+    """Refaz o razão da conta, da transação mais antiga para a mais recente, e compara com saldo_apos."""
+    linhas = list(reversed(list(iterar_extrato(id_conta))))
+    saldo = Decimal(saldo_inicial)
+    for linha in linhas:
+        saldo += linha.valor if linha.id_conta_destino == id_conta else -linha.valor
+        assert linha.saldo_apos == saldo, f"transação {linha.id_transacao}: {linha.saldo_apos} != {saldo}"
+    assert saldo == db.session.get(Conta, id_conta).saldo
+    return linhas
+
+
+def test_saldo_apos_confere_com_o_razao_quando_o_saque_cobra_taxa(app, banco, agencia):
+    cliente = criar_cliente()
+    conta = criar_conta(cliente, agencia, saldo="1000")
+    db.session.commit()
+    id_conta = conta.id_conta
+    http = cliente_logado(app, cliente)
+
+    http.post('/cliente/deposito', data={'valor': '200'})
+    for _ in range(LIMITE_SAQUES_GRATUITOS + 2):
+        http.post('/cliente/saque', data={'valor': '10'})
+    db.session.remove()
+
+    linhas = _conferir_com_razao(id_conta, "1000")
+    taxas = [linha for linha in linhas if linha.tipo_transacao == 'Pagamento']
+    assert [linha.valor for linha in taxas] == [TAXA_SAQUE_EXCESSIVO] * 2
+    assert db.session.get(Conta, id_conta).saldo == Decimal("1000") + 200 - 10 * (LIMITE_SAQUES_GRATUITOS + 2) - 2 * TAXA_SAQUE_EXCESSIVO
+
+
+def _historico(agencia, movimentos, saldo_inicial="0"):
+    """Conta com uma transação por movimento (positivo = depósito, negativo = saque), um minuto entre elas."""
+    conta = criar_conta(criar_cliente(), agencia, saldo=saldo_inicial)
+    inicio = datetime(2026, 1, 1, 8, 0)
+    for i, valor in enumerate(movimentos):
+        valor = Decimal(valor)
+        lado = {'id_conta_destino': conta.id_conta} if valor > 0 else {'id_conta_origem': conta.id_conta}
+        db.session.add(Transacao(tipo_transacao='Deposito' if valor > 0 else 'Saque', valor=abs(valor),
+                                 data_hora=inicio + timedelta(minutes=i), **lado))
+        conta.saldo += valor
+    db.session.commit()
+    return conta.id_conta
+
+
+def test_paginas_do_extrato_partem_do_saldo_do_cursor(app, banco, agencia):
+    movimentos = ['100', '-30', '250', '-75.50', '12', '-8', '40', '-100', '5', '60', '-1']
+    id_conta = _historico(agencia, movimentos, saldo_inicial="10")
+    esperado = list(reversed(_conferir_com_razao(id_conta, "10")))
+
+    with app.test_request_context():
+        linhas, cursor = [], None
+        while True:
+            pagina, cursor = consultar_extrato(id_conta, cursor=cursor, limite=3)
+            linhas += pagina
+            if cursor is None:
+                break
+    assert [(l.id_transacao, l.saldo_apos) for l in linhas] == [(l.id_transacao, l.saldo_apos) for l in esperado]
+
+
+def test_extrato_com_fim_do_periodo_parte_do_saldo_naquele_instante(app, banco, agencia):
+    id_conta = _historico(agencia, ['100', '-30', '250', '-75.50', '12'])
+    fim = datetime(2026, 1, 1, 8, 2)  # inclui só as três primeiras transações
+    with app.test_request_context():
+        pagina, cursor = consultar_extrato(id_conta, fim=fim, limite=10)
+    assert cursor is None
+    assert [l.saldo_apos for l in pagina] == [Decimal('320'), Decimal('70'), Decimal('100')]
+
+
+def test_cursor_adulterado_volta_para_a_primeira_pagina(app, banco, agencia):
+    id_conta = _historico(agencia, ['100', '-30', '250'])
+    with app.test_request_context():
+        primeira, cursor = consultar_extrato(id_conta, limite=2)
+        pagina, _ = consultar_extrato(id_conta, cursor=cursor[:-2] + 'xx', limite=2)
+    assert [l.id_transacao for l in pagina] == [l.id_transacao for l in primeira]
+
+
+def test_cursor_vale_so_para_a_conta_e_o_periodo_em_que_foi_gerado(app):
+    inicio, fim = datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59)
+    posicao = (datetime(2026, 1, 10, 8, 0), 42, Decimal('150.00'))
+    with app.app_context():
+        cursor = codificar_cursor(7, inicio, fim, *posicao)
+        assert decodificar_cursor(cursor, 7, inicio, fim) == posicao
+        assert decodificar_cursor(cursor, 8, inicio, fim) is None
+        assert decodificar_cursor(cursor, 7, inicio, datetime(2026, 2, 28)) is None
+        assert decodificar_cursor(cursor, 7) is None
+
+
+def test_cursor_de_outra_conta_volta_para_a_primeira_pagina(app, banco, agencia):
+    id_conta = _historico(agencia, ['100', '-30', '250'])
+    outra = _historico(agencia, ['500', '-20', '10'])
+    with app.test_request_context():
+        _, cursor = consultar_extrato(outra, limite=2)
+        primeira, _ = consultar_extrato(id_conta, limite=2)
+        pagina, _ = consultar_extrato(id_conta, cursor=cursor, limite=2)
+    assert [(l.id_transacao, l.saldo_apos) for l in pagina] == [(l.id_transacao, l.saldo_apos) for l in primeira]
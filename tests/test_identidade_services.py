@@ -0,0 +1,143 @@
+import re
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from flask import session
+from sqlalchemy import event
+
+from app import identidade_services
+from app.identidade_services import carregar_cliente, perfil_funcionario
+from app.models import db, Funcionario, ContaCorrente, ContaPoupanca, ContaInvestimento
+
+from conftest import criar_usuario, criar_cliente, criar_conta, cliente_logado
+
+# Um SELECT só na tabela do subtipo é a carga preguiçosa que with_polymorphic evita.
+CARGA_DE_SUBTIPO = re.compile(r"\bFROM conta_(corrente|poupanca|investimento)\b")
+
+
+@contextmanager
+def contar_consultas():
+    """Conta os comandos SQL enviados ao banco dentro do bloco."""
+    comandos = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        comandos.append(sql)
+
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+
+
+def test_contas_do_cliente_vem_com_as_colunas_do_subtipo(app, banco, agencia):
+    cliente = criar_cliente()
+    criar_conta(cliente, agencia, "Corrente", limite_cheque_especial=Decimal("500"))
+    criar_conta(cliente, agencia, "Poupanca", taxa_rendimento=Decimal("0.50"))
+    criar_conta(cliente, agencia, "Investimento", valor_minimo_deposito=Decimal("100"))
+    db.session.commit()
+    id_usuario = cliente.id_usuario
+    db.session.remove()
+
+    with app.test_request_context():
+        session['user_id'] = id_usuario
+        with contar_consultas() as carga:
+            contas = carregar_cliente().contas
+        # Cliente + usuário num SELECT; as contas, com as tabelas dos subtipos, em outro.
+        assert len(carga) == 2
+
+        with contar_consultas() as leitura:
+            valores = {type(conta): (conta.limite_cheque_especial if isinstance(conta, ContaCorrente) else
+                                     conta.taxa_rendimento if isinstance(conta, ContaPoupanca) else
+                                     conta.valor_minimo_deposito)
+                       for conta in contas}
+        assert leitura == []
+    assert valores == {ContaCorrente: Decimal("500"), ContaPoupanca: Decimal("0.50"),
+                       ContaInvestimento: Decimal("100")}
+
+
+PAGINAS = [
+    ('GET', '/cliente/dashboard', None),
+    ('GET', '/cliente/extrato', None),
+    ('GET', '/cliente/deposito', None),
+    ('POST', '/cliente/deposito', {'valor': '50'}),
+    ('GET', '/cliente/saque', None),
+    ('POST', '/cliente/saque', {'valor': '10'}),
+    ('GET', '/cliente/transferencia', None),
+    ('POST', '/cliente/transferencia', {'valor': '10'}),
+]
+
+
+@pytest.mark.parametrize("metodo, pagina, dados", PAGINAS)
+def test_consultas_da_pagina_nao_crescem_com_as_contas_do_cliente(app, banco, agencia, metodo, pagina, dados):
+    """
+    A mesma página, para um cliente com uma conta corrente e para outro com uma conta
+    de cada tipo, envia o mesmo número de comandos e nenhum SELECT avulso de subtipo.
+    """
+    destino = criar_conta(criar_cliente(), agencia)
+    clientes = []
+    for tipos in (("Corrente",), ("Corrente",), ("Corrente", "Poupanca", "Investimento")):
+        cliente = criar_cliente()
+        for tipo in tipos:
+            criar_conta(cliente, agencia, tipo, saldo="1000")
+        clientes.append(cliente)
+    db.session.commit()
+    if dados and pagina.endswith('transferencia'):
+        dados = {**dados, 'numero_conta_destino': destino.numero_conta}
+    db.session.remove()
+
+    comandos_por_cliente = []
+    # O primeiro cliente só aquece a aplicação (consultas feitas uma vez por processo).
+    for cliente in clientes:
+        http = cliente_logado(app, cliente)
+        with contar_consultas() as comandos:
+            resposta = http.open(pagina, method=metodo, data=dados)
+        assert resposta.status_code in (200, 302)
+        comandos_por_cliente.append(comandos)
+        db.session.remove()
+
+    _, uma_conta, tres_contas = comandos_por_cliente
+    assert len(tres_contas) == len(uma_conta)
+    assert not [sql for sql in tres_contas if CARGA_DE_SUBTIPO.search(sql)]
+
+
+@pytest.fixture
+def perfis_vazios(monkeypatch):
+    # Os ids se repetem entre testes (as tabelas são recriadas): cada teste começa sem cache.
+    monkeypatch.setattr(identidade_services, "_perfis", None)
+
+
+def criar_funcionario(cargo):
+    usuario = criar_usuario("Funcionario")
+    funcionario = Funcionario(usuario=usuario, codigo_funcionario=f"T{usuario.CPF}", cargo=cargo)
+    db.session.add(funcionario)
+    db.session.commit()
+    return funcionario
+
+
+def test_perfil_e_do_usuario_informado(app, banco, perfis_vazios):
+    gerente = criar_funcionario("Gerente")
+    atendente = criar_funcionario("Atendente")
+    with app.test_request_context():
+        session['user_id'] = gerente.id_usuario
+        assert perfil_funcionario(atendente.id_usuario) == {'nome': atendente.usuario.nome, 'cargo': 'Atendente'}
+    # Fora de uma requisição (sem sessão) também funciona.
+    assert perfil_funcionario(gerente.id_usuario)['cargo'] == 'Gerente'
+
+
+def test_rebaixamento_vale_na_requisicao_seguinte(app, banco, perfis_vazios):
+    gerente = criar_funcionario("Gerente")
+    http = app.test_client()
+    with http.session_transaction() as sessao:
+        sessao['user_id'] = gerente.id_usuario
+        sessao['user_type'] = 'Funcionario'
+    assert http.get('/funcionario/cadastro-funcionario').status_code == 200
+    assert perfil_funcionario(gerente.id_usuario)['cargo'] == 'Gerente'  # perfil em cache
+
+    gerente.cargo = 'Estagiario'
+    db.session.commit()
+    resposta = http.get('/funcionario/cadastro-funcionario')
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/funcionario/dashboard')
+    assert perfil_funcionario(gerente.id_usuario)['cargo'] == 'Estagiario'
@@ -0,0 +1,53 @@
+import csv
+import io
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+import pytest
+
+from app import importacao_services
+from app.importacao_services import importar_clientes, passa_do_limite
+from app.models import db, Usuario, Funcionario
+from app.senha_services import FilaSenhasCheia, MENSAGEM_OCUPADO
+
+from conftest import criar_usuario
+
+PLANILHA = (
+    "nome;cpf;data_nascimento;telefone;email;senha;tipo_conta;taxa_rendimento\n"
+    "Ana;52998224725;1990-05-01;61999990001;ana@teste.local;senha123;Poupanca;0.5\n"
+    "Bruno;39053344705;1985-10-20;61999990002;bruno@teste.local;senha123;Poupanca;0.5\n"
+)
+
+
+@pytest.mark.parametrize("erro", [FilaSenhasCheia(MENSAGEM_OCUPADO), TempoEsgotado()])
+def test_pool_de_senhas_indisponivel_rejeita_so_o_lote(app, banco, agencia, monkeypatch, erro):
+    funcionario = Funcionario(usuario=criar_usuario("Funcionario"), codigo_funcionario="G0001", cargo="Gerente")
+    db.session.add(funcionario)
+    db.session.commit()
+    gerar = importacao_services.gerar_hashes_senha
+    chamadas = []
+
+    def segundo_lote_falha(senhas):
+        chamadas.append(senhas)
+        if len(chamadas) == 2:
+            raise erro
+        return gerar(senhas)
+
+    monkeypatch.setattr(importacao_services, "gerar_hashes_senha", segundo_lote_falha)
+    relatorio = io.StringIO()
+    with app.test_request_context():
+        resultado = importar_clientes(io.BytesIO(PLANILHA.encode()), "clientes.csv", funcionario.id_usuario,
+                                      relatorio, tamanho_lote=1)
+
+    assert resultado == {'importados': 1, 'rejeitados': 1}
+    linhas = list(csv.reader(io.StringIO(relatorio.getvalue()), delimiter=';'))
+    assert linhas[1][:3] == ['3', '39053344705', 'bruno@teste.local']
+    assert 'senhas' in linhas[1][3]
+    assert [u.CPF for u in Usuario.query.filter_by(tipo_usuario='Cliente')] == ['52998224725']
+
+
+def test_limite_de_linhas_le_so_o_necessario_e_volta_ao_inicio():
+    arquivo = io.BytesIO(PLANILHA.encode())
+    assert passa_do_limite(arquivo, "clientes.csv", 1)
+    assert arquivo.tell() == 0
+    assert not passa_do_limite(arquivo, "clientes.csv", 2)
+    assert arquivo.read() == PLANILHA.encode()
@@ -0,0 +1,14 @@
+def test_metrics_sem_token_fica_fechado_fora_do_debug(app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICAS_TOKEN", "")
+    monkeypatch.setattr(app, "debug", False)
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_exige_o_token_configurado(app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICAS_TOKEN", "segredo")
+    http = app.test_client()
+    assert http.get('/metrics').status_code == 401
+    assert http.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    resposta = http.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/plain'
@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Transacao, Auditoria
+
+
+@pytest.mark.parametrize("modelo", [Transacao, Auditoria])
+def test_data_hora_padrao_e_utc_sem_fuso(modelo):
+    # data_hora faz parte da chave primária (DATETIME, sem fuso): o valor padrão precisa
+    # ser igual ao que o banco devolve, senão o mapa de identidade da sessão diverge.
+    valor = modelo.__table__.c.data_hora.default.arg(None)
+    assert valor.tzinfo is None and valor.microsecond == 0
+    assert abs(valor - datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)) < timedelta(seconds=5)
@@ -0,0 +1,42 @@
+import threading
+from decimal import Decimal
+
+from app.models import db, Conta, Transacao
+from app.movimentacao_services import bloquear_contas, debitar
+
+from conftest import criar_cliente, criar_conta
+
+
+def test_saques_simultaneos_nao_passam_do_saldo(app, banco, agencia):
+    conta = criar_conta(criar_cliente(), agencia, saldo="100")
+    db.session.commit()
+    id_conta = conta.id_conta
+    largada = threading.Barrier(2)
+    resultados = []
+
+    def sacar():
+        # Cada thread tem seu próprio contexto e, portanto, sua própria sessão/conexão.
+        with app.app_context():
+            largada.wait()
+            try:
+                conta = bloquear_contas(id_conta)[id_conta]
+                debitar(conta, Decimal("70"))
+                db.session.add(Transacao(tipo_transacao='Saque', valor=Decimal("70"), id_conta_origem=id_conta))
+                db.session.commit()
+                resultados.append('ok')
+            except ValueError:
+                db.session.rollback()
+                resultados.append('sem saldo')
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=sacar) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert sorted(resultados) == ['ok', 'sem saldo']
+    db.session.remove()
+    assert db.session.get(Conta, id_conta).saldo == Decimal("30")
+    assert Transacao.query.filter_by(id_conta_origem=id_conta).count() == 1
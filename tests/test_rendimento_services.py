@@ -0,0 +1,23 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.models import db, Conta, Transacao
+from app.rendimento_services import aplicar_rendimentos
+
+from conftest import criar_cliente, criar_conta
+
+
+def test_taxa_em_percentual_ao_ano(banco, agencia):
+    # 6% a.a. sobre R$ 1.000,00 por 73 dias = 1000 * 0.06 * 73 / 365 = R$ 12,00.
+    conta = criar_conta(criar_cliente(), agencia, "Poupanca", saldo="1000", taxa_rendimento=Decimal("6.00"),
+                        ultimo_rendimento=datetime(2026, 1, 1))
+    db.session.commit()
+    id_conta = conta.id_conta
+    agora = datetime(2026, 3, 15, 3, 0)
+
+    assert aplicar_rendimentos('Poupanca', id_conta, id_conta, date(2026, 3, 15), agora) == 1
+    db.session.commit()
+    db.session.remove()
+
+    assert db.session.get(Conta, id_conta).saldo == Decimal("1012.00")
+    assert [t.valor for t in Transacao.query.filter_by(id_conta_destino=id_conta)] == [Decimal("12.00")]
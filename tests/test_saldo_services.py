@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from app.cliente.routes import LIMITE_SAQUES_GRATUITOS, TAXA_SAQUE_EXCESSIVO
+from app.models import db, SaldoDiario
+from app.saldo_services import reconstruir_saldos
+
+from conftest import criar_cliente, criar_conta, cliente_logado
+
+
+def _fotos(*ids_conta):
+    linhas = (SaldoDiario.query.filter(SaldoDiario.id_conta.in_(ids_conta))
+              .order_by(SaldoDiario.id_conta, SaldoDiario.data).all())
+    return [(l.id_conta, l.data, l.creditos, l.debitos, l.saldo_abertura, l.saldo_fechamento) for l in linhas]
+
+
+def test_reconstrucao_confere_com_os_saldos_incrementais(app, banco, agencia):
+    cliente = criar_cliente()
+    conta = criar_conta(cliente, agencia, saldo="1000")
+    outra = criar_conta(criar_cliente(), agencia, saldo="50")
+    db.session.commit()
+    ids = (conta.id_conta, outra.id_conta)
+    http = cliente_logado(app, cliente)
+
+    http.post('/cliente/deposito', data={'valor': '300'})
+    for _ in range(LIMITE_SAQUES_GRATUITOS + 2):  # os dois últimos saques cobram taxa
+        http.post('/cliente/saque', data={'valor': '25.50'})
+    http.post('/cliente/transferencia', data={'numero_conta_destino': outra.numero_conta, 'valor': '120'})
+    db.session.remove()
+
+    incrementais = _fotos(*ids)
+    debitos = sum(linha[3] for linha in incrementais if linha[0] == ids[0])
+    assert debitos == Decimal("25.50") * (LIMITE_SAQUES_GRATUITOS + 2) + 2 * TAXA_SAQUE_EXCESSIVO + 120
+
+    reconstruir_saldos(min(ids), max(ids))
+    db.session.commit()
+    db.session.remove()
+    assert _fotos(*ids) == incrementais
@@ -0,0 +1,22 @@
+from app.models import Usuario, Funcionario
+
+from seed import seed_data
+
+
+def test_cadastro_de_funcionario_depois_do_seed(app, banco):
+    seed_data(app)
+    gerente = Funcionario.query.filter_by(cargo='Gerente').one()
+
+    http = app.test_client()
+    with http.session_transaction() as sessao:
+        sessao['user_id'] = gerente.id_usuario
+        sessao['user_type'] = 'Funcionario'
+    resposta = http.post('/funcionario/cadastro-funcionario', data={
+        'nome': 'Novo Funcionário', 'cpf': '333.333.333-33', 'data_nascimento': '1995-05-05',
+        'telefone': '(11) 93333-3333', 'email': 'novo@teste.local', 'senha': 'senha-forte-123',
+        'cargo': 'Atendente'})
+
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/funcionario/dashboard')
+    novo = Funcionario.query.join(Usuario).filter(Usuario.CPF == '33333333333').one()
+    assert novo.codigo_funcionario != gerente.codigo_funcionario
@@ -0,0 +1,36 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.models import db, Conta, CobrancaTarifa
+from app.tarifa_services import cobrar_tarifas, contas_sem_fundos
+
+from conftest import criar_cliente, criar_conta
+
+
+def _saldos(*ids_conta):
+    db.session.remove()
+    return [db.session.get(Conta, id_conta).saldo for id_conta in ids_conta]
+
+
+def test_tarifa_respeita_saldo_e_cheque_especial(banco, agencia):
+    cliente = criar_cliente()
+    tarifa = {"taxa_manutencao": Decimal("15")}
+    com_saldo = criar_conta(cliente, agencia, saldo="100", **tarifa)
+    no_limite = criar_conta(cliente, agencia, saldo="5", limite_cheque_especial=Decimal("20"), **tarifa)
+    sem_fundos = criar_conta(cliente, agencia, saldo="5", **tarifa)
+    db.session.commit()
+    ids = (com_saldo.id_conta, no_limite.id_conta, sem_fundos.id_conta)
+
+    assert cobrar_tarifas('2026-03', min(ids), max(ids), datetime(2026, 3, 1, 4, 0)) == 2
+    db.session.commit()
+    assert _saldos(*ids) == [Decimal("85"), Decimal("-10"), Decimal("5")]
+    assert CobrancaTarifa.query.filter_by(id_conta=ids[2]).count() == 0
+    assert contas_sem_fundos('2026-03', min(ids), max(ids)) == [ids[2]]
+
+    # Com saldo, a conta que ficou de fora é cobrada na execução seguinte do mesmo mês.
+    db.session.get(Conta, ids[2]).saldo += 20
+    db.session.commit()
+    assert cobrar_tarifas('2026-03', min(ids), max(ids), datetime(2026, 3, 2, 4, 0)) == 1
+    db.session.commit()
+    assert _saldos(*ids) == [Decimal("85"), Decimal("-10"), Decimal("10")]
+    assert contas_sem_fundos('2026-03', min(ids), max(ids)) == []